@@ -0,0 +1,148 @@
+import os
+import random
+
+WORDS = (
+    "the of and to in is was that for on with as by at from his her ring shire "
+    "elves dwarves wizard mountain river forest shadow light journey fellowship "
+    "king road tower sword fire stone song ancient hobbit quest council valley"
+).split()
+
+
+class CorpusSpec:
+    """
+    Describes the shape of a synthetic site.
+
+    Attributes:
+        pages (int): Number of pages to generate.
+        page_size (int): Approximate size of each page in bytes.
+        link_density (float): Probability that a word is followed by a link.
+        image_density (float): Probability that a word is followed by an image.
+        emphasis_density (float): Probability that a word is bold, italic or code.
+        list_ratio (float): Share of blocks that are ordered or unordered lists.
+        code_ratio (float): Share of blocks that are fenced code blocks.
+        quote_ratio (float): Share of blocks that are quotes.
+        heading_ratio (float): Share of blocks that are subheadings.
+        sections (int): Number of directories the pages are spread over.
+        seed (int): Random seed; the same spec always yields the same site.
+    """
+
+    def __init__(self, pages=100, page_size=4096, link_density=0.02, image_density=0.005,
+                 emphasis_density=0.05, list_ratio=0.15, code_ratio=0.05, quote_ratio=0.05,
+                 heading_ratio=0.1, sections=10, seed=0):
+        """
+        Initialize a CorpusSpec; see the class attributes for the arguments.
+        """
+        self.pages = pages
+        self.page_size = page_size
+        self.link_density = link_density
+        self.image_density = image_density
+        self.emphasis_density = emphasis_density
+        self.list_ratio = list_ratio
+        self.code_ratio = code_ratio
+        self.quote_ratio = quote_ratio
+        self.heading_ratio = heading_ratio
+        self.sections = sections
+        self.seed = seed
+
+
+def _inline_text(rng, spec, words):
+    """
+    Generate a line of text sprinkled with inline markup.
+
+    Args:
+        rng (random.Random): Source of randomness.
+        spec (CorpusSpec): Corpus shape.
+        words (int): Number of plain words.
+
+    Returns:
+        str: The generated text.
+    """
+    parts = []
+    for _ in range(words):
+        word = rng.choice(WORDS)
+        roll = rng.random()
+        if roll < spec.emphasis_density:
+            style = rng.choice(("**{}**", "*{}*", "`{}`"))
+            word = style.format(word)
+        parts.append(word)
+        if rng.random() < spec.link_density:
+            parts.append(f"[{rng.choice(WORDS)} {rng.choice(WORDS)}](https://example.com/{rng.choice(WORDS)})")
+        if rng.random() < spec.image_density:
+            parts.append(f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)")
+    return " ".join(parts)
+
+
+def _block(rng, spec):
+    """
+    Generate one markdown block of a randomly chosen type.
+
+    Args:
+        rng (random.Random): Source of randomness.
+        spec (CorpusSpec): Corpus shape.
+
+    Returns:
+        str: The generated block.
+    """
+    roll = rng.random()
+    if roll < spec.code_ratio:
+        lines = [f"    {rng.choice(WORDS)}({rng.choice(WORDS)}, {rng.randint(0, 99)})"
+                 for _ in range(rng.randint(2, 8))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    roll -= spec.code_ratio
+    if roll < spec.list_ratio:
+        items = [_inline_text(rng, spec, rng.randint(3, 10)) for _ in range(rng.randint(2, 6))]
+        if rng.random() < 0.5:
+            return "\n".join(f"* {item}" for item in items)
+        return "\n".join(f"{i}. {item}" for i, item in enumerate(items, 1))
+    roll -= spec.list_ratio
+    if roll < spec.quote_ratio:
+        return "\n".join(f"> {_inline_text(rng, spec, rng.randint(4, 12))}" for _ in range(rng.randint(1, 3)))
+    roll -= spec.quote_ratio
+    if roll < spec.heading_ratio:
+        return "#" * rng.randint(2, 4) + " " + _inline_text(rng, spec, rng.randint(2, 5))
+    lines = [_inline_text(rng, spec, rng.randint(8, 16)) for _ in range(rng.randint(1, 4))]
+    return "\n".join(lines)
+
+
+def generate_markdown(spec, index=0):
+    """
+    Generate the markdown of one synthetic page.
+
+    Args:
+        spec (CorpusSpec): Corpus shape.
+        index (int, optional): Page number; each page gets its own stream of
+            randomness derived from the spec's seed.
+
+    Returns:
+        str: The page's markdown.
+    """
+    rng = random.Random(spec.seed * 1_000_003 + index)
+    blocks = [f"# Page {index}: {_inline_text(rng, spec, 3)}"]
+    size = len(blocks[0])
+    while size < spec.page_size:
+        block = _block(rng, spec)
+        blocks.append(block)
+        size += len(block) + 2
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_site(spec, content_dir):
+    """
+    Write a synthetic site of markdown pages to a directory.
+
+    Args:
+        spec (CorpusSpec): Corpus shape.
+        content_dir (str): Directory receiving the pages.
+
+    Returns:
+        int: Total size of the generated markdown in bytes.
+    """
+    total = 0
+    for index in range(spec.pages):
+        section = os.path.join(content_dir, f"section{index % spec.sections}")
+        os.makedirs(section, exist_ok=True)
+        markdown = generate_markdown(spec, index)
+        with open(os.path.join(section, f"page{index}.md"), 'w') as f:
+            f.write(markdown)
+        total += len(markdown.encode("utf-8"))
+    return total
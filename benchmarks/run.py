@@ -0,0 +1,426 @@
+import argparse
+import contextlib
+import io
+import os
+import re
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import CorpusSpec, generate_markdown, generate_site
+from src.markdown_blocks import block_to_block_type, iter_blocks, markdown_to_blocks
+from src.inline_cache import InlineCache, set_inline_cache
+from src.markdown_to_html import markdown_to_html_node, markdown_to_html_string
+from src.minify import HTMLMinifier, minify_html
+from src.htmlnode import ParentNode
+from src.page_generator import generate_pages_recursive
+from src.parse_cache import ParseCache
+from src.split_node import split_nodes_delimiter, split_nodes_image, split_nodes_link
+from src.text_to_node import text_to_textnodes, text_to_textnodes_multipass
+from src.textnode import TextNode
+
+TEMPLATE = "<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+
+# Registered micro-benchmarks: (name, setup) pairs, see micro_benchmark()
+MICRO_BENCHMARKS = []
+
+
+def micro_benchmark(name):
+    """
+    Register a micro-benchmark.
+
+    The decorated setup function receives a Corpus and returns a tuple
+    (fn, nbytes, npages): the callable to time, the number of input bytes it
+    processes per call and the number of pages it covers (None when the
+    stage does not work on whole pages).
+
+    Args:
+        name (str): Name shown in the report.
+    """
+    def register(setup):
+        MICRO_BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+class Corpus:
+    """
+    In-memory synthetic pages and the intermediate inputs of each stage.
+
+    Attributes:
+        pages (list): Markdown of each page.
+        blocks (list): All blocks of all pages.
+        texts (list): Inline text runs (paragraph lines, list items, headings).
+        trees (list): HTML node tree of each page.
+    """
+
+    def __init__(self, spec):
+        """
+        Generate the corpus.
+
+        Args:
+            spec (CorpusSpec): Corpus shape.
+        """
+        self.pages = [generate_markdown(spec, index) for index in range(spec.pages)]
+        self.blocks = [block for page in self.pages for block in markdown_to_blocks(page)]
+        self.texts = []
+        for block in self.blocks:
+            if block.startswith("```"):
+                continue
+            for line in block.split("\n"):
+                self.texts.append(re.sub(r"^(#+ |> |\* |\d+\. )", "", line))
+        self.trees = [markdown_to_html_node(page) for page in self.pages]
+
+
+def _size(strings):
+    return sum(len(s.encode("utf-8")) for s in strings)
+
+
+@micro_benchmark("markdown_to_blocks")
+def bench_markdown_to_blocks(corpus):
+    return lambda: [markdown_to_blocks(page) for page in corpus.pages], _size(corpus.pages), len(corpus.pages)
+
+
+@micro_benchmark("block_to_block_type")
+def bench_block_to_block_type(corpus):
+    return lambda: [block_to_block_type(block) for block in corpus.blocks], _size(corpus.blocks), None
+
+
+@micro_benchmark("iter_blocks")
+def bench_iter_blocks(corpus):
+    return (lambda: [list(iter_blocks(page.split("\n"))) for page in corpus.pages],
+            _size(corpus.pages), len(corpus.pages))
+
+
+@micro_benchmark("split_nodes_image")
+def bench_split_nodes_image(corpus):
+    return (lambda: [split_nodes_image([TextNode(text, "text")]) for text in corpus.texts],
+            _size(corpus.texts), None)
+
+
+@micro_benchmark("split_nodes_link")
+def bench_split_nodes_link(corpus):
+    return (lambda: [split_nodes_link([TextNode(text, "text")]) for text in corpus.texts],
+            _size(corpus.texts), None)
+
+
+@micro_benchmark("split_nodes_delimiter")
+def bench_split_nodes_delimiter(corpus):
+    def run():
+        for text in corpus.texts:
+            nodes = [TextNode(text, "text")]
+            for delimiter, text_type in (("**", "bold"), ("*", "italic"), ("`", "code")):
+                nodes = split_nodes_delimiter(nodes, delimiter, text_type)
+    return run, _size(corpus.texts), None
+
+
+@micro_benchmark("text_to_textnodes")
+def bench_text_to_textnodes(corpus):
+    return lambda: [text_to_textnodes(text) for text in corpus.texts], _size(corpus.texts), None
+
+
+@micro_benchmark("text_to_textnodes_multipass")
+def bench_text_to_textnodes_multipass(corpus):
+    return lambda: [text_to_textnodes_multipass(text) for text in corpus.texts], _size(corpus.texts), None
+
+
+# Adversarial inline markup; each text is one paragraph of about 400 KB,
+# on which quadratic splitting takes seconds
+PATHOLOGICAL_TEXTS = {
+    "links": "[a](b)" * 70000,
+    "stray_brackets": "x [ ](" * 70000,
+    "bang_brackets": "[!)" * 140000,
+    "images": "![a](b) " * 50000,
+    "unclosed_images": "![a](b " * 60000,
+    "delimiters": "*a**`" * 80000,
+}
+
+
+def _pathological_benchmark(name, text):
+    @micro_benchmark(f"pathological_{name}")
+    def setup(corpus):
+        return lambda: text_to_textnodes(text), len(text), None
+
+
+for _name, _text in PATHOLOGICAL_TEXTS.items():
+    _pathological_benchmark(_name, _text)
+
+
+# Adversarial HTML for the minifier, about 400 KB each, written in one piece
+# or in small chunks as a streamed page body is
+PATHOLOGICAL_HTML = {
+    "raw_text_blocks": "<p>x</p><pre>a  b</pre>\n" * 16000,
+    "stray_brackets": "if a<b then it's fine " * 18000,
+    "streamed_after_stray_bracket": ["if a<b then it's fine"] + [f"<p>block  {i}</p>\n" for i in range(20000)],
+}
+
+
+def _pathological_minify_benchmark(name, html):
+    @micro_benchmark(f"pathological_minify_{name}")
+    def setup(corpus):
+        chunks = [html] if isinstance(html, str) else html
+
+        def run():
+            minifier = HTMLMinifier(io.StringIO())
+            for chunk in chunks:
+                minifier.write(chunk)
+            minifier.close()
+        return run, _size(chunks), None
+
+
+for _name, _html in PATHOLOGICAL_HTML.items():
+    _pathological_minify_benchmark(_name, _html)
+
+
+@micro_benchmark("markdown_to_html_node")
+def bench_markdown_to_html_node(corpus):
+    return lambda: [markdown_to_html_node(page) for page in corpus.pages], _size(corpus.pages), len(corpus.pages)
+
+
+@micro_benchmark("markdown_to_html_node_inline_cache")
+def bench_markdown_to_html_node_inline_cache(corpus):
+    def run():
+        # One cache for the whole corpus, as a worker keeps it across pages
+        set_inline_cache(InlineCache(4096))
+        try:
+            return [markdown_to_html_node(page) for page in corpus.pages]
+        finally:
+            set_inline_cache(None)
+    return run, _size(corpus.pages), len(corpus.pages)
+
+
+@micro_benchmark("markdown_to_html_node+to_html")
+def bench_markdown_to_html_node_to_html(corpus):
+    return (lambda: [markdown_to_html_node(page).to_html() for page in corpus.pages], _size(corpus.pages),
+            len(corpus.pages))
+
+
+@micro_benchmark("markdown_to_html_string")
+def bench_markdown_to_html_string(corpus):
+    return lambda: [markdown_to_html_string(page) for page in corpus.pages], _size(corpus.pages), len(corpus.pages)
+
+
+@micro_benchmark("to_html")
+def bench_to_html(corpus):
+    return lambda: [tree.to_html() for tree in corpus.trees], _size(corpus.pages), len(corpus.pages)
+
+
+@micro_benchmark("minify_html")
+def bench_minify_html(corpus):
+    documents = [tree.to_html() for tree in corpus.trees]
+    return lambda: [minify_html(document) for document in documents], _size(documents), len(documents)
+
+
+def best_time(fn, repeat):
+    """
+    Time a callable several times and keep the fastest run, which is the
+    one least disturbed by the rest of the system.
+
+    Args:
+        fn (callable): The code to time.
+        repeat (int): Number of runs.
+
+    Returns:
+        float: The fastest run in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def format_row(name, seconds, nbytes, npages):
+    """
+    Format one line of the benchmark report.
+
+    Args:
+        name (str): Benchmark name.
+        seconds (float): Time per run.
+        nbytes (int): Input bytes processed per run.
+        npages (int or None): Pages processed per run.
+
+    Returns:
+        str: The report line.
+    """
+    pages_per_second = f"{npages / seconds:>12.1f}" if npages else f"{'-':>12}"
+    mb_per_second = nbytes / seconds / 1e6
+    return f"{name:<32}{seconds * 1000:>12.2f}{pages_per_second}{mb_per_second:>10.2f}"
+
+
+def run_micro_benchmarks(spec, repeat, only=None):
+    """
+    Run the registered micro-benchmarks over an in-memory corpus.
+
+    Args:
+        spec (CorpusSpec): Corpus shape.
+        repeat (int): Runs per benchmark.
+        only (str, optional): Only run benchmarks whose name contains this.
+
+    Returns:
+        list: (name, seconds, nbytes, npages) tuples.
+    """
+    corpus = Corpus(spec)
+    results = []
+    for name, setup in MICRO_BENCHMARKS:
+        if only and only not in name:
+            continue
+        fn, nbytes, npages = setup(corpus)
+        results.append((name, best_time(fn, repeat), nbytes, npages))
+    return results
+
+
+def _count_nodes(trees):
+    count = 0
+    stack = list(trees)
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, ParentNode):
+            stack.extend(node.children)
+    return count
+
+
+def run_node_benchmark(spec, repeat):
+    """
+    Measure the memory held per node and the rate at which nodes are built,
+    for the TextNodes of the corpus' inline texts and for the HTML node
+    trees of its pages.
+
+    Memory is what the built nodes keep allocated (their text included),
+    divided by the number of nodes.
+
+    Args:
+        spec (CorpusSpec): Corpus shape.
+        repeat (int): Runs per measurement, the fastest is kept.
+
+    Returns:
+        list: (name, nodes, bytes per node, nodes per second) tuples.
+    """
+    corpus = Corpus(spec)
+    stages = [
+        ("TextNode", lambda: [text_to_textnodes(text) for text in corpus.texts],
+         lambda lists: sum(len(nodes) for nodes in lists)),
+        ("HTMLNode", lambda: [markdown_to_html_node(page) for page in corpus.pages], _count_nodes),
+    ]
+    results = []
+    for name, build, count in stages:
+        seconds = best_time(build, repeat)
+        tracemalloc.start()
+        try:
+            built = build()
+            allocated = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        nodes = count(built)
+        results.append((name, nodes, allocated / nodes, nodes / seconds))
+    return results
+
+
+def run_build_benchmark(spec, repeat, jobs=1):
+    """
+    Time full builds (with and without a warm parse cache) and no-op
+    incremental builds of a synthetic site on disk.
+
+    Args:
+        spec (CorpusSpec): Corpus shape.
+        repeat (int): Runs per benchmark.
+        jobs (int, optional): Worker processes used by the build.
+
+    Returns:
+        list: (name, seconds, nbytes, npages) tuples.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        content_dir = os.path.join(tmp, "content")
+        template_path = os.path.join(tmp, "template.html")
+        manifest_path = os.path.join(tmp, "manifest.json")
+        nbytes = generate_site(spec, content_dir)
+        with open(template_path, 'w') as f:
+            f.write(TEMPLATE)
+
+        run = 0
+
+        def full_build():
+            nonlocal run
+            run += 1
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_dir, template_path, os.path.join(tmp, f"full{run}"), jobs=jobs)
+
+        parse_cache = ParseCache(os.path.join(tmp, "trees"))
+
+        def cached_build():
+            nonlocal run
+            run += 1
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_dir, template_path, os.path.join(tmp, f"full{run}"), jobs=jobs,
+                                         parse_cache=parse_cache)
+
+        def incremental_build():
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content_dir, template_path, os.path.join(tmp, "incremental"),
+                                         manifest_path, jobs=jobs)
+
+        results = [(f"build (jobs={jobs})", best_time(full_build, repeat), nbytes, spec.pages)]
+        cached_build()
+        results.append((f"build, warm parse cache (jobs={jobs})", best_time(cached_build, repeat), nbytes,
+                        spec.pages))
+        incremental_build()
+        results.append((f"no-op rebuild (jobs={jobs})", best_time(incremental_build, repeat), nbytes, spec.pages))
+        return results
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments of the benchmark runner.
+
+    Args:
+        argv (list, optional): Argument list, defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    defaults = CorpusSpec()
+    parser = argparse.ArgumentParser(description="Benchmark the static site generator on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=defaults.pages, help="number of pages")
+    parser.add_argument("--page-size", type=int, default=defaults.page_size, help="approximate page size in bytes")
+    parser.add_argument("--link-density", type=float, default=defaults.link_density)
+    parser.add_argument("--image-density", type=float, default=defaults.image_density)
+    parser.add_argument("--emphasis-density", type=float, default=defaults.emphasis_density)
+    parser.add_argument("--list-ratio", type=float, default=defaults.list_ratio)
+    parser.add_argument("--code-ratio", type=float, default=defaults.code_ratio)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark, the best is reported")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the build benchmark")
+    parser.add_argument("--only", help="only run micro-benchmarks whose name contains this")
+    parser.add_argument("--no-build", action="store_true", help="skip the end-to-end build benchmark")
+    parser.add_argument("--nodes", action="store_true", help="also report memory per node and nodes built per second")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    spec = CorpusSpec(
+        pages=args.pages,
+        page_size=args.page_size,
+        link_density=args.link_density,
+        image_density=args.image_density,
+        emphasis_density=args.emphasis_density,
+        list_ratio=args.list_ratio,
+        code_ratio=args.code_ratio,
+        seed=args.seed,
+    )
+    print(f"{'benchmark':<32}{'ms/run':>12}{'pages/s':>12}{'MB/s':>10}")
+    results = run_micro_benchmarks(spec, args.repeat, args.only)
+    if not args.no_build and not args.only:
+        results += run_build_benchmark(spec, args.repeat, args.jobs)
+    for result in results:
+        print(format_row(*result))
+    if args.nodes:
+        print(f"\n{'nodes':<32}{'count':>12}{'bytes/node':>12}{'nodes/s':>12}")
+        for name, nodes, bytes_per_node, nodes_per_second in run_node_benchmark(spec, args.repeat):
+            print(f"{name:<32}{nodes:>12}{bytes_per_node:>12.1f}{nodes_per_second:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
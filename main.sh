@@ -1,4 +1,3 @@
 
 export PYTHONPATH=$PYTHONPATH:$(pwd)
-python3 src/main.py
-cd public && python3 -m http.server 8888
+python3 src/main.py serve --watch --port 8888
@@ -0,0 +1,386 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+from src.build_manifest import atomic_write, cached_hash
+from src.copy_directory import scan_files
+
+# Name of the asset manifest written next to the generated site
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+
+# Number of hex digits of the content hash put into fingerprinted names
+FINGERPRINT_LENGTH = 8
+
+# Files that clients request by their well-known name keep it
+UNFINGERPRINTED = frozenset({"robots.txt", "favicon.ico", "humans.txt"})
+
+# src/href attributes as serialized by HTMLNode.props_to_html and as written
+# in the template
+URL_ATTRIBUTE_PATTERN = re.compile(r'(\b(?:src|href)=")([^"]*)(")')
+
+# References of stylesheets: url(), quoted or not, and bare @import strings
+CSS_URL_PATTERN = re.compile(r"""(url\(\s*['"]?|@import\s+['"])([^'")\s]+)(['"]?\s*\)|['"])""", re.IGNORECASE)
+
+# Opening <img> tags and their src and width attributes
+IMG_TAG_PATTERN = re.compile(r"<img\b[^>]*>")
+IMG_SRC_PATTERN = re.compile(r'\ssrc="([^"]*)"')
+WIDTH_PATTERN = re.compile(r'\swidth="')
+
+
+def fingerprint_path(relative_path, digest):
+    """
+    Inserts a content hash before the extension of a file name.
+
+    Args:
+        relative_path (str): Path using "/" separators, e.g. "images/a.png".
+        digest (str): Hex digest of the file contents.
+
+    Returns:
+        str: The fingerprinted path, e.g. "images/a.1a2b3c4d.png".
+    """
+    directory, _, name = relative_path.rpartition("/")
+    stem, dot, extension = name.rpartition(".")
+    if not stem:
+        # No extension (or a dotfile such as ".nojekyll")
+        stem, dot, extension = name, ".", ""
+    fingerprinted = f"{stem}.{digest[:FINGERPRINT_LENGTH]}{dot if extension else ''}{extension}"
+    return f"{directory}/{fingerprinted}" if directory else fingerprinted
+
+
+def hash_assets(static_dir, hashes=None, include=None):
+    """
+    Hashes the static files.
+
+    Hashes are only recomputed for files whose size or modification time
+    changed since they were recorded in hashes.
+
+    Args:
+        static_dir (str): The static assets directory.
+        hashes (dict, optional): Hash entries returned by the previous call,
+            usually persisted in the build manifest.
+        include (callable, optional): Predicate on relative paths selecting
+            the files to hash; defaults to all files.
+
+    Returns:
+        dict: {"source_hash", "source_stat"} entries keyed by relative path.
+    """
+    hashes = hashes or {}
+    current_hashes = {}
+    if not os.path.isdir(static_dir):
+        return current_hashes
+    for relative_path in sorted(scan_files(static_dir)):
+        if include is not None and not include(relative_path):
+            continue
+        source_hash, source_stat = cached_hash(os.path.join(static_dir, relative_path),
+                                               hashes.get(relative_path))
+        current_hashes[relative_path] = {"source_hash": source_hash, "source_stat": source_stat}
+    return current_hashes
+
+
+def fingerprint_assets(hashes, static_dir=None):
+    """
+    Computes the fingerprinted name of every static file.
+
+    With static_dir, stylesheets are fingerprinted after their url()
+    references are rewritten (see rewrite_css_urls), so a stylesheet gets a
+    new name whenever an asset it references does.
+
+    Args:
+        hashes (dict): Hash entries of the static files, see hash_assets.
+        static_dir (str, optional): The static assets directory, to read
+            the stylesheets from.
+
+    Returns:
+        dict: Relative paths mapped to their fingerprinted relative paths.
+    """
+    assets = {}
+    stylesheets = []
+    for relative_path, entry in sorted(hashes.items()):
+        name = relative_path.rpartition("/")[2]
+        if name in UNFINGERPRINTED or name.endswith(".html"):
+            continue
+        if static_dir is not None and name.endswith(".css"):
+            stylesheets.append(relative_path)
+            continue
+        assets[relative_path] = fingerprint_path(relative_path, entry["source_hash"])
+
+    # Stylesheets may reference (@import) each other; referenced ones are
+    # named first, and a reference cycle is left unrewritten where it closes
+    pending = set(stylesheets)
+
+    def fingerprint_stylesheet(relative_path):
+        pending.discard(relative_path)
+        with open(os.path.join(static_dir, relative_path), 'r') as f:
+            css = f.read()
+        for match in CSS_URL_PATTERN.finditer(css):
+            referenced, _ = _resolve_css_url(match.group(2), relative_path)
+            if referenced in pending:
+                fingerprint_stylesheet(referenced)
+        digest = hashlib.sha256(rewrite_css_urls(css, assets, relative_path).encode("utf-8")).hexdigest()
+        assets[relative_path] = fingerprint_path(relative_path, digest)
+
+    for relative_path in stylesheets:
+        if relative_path in pending:
+            fingerprint_stylesheet(relative_path)
+    return dict(sorted(assets.items()))
+
+
+def _split_url(url):
+    """
+    Splits a root-relative URL into the relative path of the file it refers
+    to and its query and fragment.
+
+    Args:
+        url (str): The URL, e.g. "/images/a.png?v=1#top".
+
+    Returns:
+        tuple: (relative path, suffix), or (None, url) for URLs that are not
+        root-relative.
+    """
+    if not url.startswith("/") or url.startswith("//"):
+        return None, url
+    end = len(url)
+    for separator in "?#":
+        index = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+    return url[1:end], url[end:]
+
+
+def rewrite_url(url, assets):
+    """
+    Points a root-relative URL of a static file at its fingerprinted name.
+
+    Args:
+        url (str): The URL, e.g. "/images/a.png?v=1#top".
+        assets (dict): Relative paths mapped to fingerprinted paths.
+
+    Returns:
+        str: The rewritten URL, or url unchanged if it does not refer to a
+        fingerprinted asset.
+    """
+    path, suffix = _split_url(url)
+    fingerprinted = assets.get(path) if path is not None else None
+    if fingerprinted is None:
+        return url
+    return "/" + fingerprinted + suffix
+
+
+def _resolve_css_url(url, css_path):
+    """
+    Finds the static file a url() of a stylesheet refers to.
+
+    Args:
+        url (str): The URL, root-relative or relative to the stylesheet.
+        css_path (str): Relative path of the stylesheet.
+
+    Returns:
+        tuple: (relative path, suffix), or (None, url) for URLs that do not
+        refer to a file of the site (data: URIs, other hosts, fragments).
+    """
+    if url.startswith("/"):
+        return _split_url(url)
+    if url.startswith("#") or ":" in url.partition("/")[0]:
+        return None, url
+    end = len(url)
+    for separator in "?#":
+        index = url.find(separator)
+        if index != -1:
+            end = min(end, index)
+    path = posixpath.normpath(posixpath.join(posixpath.dirname(css_path), url[:end]))
+    if path.startswith("../") or path == "..":
+        return None, url
+    return path, url[end:]
+
+
+def rewrite_css_urls(css, assets, css_path):
+    """
+    Points the url() and @import references of a stylesheet at
+    fingerprinted names.
+
+    Args:
+        css (str): The stylesheet text.
+        assets (dict): Relative paths mapped to fingerprinted paths.
+        css_path (str): Relative path of the stylesheet, against which
+            relative URLs are resolved.
+
+    Returns:
+        str: The stylesheet with asset URLs fingerprinted; relative URLs
+        stay relative.
+    """
+    def rewrite(match):
+        url = match.group(2)
+        path, suffix = _resolve_css_url(url, css_path)
+        fingerprinted = assets.get(path) if path is not None else None
+        if fingerprinted is None:
+            return match.group(0)
+        if url.startswith("/"):
+            url = "/" + fingerprinted + suffix
+        else:
+            # Fingerprinting only renames the file, within its directory
+            directory = url[:len(url) - len(suffix)].rpartition("/")[0]
+            name = fingerprinted.rpartition("/")[2]
+            url = f"{directory}/{name}{suffix}" if directory else name + suffix
+        return match.group(1) + url + match.group(3)
+
+    return CSS_URL_PATTERN.sub(rewrite, css)
+
+
+def image_attributes(url, images):
+    """
+    Returns the attributes added to an <img> of a local image.
+
+    Args:
+        url (str): The image URL.
+        images (dict): Relative paths of images mapped to [width, height].
+
+    Returns:
+        dict: width, height, loading and decoding attributes, or an empty
+        dict if the image is not a known static file.
+    """
+    path, _ = _split_url(url)
+    size = images.get(path) if path is not None else None
+    if size is None:
+        return {}
+    return {"width": str(size[0]), "height": str(size[1]), "loading": "lazy", "decoding": "async"}
+
+
+def add_html_image_attributes(html, images):
+    """
+    Adds dimensions and lazy loading to the <img> tags of serialized HTML.
+
+    Args:
+        html (str): HTML text, e.g. a cached page body.
+        images (dict): Relative paths of images mapped to [width, height].
+
+    Returns:
+        str: The HTML with attributes added to local images that do not have
+        a width yet.
+    """
+    def add(match):
+        tag = match.group(0)
+        src = IMG_SRC_PATTERN.search(tag)
+        if src is None or WIDTH_PATTERN.search(tag):
+            return tag
+        attributes = image_attributes(src.group(1), images)
+        extra = "".join(f' {key}="{value}"' for key, value in attributes.items())
+        return tag[:-1] + extra + ">"
+
+    return IMG_TAG_PATTERN.sub(add, html)
+
+
+def rewrite_html_urls(html, assets):
+    """
+    Rewrites the src and href attributes of serialized HTML.
+
+    Args:
+        html (str): HTML text, e.g. the template or a cached page body.
+        assets (dict): Relative paths mapped to fingerprinted paths.
+
+    Returns:
+        str: The HTML with asset URLs fingerprinted.
+    """
+    return URL_ATTRIBUTE_PATTERN.sub(
+        lambda match: match.group(1) + rewrite_url(match.group(2), assets) + match.group(3),
+        html,
+    )
+
+
+def rewrite_asset_urls(node, assets, images=None):
+    """
+    Rewrites the src and href props of an HTML node tree in place, and adds
+    dimensions and lazy loading to images.
+
+    Args:
+        node (HTMLNode): Root of the tree.
+        assets (dict): Relative paths mapped to fingerprinted paths.
+        images (dict, optional): Relative paths of images mapped to
+            [width, height].
+
+    Returns:
+        HTMLNode: The same node, for chaining.
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        props = current.props
+        if props:
+            if images and current.tag == "img" and "src" in props and "width" not in props:
+                props.update(image_attributes(props["src"], images))
+            for key in ("src", "href"):
+                if key in props:
+                    props[key] = rewrite_url(props[key], assets)
+        if current.children:
+            stack.extend(current.children)
+    return node
+
+
+class AssetRewriter:
+    """
+    Rewrites the references of pages to static files: URLs are pointed at
+    fingerprinted names and local images get their dimensions.
+
+    Attributes:
+        assets (dict): Relative paths mapped to fingerprinted paths (empty
+            when fingerprinting is off).
+        images (dict): Relative paths of images mapped to [width, height].
+        digest (str): Hex digest of both, recorded with each page so pages
+            are rebuilt when the assets they may reference change.
+    """
+
+    def __init__(self, assets=None, images=None):
+        """
+        Initialize an AssetRewriter.
+
+        Args:
+            assets (dict, optional): Relative paths mapped to fingerprinted
+                paths.
+            images (dict, optional): Relative paths of images mapped to
+                [width, height].
+        """
+        self.assets = assets or {}
+        self.images = images or {}
+        state = {"assets": self.assets, "images": self.images}
+        self.digest = hashlib.sha256(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def rewrite_tree(self, node):
+        """
+        Rewrites an HTML node tree in place.
+
+        Args:
+            node (HTMLNode): Root of the tree.
+
+        Returns:
+            HTMLNode: The same node.
+        """
+        return rewrite_asset_urls(node, self.assets, self.images)
+
+    def rewrite_html(self, html):
+        """
+        Rewrites serialized HTML, e.g. the template or a cached page body.
+
+        Args:
+            html (str): The HTML text.
+
+        Returns:
+            str: The rewritten HTML.
+        """
+        if self.images:
+            html = add_html_image_attributes(html, self.images)
+        if self.assets:
+            html = rewrite_html_urls(html, self.assets)
+        return html
+
+
+def write_asset_manifest(assets, path):
+    """
+    Writes the mapping of original to fingerprinted names, for tools that
+    reference assets outside of the generated pages.
+
+    Args:
+        assets (dict): Relative paths mapped to fingerprinted paths.
+        path (str): Destination of the JSON file.
+    """
+    with atomic_write(path) as f:
+        json.dump(assets, f, indent=1, sort_keys=True)
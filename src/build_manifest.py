@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path, chunk_size=1 << 16):
+    """
+    Computes the SHA-256 hash of a file without loading it into memory at once.
+
+    Args:
+        path (str): Path to the file to hash.
+        chunk_size (int, optional): Number of bytes read per iteration.
+
+    Returns:
+        str: Hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    """
+    Returns the (size, mtime_ns) pair used to detect untouched files cheaply.
+
+    Args:
+        path (str): Path to the file.
+
+    Returns:
+        list: [size in bytes, modification time in nanoseconds].
+    """
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def cached_hash(path, entry):
+    """
+    Returns the hash of a file, reusing the hash recorded in a manifest entry
+    when the file's size and modification time have not changed.
+
+    Args:
+        path (str): Path to the file.
+        entry (dict or None): Previous manifest entry with "source_stat" and
+            "source_hash" keys.
+
+    Returns:
+        tuple: (hash, stat) for the file.
+    """
+    stat = file_stat(path)
+    if entry and entry.get("source_stat") == stat and entry.get("source_hash"):
+        return entry["source_hash"], stat
+    return hash_file(path), stat
+
+
+def new_manifest():
+    """
+    Creates an empty build manifest.
+
+    Returns:
+        dict: A manifest with no recorded pages.
+    """
+    return {"version": MANIFEST_VERSION, "pages": {}}
+
+
+def load_manifest(path):
+    """
+    Loads a build manifest from disk.
+
+    A missing, unreadable or outdated manifest is treated as empty, which
+    simply results in a full rebuild.
+
+    Args:
+        path (str): Path to the manifest JSON file.
+
+    Returns:
+        dict: The loaded manifest.
+    """
+    try:
+        with open(path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return new_manifest()
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return new_manifest()
+    manifest.setdefault("pages", {})
+    return manifest
+
+
+def save_manifest(manifest, path):
+    """
+    Writes a build manifest to disk atomically.
+
+    Args:
+        manifest (dict): The manifest to persist.
+        path (str): Destination path of the manifest JSON file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with atomic_write(path) as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """
+    Opens a temporary file that replaces path only once it is fully written,
+    so readers never observe a half-written file.
+
+    Replacing (rather than rewriting) also leaves other hard links to the
+    old file untouched.
+
+    Args:
+        path (str): Destination path.
+        mode (str, optional): File mode, 'w' or 'wb'.
+
+    Yields:
+        file: The open temporary file.
+    """
+    # Unique per writer, so concurrent writers of the same path cannot clash
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def remove_output(path, root):
+    """
+    Deletes a generated file and any directories left empty by its removal.
+
+    Args:
+        path (str): Path to the generated file.
+        root (str): Output root directory; it is never removed.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    root = os.path.abspath(root)
+    parent = os.path.dirname(os.path.abspath(path))
+    while (parent.startswith(root + os.sep) and os.path.isdir(parent)
+           and not os.listdir(parent)):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
@@ -0,0 +1,113 @@
+import gzip
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from src.build_manifest import atomic_write, cached_hash
+from src.copy_directory import scan_files
+
+# Extensions of the text files that get a precompressed sibling
+COMPRESSIBLE_EXTENSIONS = frozenset({
+    ".html", ".css", ".js", ".mjs", ".json", ".svg", ".txt", ".xml", ".map",
+})
+
+COMPRESSED_SUFFIX = ".gz"
+
+
+def is_compressible(relative_path):
+    """
+    Tells whether a file gets a precompressed sibling.
+
+    Args:
+        relative_path (str): Path of the file.
+
+    Returns:
+        bool: True for text files such as HTML, CSS and JavaScript.
+    """
+    return os.path.splitext(relative_path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def compress_file(path, level=9):
+    """
+    Writes a gzip compressed copy of a file next to it.
+
+    The gzip header records neither the file name nor a timestamp, so the
+    same input always yields the same bytes.
+
+    Args:
+        path (str): The file to compress; path + ".gz" is written.
+        level (int, optional): zlib compression level.
+    """
+    with open(path, 'rb') as src, atomic_write(path + COMPRESSED_SUFFIX, 'wb') as dst:
+        with gzip.GzipFile(filename="", mode='wb', compresslevel=level, fileobj=dst, mtime=0) as gz:
+            for chunk in iter(lambda: src.read(1 << 16), b""):
+                gz.write(chunk)
+
+
+def precompress_directory(root, hashes=None, workers=8, level=9):
+    """
+    Writes .gz siblings for the text files of a directory.
+
+    A file is only compressed again when its content hash differs from the
+    one recorded in hashes or its .gz is missing. Compressed siblings of
+    files that no longer exist are removed. zlib releases the GIL while
+    compressing, so files are compressed concurrently on a thread pool.
+
+    Args:
+        root (str): The directory, e.g. the staged public/.
+        hashes (dict, optional): Entries returned by the previous call,
+            usually persisted in the build manifest.
+        workers (int, optional): Number of compressing threads.
+        level (int, optional): zlib compression level.
+
+    Returns:
+        dict: {"source_hash", "source_stat"} entries of the compressed files
+        keyed by relative path, to pass as hashes on the next call.
+    """
+    logger = logging.getLogger(__name__)
+    hashes = hashes or {}
+    files = scan_files(root)
+    current_hashes = {}
+    pending = []
+    for relative_path in sorted(files):
+        if relative_path.endswith(COMPRESSED_SUFFIX):
+            original = relative_path[:-len(COMPRESSED_SUFFIX)]
+            # Only remove siblings written by an earlier call, not .gz files
+            # that are part of the site
+            if original in hashes and original not in files:
+                logger.info(f"Removing stale compressed file: {relative_path}")
+                os.remove(os.path.join(root, relative_path))
+            continue
+        if not is_compressible(relative_path):
+            continue
+        entry = hashes.get(relative_path)
+        source_hash, source_stat = cached_hash(os.path.join(root, relative_path), entry)
+        current_hashes[relative_path] = {"source_hash": source_hash, "source_stat": source_stat}
+        if (entry and entry.get("source_hash") == source_hash
+                and relative_path + COMPRESSED_SUFFIX in files):
+            continue
+        pending.append(os.path.join(root, relative_path))
+
+    if workers > 1 and len(pending) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda path: compress_file(path, level), pending))
+    else:
+        for path in pending:
+            compress_file(path, level)
+
+    logger.info(f"Compressed {len(pending)} files, {len(current_hashes) - len(pending)} unchanged")
+    return current_hashes
+
+
+def remove_compressed(root, hashes):
+    """
+    Removes the .gz siblings written by precompress_directory, e.g. once
+    precompression is turned off.
+
+    Args:
+        root (str): The directory.
+        hashes (dict): Entries returned by precompress_directory.
+    """
+    for relative_path in hashes:
+        path = os.path.join(root, relative_path + COMPRESSED_SUFFIX)
+        if os.path.exists(path):
+            os.remove(path)
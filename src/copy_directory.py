@@ -1,20 +1,39 @@
 import os
 import shutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.build_manifest import atomic_write, hash_file, remove_output
 
-def copy_directory(src, dst):
+
+class CopyError(OSError):
+    """
+    Raised after a sync when one or more files failed to copy.
+
+    Attributes:
+        failures (list): (source path, error message) pairs in path order.
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+        details = "\n".join(f"  {path}: {message}" for path, message in failures)
+        super().__init__(f"{len(failures)} file(s) failed to copy:\n{details}")
+
+
+def copy_directory(src, dst, clean=True):
     """
     Recursively copy contents from source directory to destination directory.
 
     This function will:
     1. Check if the source directory exists.
-    2. Remove the destination directory if it already exists.
+    2. Remove the destination directory if it already exists (unless clean is False).
     3. Create a new destination directory.
     4. Copy all files and subdirectories from source to destination.
 
     Args:
         src (str): Path to the source directory.
         dst (str): Path to the destination directory.
+        clean (bool, optional): Remove the destination first. Pass False to
+            copy on top of an existing tree, e.g. during incremental builds.
 
     Returns:
         None
@@ -36,13 +55,13 @@ def copy_directory(src, dst):
         return
 
     # Delete destination directory if it exists
-    if os.path.exists(dst):
+    if clean and os.path.exists(dst):
         logger.info(f"Removing existing directory: {dst}")
         shutil.rmtree(dst)
 
     # Create destination directory
     logger.info(f"Creating directory: {dst}")
-    os.makedirs(dst)
+    os.makedirs(dst, exist_ok=True)
 
     # Walk through source directory
     for item in os.listdir(src):
@@ -51,7 +70,205 @@ def copy_directory(src, dst):
 
         if os.path.isfile(s):
             logger.info(f"Copying file: {s} to {d}")
+            if os.path.lexists(d):
+                # Replace rather than overwrite: d may be a hard link shared
+                # with the live site (see staging.StagedBuild)
+                os.remove(d)
             shutil.copy2(s, d)
         elif os.path.isdir(s):
             logger.info(f"Copying directory: {s} to {d}")
-            copy_directory(s, d)
+            copy_directory(s, d, clean)
+
+
+def scan_files(root):
+    """
+    Lists every file below a directory with a single os.scandir pass.
+
+    Args:
+        root (str): Directory to scan.
+
+    Returns:
+        dict: Maps paths relative to root (using "/" separators) to their
+        os.stat_result.
+    """
+    files = {}
+    stack = [("", root)]
+    while stack:
+        prefix, directory = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                relative_path = prefix + entry.name
+                if entry.is_dir():
+                    stack.append((relative_path + "/", entry.path))
+                elif entry.is_file():
+                    files[relative_path] = entry.stat()
+    return files
+
+
+def _copy_file(src, dst):
+    """
+    Copies file contents in the kernel where possible.
+
+    os.copy_file_range lets the kernel (or a copy-on-write filesystem) move
+    the data without a round trip through user space; where it is not
+    available shutil.copyfile is used, which falls back to sendfile.
+
+    Args:
+        src (str): Source file.
+        dst (str): Destination file; must not exist.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'xb') as fdst:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                    pass
+        except OSError:
+            if os.path.exists(dst):
+                os.remove(dst)
+        else:
+            shutil.copystat(src, dst)
+            return
+    shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+
+def _sync_file(src, dst, st, checksum, link, transform=None):
+    """
+    Brings one destination file up to date with its source.
+
+    Args:
+        src (str): Source file.
+        dst (str): Destination file; its directory must exist.
+        st (os.stat_result): Stat of the source file.
+        checksum (bool): Compare contents when only the mtime differs.
+        link (bool): Hard link instead of copying.
+        transform (callable, optional): Function applied to the text of the
+            file; a transformed copy is up to date when its modification time
+            matches the source, whatever its size.
+
+    Returns:
+        bool: True if the file was copied, False if it was up to date.
+    """
+    try:
+        dst_st = os.stat(dst)
+    except FileNotFoundError:
+        dst_st = None
+    else:
+        if dst_st.st_mtime_ns == st.st_mtime_ns and (transform or dst_st.st_size == st.st_size):
+            return False
+        if transform is not None:
+            checksum = False
+        if checksum and dst_st.st_size == st.st_size and hash_file(src) == hash_file(dst):
+            shutil.copystat(src, dst)
+            return False
+
+    logging.getLogger(__name__).info(f"Syncing file: {src} to {dst}")
+    if transform is not None:
+        with open(src, 'r') as f:
+            text = transform(f.read())
+        with atomic_write(dst) as f:
+            f.write(text)
+        shutil.copystat(src, dst)
+        return True
+    if dst_st is not None:
+        os.remove(dst)
+    if link:
+        try:
+            os.link(src, dst)
+            return True
+        except OSError:
+            pass
+    _copy_file(src, dst)
+    return True
+
+
+def sync_directory(src, dst, previous=None, checksum=False, link=False, workers=1, rename=None,
+                   transforms=None):
+    """
+    Incrementally mirror the files of one directory into another.
+
+    Unlike copy_directory, the destination is updated in place: a file is
+    only copied when its size or modification time differs from the copy
+    already in the destination, and files that were synced before but no
+    longer exist in the source are removed. Other files in the destination
+    (e.g. generated pages) are left alone.
+
+    Changed files are replaced rather than overwritten, so the destination
+    may share hard links with another tree (see staging.StagedBuild).
+
+    Args:
+        src (str): Path to the source directory.
+        dst (str): Path to the destination directory.
+        previous (iterable, optional): Relative paths returned by the previous
+            sync into dst; needed to detect stale files.
+        checksum (bool, optional): When only the modification time differs,
+            compare contents and keep the destination file if they match.
+        link (bool, optional): Hard link files instead of copying them.
+        workers (int, optional): Number of threads copying files
+            concurrently, which hides the latency of network filesystems.
+        rename (dict, optional): Maps relative source paths to the relative
+            paths they are written to in dst (e.g. fingerprinted names).
+        transforms (dict, optional): Maps relative source paths or lower case
+            file extensions (".css") to functions applied to the text of
+            matching files, e.g. a minifier. A path takes precedence over
+            its extension.
+
+    Returns:
+        list: Sorted relative destination paths of the synced files, to pass
+        as previous on the next sync.
+
+    Raises:
+        CopyError: After syncing everything else, if any file failed to copy.
+    """
+    logger = logging.getLogger(__name__)
+    if not os.path.exists(src):
+        logger.error(f"Source directory does not exist: {src}")
+        return []
+
+    sources = scan_files(src)
+    relative_paths = sorted(sources)
+    rename = rename or {}
+    transforms = transforms or {}
+    dest_paths = [rename.get(path, path) for path in relative_paths]
+
+    # Create the directory skeleton up front so the copies are independent
+    for directory in sorted({os.path.dirname(path) for path in dest_paths}):
+        os.makedirs(os.path.join(dst, directory), exist_ok=True)
+
+    def sync(paths):
+        relative_path, dest_path = paths
+        try:
+            transform = transforms.get(relative_path) or transforms.get(os.path.splitext(relative_path)[1].lower())
+            return _sync_file(os.path.join(src, relative_path), os.path.join(dst, dest_path),
+                              sources[relative_path], checksum, link, transform)
+        except OSError as e:
+            return e
+
+    pairs = list(zip(relative_paths, dest_paths))
+    if workers > 1 and len(pairs) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(sync, pairs))
+    else:
+        outcomes = [sync(pair) for pair in pairs]
+
+    copied = unchanged = removed = 0
+    failures = []
+    for relative_path, outcome in zip(relative_paths, outcomes):
+        if isinstance(outcome, Exception):
+            failures.append((os.path.join(src, relative_path), str(outcome)))
+        elif outcome:
+            copied += 1
+        else:
+            unchanged += 1
+
+    for relative_path in sorted(set(previous or ()) - set(dest_paths)):
+        d = os.path.join(dst, relative_path)
+        if os.path.exists(d):
+            logger.info(f"Removing stale file: {d}")
+            remove_output(d, dst)
+            removed += 1
+
+    logger.info(f"Synced {src} to {dst}: {copied} copied, {unchanged} unchanged, {removed} removed")
+    if failures:
+        raise CopyError(failures)
+    return sorted(dest_paths)
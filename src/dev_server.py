@@ -0,0 +1,384 @@
+import os
+import shutil
+import logging
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from src.assets import AssetRewriter, hash_assets
+from src.build_manifest import atomic_write, load_manifest, remove_output
+from src.image_size import image_sizes, is_image
+from src.minify import minify_css
+from src.page_generator import generate_page, generate_pages_recursive, load_template
+
+# Endpoint browsers subscribe to for reload events (Server-Sent Events)
+EVENTS_PATH = "/__livereload"
+
+RELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + EVENTS_PATH + "\")"
+    ".addEventListener(\"reload\", function () { location.reload(); });</script>"
+)
+
+
+def inject_reload_script(html):
+    """
+    Inserts the live reload client into an HTML document.
+
+    Args:
+        html (str): The HTML document.
+
+    Returns:
+        str: The document with the reload script before </body>, or appended
+        when the document has no closing body tag.
+    """
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + RELOAD_SCRIPT
+    return html[:index] + RELOAD_SCRIPT + html[index:]
+
+
+class DirectoryWatcher:
+    """
+    Detects file changes under a set of paths by polling their stat data.
+
+    Polling keeps the watcher portable and stdlib-only; with a short
+    interval a change is picked up within milliseconds.
+
+    Attributes:
+        paths (list): Files or directories being watched.
+        snapshot (dict): Maps each watched file to its (mtime_ns, size).
+    """
+
+    def __init__(self, paths):
+        """
+        Initialize a DirectoryWatcher and take the initial snapshot.
+
+        Args:
+            paths (list): Files or directories to watch.
+        """
+        self.paths = list(paths)
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        # Files and directories can vanish while they are scanned (editors
+        # replace files on save); they are simply left out of the snapshot
+        snapshot = {}
+        stack = []
+        for path in self.paths:
+            if os.path.isfile(path):
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+            elif os.path.isdir(path):
+                stack.append(path)
+        while stack:
+            try:
+                scan = os.scandir(stack.pop())
+            except FileNotFoundError:
+                continue
+            with scan as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file():
+                            st = entry.stat()
+                            snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+                    except FileNotFoundError:
+                        continue
+        return snapshot
+
+    def poll(self):
+        """
+        Compare the watched paths against the previous snapshot.
+
+        Returns:
+            tuple: (changed, removed) sorted lists of file paths, where
+            changed includes newly created files.
+        """
+        snapshot = self._scan()
+        changed = sorted(path for path, stat in snapshot.items()
+                         if self.snapshot.get(path) != stat)
+        removed = sorted(path for path in self.snapshot if path not in snapshot)
+        self.snapshot = snapshot
+        return changed, removed
+
+
+class ReloadNotifier:
+    """
+    Broadcasts reload events to every connected browser.
+
+    Attributes:
+        generation (int): Incremented on every reload.
+    """
+
+    def __init__(self):
+        """
+        Initialize a ReloadNotifier with no pending reloads.
+        """
+        self.generation = 0
+        self._condition = threading.Condition()
+
+    def notify(self):
+        """
+        Signal all waiting clients to reload.
+        """
+        with self._condition:
+            self.generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation, timeout):
+        """
+        Block until the generation moves past the given one or time runs out.
+
+        Args:
+            generation (int): The last generation the caller has seen.
+            timeout (float): Maximum number of seconds to wait.
+
+        Returns:
+            int: The current generation.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class SiteRebuilder:
+    """
+    Applies source changes to the generated site, touching only the affected
+    outputs: a changed page is regenerated, a changed asset is copied and a
+    template change regenerates the pages through the build manifest.
+
+    Outputs are rendered with the settings of the build (minification,
+    image dimensions), so the next build finds them up to date.
+    """
+
+    def __init__(self, content_dir, static_dir, template_path, public_dir,
+                 manifest_path=None, jobs=1, body_cache_dir=None, minify=False, image_sizes=False):
+        """
+        Initialize a SiteRebuilder.
+
+        Args:
+            content_dir (str): Path to the markdown content directory.
+            static_dir (str): Path to the static assets directory.
+            template_path (str): Path to the HTML template file.
+            public_dir (str): Path to the generated site.
+            manifest_path (str, optional): Build manifest for template rebuilds.
+            jobs (int, optional): Worker processes for template rebuilds.
+            body_cache_dir (str, optional): Page body cache for template rebuilds.
+            minify (bool, optional): Minify the pages and CSS files.
+            image_sizes (bool, optional): Give local images their
+                dimensions; pages are regenerated when the images change.
+        """
+        self.content_dir = os.path.abspath(content_dir)
+        self.static_dir = os.path.abspath(static_dir)
+        self.template_path = os.path.abspath(template_path)
+        self.public_dir = public_dir
+        self.manifest_path = manifest_path
+        self.jobs = jobs
+        self.body_cache_dir = body_cache_dir
+        self.minify = minify
+        self.image_sizes = image_sizes
+        self.assets = None
+        self._image_hashes = self._image_cache = None
+        if image_sizes:
+            # Seeded from the build's caches, so only changed images are read
+            manifest = load_manifest(manifest_path) if manifest_path else {}
+            self._image_hashes = manifest.get("asset_hashes")
+            self._image_cache = manifest.get("image_sizes")
+            self._refresh_images()
+        self.template = load_template(template_path, self.assets, minify)
+
+    def _refresh_images(self):
+        """
+        Reads the dimensions of the images again.
+
+        Returns:
+            bool: True if they changed.
+        """
+        self._image_hashes = hash_assets(self.static_dir, self._image_hashes, include=is_image)
+        images, self._image_cache = image_sizes(self.static_dir, self._image_hashes, self._image_cache)
+        assets = AssetRewriter(None, images) if images else None
+        changed = (assets.digest if assets else None) != (self.assets.digest if self.assets else None)
+        self.assets = assets
+        return changed
+
+    def _output_path(self, path, root, extension=None):
+        relative_path = os.path.relpath(path, root)
+        if extension:
+            relative_path = os.path.splitext(relative_path)[0] + extension
+        return os.path.join(self.public_dir, relative_path)
+
+    def apply(self, changed, removed):
+        """
+        Rebuild the outputs affected by a set of changed and removed files.
+
+        Args:
+            changed (list): Paths of created or modified source files.
+            removed (list): Paths of deleted source files.
+
+        Returns:
+            bool: True if anything in the site was updated.
+        """
+        updated = False
+        pages_rebuilt = self.template_path in changed
+        if self.image_sizes and any(os.path.abspath(path).startswith(self.static_dir + os.sep) and is_image(path)
+                                    for path in changed + removed):
+            pages_rebuilt = self._refresh_images() or pages_rebuilt
+        if pages_rebuilt:
+            self.template = load_template(self.template_path, self.assets, self.minify)
+            generate_pages_recursive(self.content_dir, self.template_path, self.public_dir,
+                                     self.manifest_path, jobs=self.jobs,
+                                     body_cache_dir=self.body_cache_dir, assets=self.assets,
+                                     minify=self.minify)
+            updated = True
+        for path in changed:
+            path = os.path.abspath(path)
+            if path.startswith(self.content_dir + os.sep) and path.endswith(".md"):
+                if pages_rebuilt:
+                    continue
+                dest_path = self._output_path(path, self.content_dir, ".html")
+                generate_page(path, self.template_path, dest_path, self.template, assets=self.assets)
+                updated = True
+            elif path.startswith(self.static_dir + os.sep):
+                dest_path = self._output_path(path, self.static_dir)
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                # Replace rather than overwrite: the output may be a hard
+                # link shared with a previous generation
+                if self.minify and path.lower().endswith(".css"):
+                    with open(path, 'r') as src, atomic_write(dest_path, 'w') as dst:
+                        dst.write(minify_css(src.read()))
+                else:
+                    with open(path, 'rb') as src, atomic_write(dest_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                shutil.copystat(path, dest_path)
+                updated = True
+        for path in removed:
+            path = os.path.abspath(path)
+            if path.startswith(self.content_dir + os.sep) and path.endswith(".md"):
+                remove_output(self._output_path(path, self.content_dir, ".html"), self.public_dir)
+                updated = True
+            elif path.startswith(self.static_dir + os.sep):
+                remove_output(self._output_path(path, self.static_dir), self.public_dir)
+                updated = True
+        return updated
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the generated site, injecting the reload client into HTML pages
+    and streaming reload events on EVENTS_PATH.
+    """
+
+    notifier = None
+    heartbeat = 15.0
+
+    def do_GET(self):
+        """
+        Handle a GET request for a file, an HTML page or the event stream.
+        """
+        path = self.path.split("?", 1)[0].split("#", 1)[0]
+        if path == EVENTS_PATH and self.notifier is not None:
+            self._stream_events()
+            return
+        file_path = self.translate_path(path)
+        if os.path.isdir(file_path) and path.endswith("/"):
+            file_path = os.path.join(file_path, "index.html")
+        if file_path.endswith(".html") and os.path.isfile(file_path) and self.notifier is not None:
+            with open(file_path, 'r') as f:
+                body = inject_reload_script(f.read()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        super().do_GET()
+
+    def _stream_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        generation = self.notifier.generation
+        try:
+            while True:
+                current = self.notifier.wait(generation, self.heartbeat)
+                if current != generation:
+                    generation = current
+                    self.wfile.write(f"event: reload\ndata: {generation}\n\n".encode("utf-8"))
+                else:
+                    # Comment line keeps proxies from closing the stream and
+                    # lets us notice clients that went away
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def watch(watcher, rebuilder, notifier, interval=0.1, stop_event=None):
+    """
+    Poll for changes, rebuild the affected outputs and notify browsers.
+
+    Args:
+        watcher (DirectoryWatcher): Watcher over the site sources.
+        rebuilder (SiteRebuilder): Applies the detected changes.
+        notifier (ReloadNotifier): Notified after each successful rebuild.
+        interval (float, optional): Seconds between polls.
+        stop_event (threading.Event, optional): Set to stop watching.
+    """
+    logger = logging.getLogger(__name__)
+    stop_event = stop_event or threading.Event()
+    while not stop_event.wait(interval):
+        try:
+            changed, removed = watcher.poll()
+            if not changed and not removed:
+                continue
+            start = time.perf_counter()
+            updated = rebuilder.apply(changed, removed)
+        except Exception as e:
+            logger.error(f"Rebuild failed: {e}")
+            continue
+        if updated:
+            elapsed = (time.perf_counter() - start) * 1000
+            logger.info(f"Rebuilt {len(changed) + len(removed)} change(s) in {elapsed:.1f} ms")
+            notifier.notify()
+
+
+def serve(public_dir, host="localhost", port=8888, rebuilder=None, watch_paths=None, interval=0.1):
+    """
+    Serve the generated site, optionally rebuilding and live reloading on changes.
+
+    Args:
+        public_dir (str): Path to the generated site.
+        host (str, optional): Interface to bind.
+        port (int, optional): Port to listen on.
+        rebuilder (SiteRebuilder, optional): Enables watch mode when given.
+        watch_paths (list, optional): Source paths to watch in watch mode.
+        interval (float, optional): Seconds between polls in watch mode.
+    """
+    logger = logging.getLogger(__name__)
+    notifier = ReloadNotifier() if rebuilder is not None else None
+    handler = partial(type("Handler", (LiveReloadHandler,), {"notifier": notifier}),
+                      directory=public_dir)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+
+    stop_event = threading.Event()
+    if rebuilder is not None:
+        watcher = DirectoryWatcher(watch_paths or [])
+        thread = threading.Thread(target=watch, args=(watcher, rebuilder, notifier, interval, stop_event),
+                                  daemon=True)
+        thread.start()
+
+    logger.info(f"Serving {public_dir} at http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        server.server_close()
@@ -1,3 +1,24 @@
+class Tag:
+    """
+    The HTML tags of the nodes built from markdown.
+
+    The constants are the plain (interned) strings used throughout, so
+    Tag.PARAGRAPH == "p" and either can be used.
+    """
+    DIV = "div"
+    PARAGRAPH = "p"
+    PRE = "pre"
+    CODE = "code"
+    BLOCKQUOTE = "blockquote"
+    UNORDERED_LIST = "ul"
+    ORDERED_LIST = "ol"
+    LIST_ITEM = "li"
+    BOLD = "b"
+    ITALIC = "i"
+    LINK = "a"
+    IMAGE = "img"
+
+
 class HTMLNode:
     """
     Base class for HTML nodes.
@@ -9,6 +30,8 @@ class HTMLNode:
         props (dict): Properties/attributes of the node.
     """
 
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         """
         Initialize an HTMLNode.
@@ -33,6 +56,47 @@ class HTMLNode:
         """
         raise NotImplementedError
 
+    def iter_html(self):
+        """
+        Generate the HTML representation of the node as a sequence of chunks.
+
+        The tree is walked iteratively with an explicit stack, so subtrees are
+        never concatenated into intermediate strings and arbitrarily deep
+        trees do not hit Python's recursion limit.
+
+        Yields:
+            str: Consecutive pieces of the HTML string.
+
+        Raises:
+            ValueError: If a parent node has no tag.
+            NotImplementedError: If a node cannot be converted to HTML.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                # Closing tag scheduled when its parent was opened
+                yield node
+            elif isinstance(node, ParentNode):
+                if node.tag is None:
+                    raise ValueError("ParentNode must have a tag")
+                yield f"<{node.tag}{node.props_to_html()}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+            else:
+                yield node.to_html()
+
+    def write_html(self, fp):
+        """
+        Write the HTML representation of the node to a file-like object.
+
+        Args:
+            fp: Any object with a write(str) method, such as an open text file.
+        """
+        write = fp.write
+        for chunk in self.iter_html():
+            write(chunk)
+
     def props_to_html(self):
         """
         Convert node properties to HTML attribute string.
@@ -81,6 +145,8 @@ class LeafNode(HTMLNode):
         props (dict): Properties/attributes of the node.
     """
 
+    __slots__ = ()
+
     def __init__(self, value, tag=None, props=None):
         """
         Initialize a LeafNode.
@@ -160,6 +226,8 @@ class ParentNode(HTMLNode):
         props (dict): Properties/attributes of the node.
     """
 
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         """
         Initialize a ParentNode.
@@ -189,10 +257,7 @@ class ParentNode(HTMLNode):
         """
         if self.tag is None:
             raise ValueError("ParentNode must have a tag")
-        if not self.children:
-            return f"<{self.tag}{self.props_to_html()}></{self.tag}>"
-        children_html = "".join(child.to_html() for child in self.children)
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        return "".join(self.iter_html())
 
     def __repr__(self):
         """
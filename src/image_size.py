@@ -0,0 +1,136 @@
+import os
+import struct
+
+# Extensions of the images whose dimensions are read
+IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".webp"})
+
+# JPEG start-of-frame markers; C4 (DHT), C8 (JPG) and CC (DAC) share the
+# range but are not frames
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# JPEG markers that stand alone, without a length field
+JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+def _jpeg_size(f):
+    """
+    Reads the dimensions from the start-of-frame segment of a JPEG, skipping
+    over the preceding segments without reading them.
+
+    Args:
+        f (file): Binary file positioned after the SOI marker.
+
+    Returns:
+        tuple or None: (width, height), or None if no frame was found.
+    """
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = f.read(1)
+        while marker == b"\xff":
+            # Fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code in JPEG_STANDALONE_MARKERS or code == 0x00:
+            continue
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        length = struct.unpack(">H", header)[0]
+        if code in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def read_image_size(path):
+    """
+    Reads the dimensions of a PNG, JPEG, GIF or WebP image from its header,
+    without decoding the image.
+
+    Args:
+        path (str): Path to the image.
+
+    Returns:
+        tuple or None: (width, height) in pixels, or None if the format is
+        not recognized or the header is truncated.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(30)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a") and len(head) >= 10:
+            return struct.unpack("<HH", head[6:10])
+        if head.startswith(b"\xff\xd8"):
+            f.seek(2)
+            return _jpeg_size(f)
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) >= 25:
+            chunk = head[12:16]
+            if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a" and len(head) >= 30:
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3FFF, height & 0x3FFF
+            if chunk == b"VP8L" and head[20] == 0x2F:
+                bits = struct.unpack("<I", head[21:25])[0]
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X" and len(head) >= 30:
+                width = int.from_bytes(head[24:27], "little") + 1
+                height = int.from_bytes(head[27:30], "little") + 1
+                return width, height
+    return None
+
+
+def is_image(relative_path):
+    """
+    Tells whether a static file is an image whose dimensions can be read.
+
+    Args:
+        relative_path (str): Path of the file.
+
+    Returns:
+        bool: True for PNG, JPEG, GIF and WebP files.
+    """
+    return os.path.splitext(relative_path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def image_sizes(static_dir, hashes, cache=None):
+    """
+    Returns the dimensions of the images among the static files.
+
+    Dimensions are cached by content hash, so an image's header is only
+    read again when the image changed.
+
+    Args:
+        static_dir (str): The static assets directory.
+        hashes (dict): Hash entries of the static files keyed by relative
+            path, as returned by assets.hash_assets.
+        cache (dict, optional): Dimensions keyed by content hash, returned
+            by the previous call.
+
+    Returns:
+        tuple: (sizes, cache) where sizes maps the relative paths of the
+        images to [width, height] and cache is the updated cache.
+    """
+    cache = cache or {}
+    sizes = {}
+    current_cache = {}
+    for relative_path, entry in sorted(hashes.items()):
+        if not is_image(relative_path):
+            continue
+        source_hash = entry["source_hash"]
+        size = cache.get(source_hash)
+        if size is None:
+            size = read_image_size(os.path.join(static_dir, relative_path))
+            if size is None:
+                continue
+            size = list(size)
+        current_cache[source_hash] = size
+        sizes[relative_path] = size
+    return sizes, current_cache
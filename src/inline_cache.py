@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from src.text_to_node import text_to_textnodes
+
+_active_cache = None
+
+
+class InlineCache:
+    """
+    A bounded LRU cache of inline parsing results, keyed by the exact text.
+
+    Pages often repeat the same list items, link lines and boilerplate
+    paragraphs; with a cache active (see set_inline_cache) they are only
+    tokenized once per process. Cached TextNode sequences are never handed
+    out themselves, so callers are free to modify the lists they get.
+
+    Attributes:
+        max_entries (int): Number of texts kept; the least recently used
+            one is evicted beyond it.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to tokenize the text.
+        evictions (int): Entries dropped to stay within max_entries.
+    """
+
+    def __init__(self, max_entries=4096):
+        """
+        Initialize an empty InlineCache.
+
+        Args:
+            max_entries (int, optional): Number of texts kept.
+        """
+        self.max_entries = max_entries
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+
+    def text_to_textnodes(self, text):
+        """
+        Converts raw text to a list of TextNode objects, see
+        text_to_node.text_to_textnodes.
+
+        Args:
+            text (str): The input text.
+
+        Returns:
+            list: List of TextNode objects.
+        """
+        nodes = self._entries.get(text)
+        if nodes is not None:
+            self._entries.move_to_end(text)
+            self.hits += 1
+            return list(nodes)
+        self.misses += 1
+        nodes = text_to_textnodes(text)
+        self._entries[text] = tuple(nodes)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return nodes
+
+    def drain_stats(self):
+        """
+        Remove and return the statistics counted so far, e.g. to send them
+        from a worker process to the parent. Cached entries are kept.
+
+        Returns:
+            tuple: (hits, misses, evictions).
+        """
+        stats = (self.hits, self.misses, self.evictions)
+        self.hits = self.misses = self.evictions = 0
+        return stats
+
+    def merge_stats(self, stats):
+        """
+        Add statistics counted by another cache.
+
+        Args:
+            stats (tuple): (hits, misses, evictions) from drain_stats().
+        """
+        hits, misses, evictions = stats
+        self.hits += hits
+        self.misses += misses
+        self.evictions += evictions
+
+    def summary(self):
+        """
+        Build a one-line report of the cache's effectiveness.
+
+        Returns:
+            str: The report.
+        """
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (f"Inline cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), "
+                f"{self.evictions} evictions, {self.max_entries} entries per process")
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def get_inline_cache():
+    """
+    Returns the cache used for inline parsing in this process, if any.
+
+    Returns:
+        InlineCache or None: The active cache.
+    """
+    return _active_cache
+
+
+def set_inline_cache(cache):
+    """
+    Sets (or with None, clears) the cache used for inline parsing in this
+    process.
+
+    Args:
+        cache (InlineCache or None): The cache to activate.
+    """
+    global _active_cache
+    _active_cache = cache
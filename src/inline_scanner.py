@@ -0,0 +1,167 @@
+import re
+from src.textnode import NON_BLANK, TextNode, TextType
+
+# Emphasis delimiters; "**" is tried first so "***" reads as "**" then "*"
+DELIMITER_PATTERN = re.compile(r"\*\*|\*|`")
+
+DELIMITER_TYPES = {"**": TextType.BOLD, "*": TextType.ITALIC, "`": TextType.CODE}
+
+
+def scan_inline(text):
+    """
+    Converts raw text to a list of TextNode objects in a single left to
+    right scan.
+
+    Produces the same nodes as applying split_nodes_image, split_nodes_link
+    and split_nodes_delimiter for "**", "*" and "`" in turn, without
+    building the intermediate node lists:
+
+    - An image runs from "![" to the first ")" after its "](", and must fit
+      before the next "![" and the next "](".
+    - A link runs from "[" to the first ")" after its "](", within the text
+      between images. "[!" starts literal text up to the next ")".
+    - In the text between images and links, "**" toggles bold, and outside
+      bold "*" toggles italic; outside both "`" toggles code. A delimiter
+      that is never closed still applies to the rest of the text.
+    - Nodes whose text is empty or whitespace are dropped.
+
+    The nodes are spans over text (see TextNode.from_span): no part of the
+    text is copied until a node's text is read.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        list: List of TextNode objects.
+    """
+    nodes = []
+    run_start = 0
+    for start, middle, end in iter_images(text):
+        _scan_links(text, run_start, start, nodes)
+        if NON_BLANK.search(text, start + 2, middle):
+            nodes.append(TextNode.from_span(text, start + 2, middle, TextType.IMAGE, text[middle + 2:end]))
+        run_start = end + 1
+    _scan_links(text, run_start, len(text), nodes)
+    return nodes
+
+
+def iter_images(text, start=0, stop=None):
+    """
+    Finds the images of a text, see scan_inline.
+
+    Every character is looked at a bounded number of times, so the cost is
+    linear in the length of the text whatever brackets it holds.
+
+    Args:
+        text (str): The input text.
+        start (int, optional): Start of the run to search.
+        stop (int, optional): End of the run to search.
+
+    Yields:
+        tuple: (start, middle, end): the indices of the "![", of the "]("
+        and of the ")" of each image, in order.
+    """
+    if stop is None:
+        stop = len(text)
+    position = text.find("![", start, stop)
+    while position != -1:
+        # Candidates only extend to the next "![", and the alt text and URL
+        # to the next "]("
+        next_image = text.find("![", position + 2, stop)
+        part_end = next_image if next_image != -1 else stop
+        middle = text.find("](", position + 2, part_end)
+        if middle != -1:
+            next_middle = text.find("](", middle + 2, part_end)
+            end = text.find(")", middle + 2, next_middle if next_middle != -1 else part_end)
+            if end != -1:
+                yield position, middle, end
+        position = next_image
+
+
+def iter_links(text, start=0, stop=None):
+    """
+    Finds the links of a text holding no image, see scan_inline.
+
+    The search only moves forward, so the cost is linear in the length of
+    the text whatever brackets it holds.
+
+    Args:
+        text (str): The input text.
+        start (int, optional): Start of the run to search.
+        stop (int, optional): End of the run to search.
+
+    Yields:
+        tuple: (start, middle, end): the indices of the "[", of the "]("
+        and of the ")" of each link, in order.
+    """
+    position = start
+    if stop is None:
+        stop = len(text)
+    while True:
+        position = text.find("[", position, stop)
+        if position == -1:
+            return
+        if text.startswith("[!", position, stop):
+            # Not a link; the text up to the next ")" is kept as it is
+            end = text.find(")", position, stop)
+            position = end + 1 if end != -1 else stop
+            continue
+        middle = text.find("](", position + 1, stop)
+        if middle == -1:
+            return
+        end = text.find(")", middle + 2, stop)
+        if end == -1:
+            return
+        yield position, middle, end
+        position = end + 1
+
+
+def _scan_links(text, start, stop, nodes):
+    """
+    Scans text[start:stop], which holds no image, for links.
+
+    Args:
+        text (str): The input text.
+        start (int): Start of the run.
+        stop (int): End of the run.
+        nodes (list): Receives the TextNode objects.
+    """
+    run_start = start
+    for position, middle, end in iter_links(text, start, stop):
+        _scan_delimiters(text, run_start, position, nodes)
+        if NON_BLANK.search(text, position + 1, middle):
+            nodes.append(TextNode.from_span(text, position + 1, middle, TextType.LINK, text[middle + 2:end]))
+        run_start = end + 1
+    _scan_delimiters(text, run_start, stop, nodes)
+
+
+def _scan_delimiters(text, start, stop, nodes):
+    """
+    Splits text[start:stop], which holds no image or link, on emphasis
+    delimiters.
+
+    At most one delimiter is open at a time: emphasis never nests, and a
+    delimiter of higher precedence closes the open one ("**" closes "*" and
+    "`", "*" closes "`").
+
+    Args:
+        text (str): The input text.
+        start (int): Start of the run.
+        stop (int): End of the run.
+        nodes (list): Receives the TextNode objects.
+    """
+    open_delimiter = None
+    piece_start = start
+    for match in DELIMITER_PATTERN.finditer(text, start, stop):
+        delimiter = match.group()
+        if open_delimiter == "**" and delimiter != "**":
+            continue
+        if open_delimiter == "*" and delimiter == "`":
+            continue
+        if NON_BLANK.search(text, piece_start, match.start()):
+            nodes.append(TextNode.from_span(text, piece_start, match.start(),
+                                            DELIMITER_TYPES.get(open_delimiter, TextType.TEXT)))
+        piece_start = match.end()
+        open_delimiter = None if delimiter == open_delimiter else delimiter
+    if NON_BLANK.search(text, piece_start, stop):
+        nodes.append(TextNode.from_span(text, piece_start, stop, DELIMITER_TYPES.get(open_delimiter, TextType.TEXT)))
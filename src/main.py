@@ -1,37 +1,469 @@
 import os
-import shutil
 import logging
-from src.page_generator import generate_page, generate_pages_recursive
-from src.copy_directory import copy_directory
+import sys
+import argparse
+from src.page_generator import PageGenerationError, ParseBudget, generate_pages_recursive
+from src.copy_directory import CopyError, sync_directory
+from src.build_manifest import load_manifest, save_manifest
+from src.assets import ASSET_MANIFEST_NAME, AssetRewriter, fingerprint_assets, hash_assets, rewrite_css_urls, write_asset_manifest
+from src.image_size import image_sizes, is_image
+from src.compress import precompress_directory, remove_compressed
+from src.minify import minify_css
+from src.parse_cache import ParseCache
+from src.inline_cache import InlineCache
+from src.shards import ShardMergeError, merge_shards, parse_shard, shard_dir_name
+from src.dev_server import SiteRebuilder, serve
+from src.staging import StagedBuild
+from src.profiler import Profiler, set_profiler, span
 
-def main():
-    # Set up logging
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
+COMMANDS = ("build", "serve", "rollback", "merge")
+
+
+def shard_argument(text):
+    """
+    Parses the value of --shard.
+
+    Args:
+        text (str): The shard specification, e.g. "2/4".
+
+    Returns:
+        tuple: (index, count) with a zero-based index.
+
+    Raises:
+        argparse.ArgumentTypeError: If the specification is invalid.
+    """
+    try:
+        return parse_shard(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments of the site generator.
+
+    The command defaults to "build", so `main.py --clean` keeps working.
+
+    Args:
+        argv (list, optional): Argument list, defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        argv.insert(0, "build")
 
-    # Define directories
+    build_options = argparse.ArgumentParser(add_help=False)
+    build_options.add_argument(
+        "--clean",
+        action="store_true",
+        help="discard the build manifest and public/ and regenerate everything",
+    )
+    build_options.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes used to generate pages (default: CPU count)",
+    )
+    build_options.add_argument(
+        "--keep-previous",
+        action="store_true",
+        help="keep the replaced generation of public/ for an instant rollback",
+    )
+    build_options.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content, not just size and modification time",
+    )
+    build_options.add_argument(
+        "--link-assets",
+        action="store_true",
+        help="hard link static files into public/ instead of copying them",
+    )
+    build_options.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="add a content hash to static file names and rewrite references to them, "
+             "so they can be cached forever",
+    )
+    build_options.add_argument(
+        "--no-image-sizes",
+        dest="image_sizes",
+        action="store_false",
+        help="do not add width, height and lazy loading to images from static/",
+    )
+    build_options.add_argument(
+        "--minify",
+        action="store_true",
+        help="minify the generated HTML and the CSS files from static/",
+    )
+    build_options.add_argument(
+        "--gzip",
+        action="store_true",
+        help="write a .gz sibling next to every generated page and text asset",
+    )
+    build_options.add_argument(
+        "--parse-cache-size",
+        type=int,
+        default=0,
+        metavar="MB",
+        help="cache the node trees of parsed pages in .build-cache/trees, up to MB megabytes; 0 disables "
+             "it so pages are rendered straight to HTML without building trees, which is faster "
+             "(default: 0)",
+    )
+    build_options.add_argument(
+        "--inline-cache",
+        type=int,
+        default=0,
+        metavar="ENTRIES",
+        help="cache the inline parsing of up to ENTRIES repeated text fragments per process and "
+             "report its hit rate, 0 disables it (default: 0)",
+    )
+    build_options.add_argument(
+        "--page-budget",
+        type=float,
+        default=0,
+        metavar="SECONDS",
+        help="fail pages whose parsing takes longer than SECONDS instead of letting them stall the "
+             "build, 0 disables the limit (default: 0)",
+    )
+    build_options.add_argument(
+        "--degrade-slow-pages",
+        action="store_true",
+        help="render pages over the --page-budget as preformatted text instead of failing them",
+    )
+    build_options.add_argument(
+        "--copy-workers",
+        type=int,
+        default=8,
+        help="number of threads copying or compressing files concurrently (default: 8)",
+    )
+    build_options.add_argument(
+        "--shard",
+        type=shard_argument,
+        metavar="I/N",
+        help="only build the I-th of N deterministic partitions of the pages into "
+             ".build-cache/shards/I-of-N, to be combined with the merge command",
+    )
+    build_options.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="TRACE",
+        help="time each build phase per page, print the slowest phases and pages and "
+             "write a Chrome trace (default: .build-cache/trace.json)",
+    )
+
+    parser = argparse.ArgumentParser(description="Generate the static site into public/.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("build", parents=[build_options], help="build the site (default)")
+    serve_parser = commands.add_parser("serve", parents=[build_options],
+                                       help="build the site and serve public/")
+    commands.add_parser("rollback", help="swap the previous generation of public/ back in")
+    merge_parser = commands.add_parser("merge", help="combine the outputs of a sharded build into public/")
+    merge_parser.add_argument(
+        "shard_dirs",
+        nargs="*",
+        metavar="SHARD_DIR",
+        help="shard output directories (default: every directory in .build-cache/shards)",
+    )
+    merge_parser.add_argument(
+        "--keep-previous",
+        action="store_true",
+        help="keep the replaced generation of public/ for an instant rollback",
+    )
+    serve_parser.add_argument("--host", default="localhost", help="interface to bind (default: localhost)")
+    serve_parser.add_argument("--port", type=int, default=8888, help="port to listen on (default: 8888)")
+    serve_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="rebuild changed pages and assets and live reload open browsers",
+    )
+    serve_parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.1,
+        help="seconds between change polls in watch mode (default: 0.1)",
+    )
+
+    args = parser.parse_args(argv)
+    if getattr(args, "jobs", 1) < 1:
+        parser.error("--jobs must be at least 1")
+    if getattr(args, "parse_cache_size", 0) < 0:
+        parser.error("--parse-cache-size cannot be negative")
+    if getattr(args, "inline_cache", 0) < 0:
+        parser.error("--inline-cache cannot be negative")
+    if getattr(args, "page_budget", 0) < 0:
+        parser.error("--page-budget cannot be negative")
+    if getattr(args, "degrade_slow_pages", False) and not args.page_budget:
+        parser.error("--degrade-slow-pages requires --page-budget")
+    if getattr(args, "copy_workers", 1) < 1:
+        parser.error("--copy-workers must be at least 1")
+    if args.command == "serve" and args.watch and args.fingerprint:
+        parser.error("--fingerprint cannot be combined with serve --watch")
+    if args.command == "serve" and args.shard is not None:
+        parser.error("--shard cannot be combined with serve")
+    return args
+
+
+def site_paths():
+    """
+    Returns the default locations of the site sources and outputs.
+
+    Returns:
+        dict: Paths keyed by "static", "public", "content", "template",
+        "manifest", "trace", "bodies", "trees" and "shards".
+    """
     current_dir = os.path.dirname(os.path.abspath(__file__))
     root_dir = os.path.dirname(current_dir)  # Go up one level to reach static_site_generator
-    static_dir = os.path.join(root_dir, "static")
-    public_dir = os.path.join(root_dir, "public")
-    content_dir = os.path.join(root_dir, "content")
-    template_path = os.path.join(root_dir, "template.html")
+    return {
+        "static": os.path.join(root_dir, "static"),
+        "public": os.path.join(root_dir, "public"),
+        "content": os.path.join(root_dir, "content"),
+        "template": os.path.join(root_dir, "template.html"),
+        "manifest": os.path.join(root_dir, ".build-cache", "manifest.json"),
+        "trace": os.path.join(root_dir, ".build-cache", "trace.json"),
+        "bodies": os.path.join(root_dir, ".build-cache", "bodies"),
+        "trees": os.path.join(root_dir, ".build-cache", "trees"),
+        "shards": os.path.join(root_dir, ".build-cache", "shards"),
+    }
+
+
+def shard_paths(paths, shard):
+    """
+    Returns the site locations of one shard of a sharded build.
+
+    Each shard builds into its own directory with its own manifest and body
+    cache; the merge command combines them.
+
+    Args:
+        paths (dict): Site locations as returned by site_paths().
+        shard (tuple): (index, count) with a zero-based index.
+
+    Returns:
+        dict: paths, with "public", "manifest" and "bodies" inside the
+        shard's directory.
+    """
+    shard_dir = os.path.join(paths["shards"], shard_dir_name(shard))
+    return dict(
+        paths,
+        public=os.path.join(shard_dir, "public"),
+        manifest=os.path.join(shard_dir, "manifest.json"),
+        bodies=os.path.join(shard_dir, "bodies"),
+    )
+
+
+def stylesheet_transform(assets, path, minify):
+    """
+    Builds the transform syncing a stylesheet under fingerprinting.
 
-    # Step 1: Delete anything in the public directory
-    if os.path.exists(public_dir):
-        logger.info(f"\n Removing existing public directory: {public_dir} \n")
-        shutil.rmtree(public_dir)
+    Args:
+        assets (dict): Relative paths mapped to fingerprinted paths.
+        path (str): Relative path of the stylesheet.
+        minify (bool): Whether to minify the stylesheet too.
 
-    # Step 2: Copy all static files from static to public
-    logger.info(f"\nCopying static files from {static_dir} to {public_dir} \n")
-    copy_directory(static_dir, public_dir)
+    Returns:
+        callable: Rewrites the url() references of the stylesheet text,
+        then minifies it when requested.
+    """
+    def transform(text):
+        text = rewrite_css_urls(text, assets, path)
+        return minify_css(text) if minify else text
+    return transform
 
-    # Step 3: Generate pages recursively from content directory
-    logger.info(f"\nGenerating pages recursively from {content_dir} to {public_dir} \n")
-    generate_pages_recursive(content_dir, template_path, public_dir)
 
+def sync_static(args, paths, staging_dir, manifest_path):
+    """
+    Syncs the static files into the staging directory, fingerprinting their
+    names when requested, and records them in the build manifest.
+
+    In a sharded build only the first shard copies the static files; the
+    others still read them to rewrite the references of their pages.
+
+    File hashes and image dimensions are cached in the manifest, so only
+    new or changed files are hashed and have their headers read.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        paths (dict): Site locations as returned by site_paths().
+        staging_dir (str): The directory being built.
+        manifest_path (str): The staging build manifest.
+
+    Returns:
+        AssetRewriter or None: Rewrites the references of pages to static
+        files, or None when there is nothing to rewrite.
+
+    Raises:
+        CopyError: If any static file failed to copy.
+    """
+    manifest = load_manifest(manifest_path)
+    assets = images = None
+    if args.fingerprint or args.image_sizes:
+        # Without fingerprinting only the images need hashing
+        manifest["asset_hashes"] = hash_assets(paths["static"], manifest.get("asset_hashes"),
+                                               include=None if args.fingerprint else is_image)
+    if args.fingerprint:
+        assets = fingerprint_assets(manifest["asset_hashes"], paths["static"])
+    if args.image_sizes:
+        images, manifest["image_sizes"] = image_sizes(paths["static"], manifest["asset_hashes"],
+                                                      manifest.get("image_sizes"))
+    previous_assets = manifest.get("assets", [])
+    transforms = {".css": minify_css} if args.minify else {}
+    if assets is not None:
+        # Stylesheets were named after their rewritten url() references
+        for path in assets:
+            if path.endswith(".css"):
+                transforms[path] = stylesheet_transform(assets, path, args.minify)
+    if manifest.get("minify", False) != args.minify:
+        # Transformed files are compared by modification time only, so drop
+        # the CSS synced with the other setting to have it synced again
+        for path in previous_assets:
+            if path.endswith(".css") and os.path.exists(os.path.join(staging_dir, path)):
+                os.remove(os.path.join(staging_dir, path))
+        manifest["minify"] = args.minify
+    if assets is not None:
+        # The asset manifest is rewritten below rather than pruned as stale
+        previous_assets = [path for path in previous_assets if path != ASSET_MANIFEST_NAME]
+    if args.shard is None or args.shard[0] == 0:
+        manifest["assets"] = sync_directory(paths["static"], staging_dir, previous_assets,
+                                            checksum=args.checksum, link=args.link_assets,
+                                            workers=args.copy_workers, rename=assets, transforms=transforms)
+        if assets is not None:
+            write_asset_manifest(assets, os.path.join(staging_dir, ASSET_MANIFEST_NAME))
+            # Recorded so the file is pruned once fingerprinting is turned off
+            manifest["assets"].append(ASSET_MANIFEST_NAME)
+    save_manifest(manifest, manifest_path)
+    if assets is None and not images:
+        return None
+    return AssetRewriter(assets, images)
+
+
+def build(args, paths):
+    """
+    Builds the site.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        paths (dict): Site locations as returned by site_paths().
+
+    Raises:
+        PageGenerationError: If any page failed to generate.
+        CopyError: If any static file failed to copy; the live site is left
+            untouched.
+    """
+    logger = logging.getLogger(__name__)
+
+    # Step 1: Stage the next generation next to public/, seeded from the
+    # current one unless this is a clean build
+    staged = StagedBuild(paths["public"], paths["manifest"])
+    with span("staging"):
+        staging_dir = staged.prepare(seed=not args.clean)
+
+    try:
+        # Step 2: Sync the static files into the staging directory, copying
+        # only changed files and removing the ones deleted since the last build
+        logger.info(f"\nSyncing static files from {paths['static']} to {staging_dir} \n")
+        with span("static copy"):
+            assets = sync_static(args, paths, staging_dir, staged.staging_manifest_path)
+
+        # Step 3: Generate pages recursively from content directory, skipping unchanged ones
+        logger.info(f"\nGenerating pages recursively from {paths['content']} to {staging_dir} \n")
+        page_error = None
+        parse_cache = None
+        if args.parse_cache_size:
+            parse_cache = ParseCache(paths["trees"], args.parse_cache_size * 1024 * 1024)
+        inline_cache = InlineCache(args.inline_cache) if args.inline_cache else None
+        budget = ParseBudget(args.page_budget, args.degrade_slow_pages) if args.page_budget else None
+        try:
+            generate_pages_recursive(paths["content"], paths["template"], staging_dir,
+                                     staged.staging_manifest_path, jobs=args.jobs,
+                                     body_cache_dir=paths["bodies"], assets=assets,
+                                     minify=args.minify, parse_cache=parse_cache, shard=args.shard,
+                                     inline_cache=inline_cache, budget=budget)
+        except PageGenerationError as e:
+            # Failed pages kept their previous output and are retried on the
+            # next build, so the rest of the generation is still published
+            page_error = e
+        if inline_cache is not None:
+            logger.info(f"\n{inline_cache.summary()} \n")
+
+        # Step 4: Precompress the changed pages and text assets
+        manifest = load_manifest(staged.staging_manifest_path)
+        if args.gzip:
+            logger.info(f"\nCompressing changed files in {staging_dir} \n")
+            with span("compress"):
+                manifest["compressed"] = precompress_directory(staging_dir, manifest.get("compressed"),
+                                                               workers=args.copy_workers)
+                save_manifest(manifest, staged.staging_manifest_path)
+        elif "compressed" in manifest:
+            remove_compressed(staging_dir, manifest.pop("compressed"))
+            save_manifest(manifest, staged.staging_manifest_path)
+    except BaseException:
+        staged.discard()
+        raise
+
+    # Step 5: Swap the finished generation in
+    logger.info(f"\nSwapping {staging_dir} in as {paths['public']} \n")
+    with span("swap"):
+        staged.commit(keep_previous=args.keep_previous)
+
+    if page_error is not None:
+        raise page_error
     logger.info("\nStatic site generation complete \n")
 
 
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Set up logging
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+
+    paths = site_paths()
+    if args.command == "rollback":
+        StagedBuild(paths["public"], paths["manifest"]).rollback()
+        logger.info(f"\nRolled back {paths['public']} to the previous generation \n")
+        return
+    if args.command == "merge":
+        shard_dirs = args.shard_dirs
+        if not shard_dirs and os.path.isdir(paths["shards"]):
+            shard_dirs = [entry.path for entry in os.scandir(paths["shards"]) if entry.is_dir()]
+        try:
+            merge_shards(shard_dirs, paths["public"], paths["manifest"], keep_previous=args.keep_previous)
+        except ShardMergeError as e:
+            logger.error(f"\n{e} \n")
+            sys.exit(1)
+        return
+    if args.shard is not None:
+        paths = shard_paths(paths, args.shard)
+
+    build_profiler = Profiler() if args.profile is not None else None
+    set_profiler(build_profiler)
+    try:
+        build(args, paths)
+    except (PageGenerationError, CopyError) as e:
+        logger.error(f"\n{e} \n")
+        if args.command != "serve":
+            sys.exit(1)
+    finally:
+        if build_profiler is not None:
+            set_profiler(None)
+            trace_path = args.profile or paths["trace"]
+            build_profiler.write_chrome_trace(trace_path)
+            logger.info(f"\nBuild profile (trace written to {trace_path}):\n{build_profiler.summary()}\n")
+
+    if args.command == "serve":
+        rebuilder = None
+        watch_paths = None
+        if args.watch:
+            rebuilder = SiteRebuilder(paths["content"], paths["static"], paths["template"],
+                                      paths["public"], paths["manifest"], jobs=args.jobs,
+                                      body_cache_dir=paths["bodies"], minify=args.minify,
+                                      image_sizes=args.image_sizes)
+            watch_paths = [paths["content"], paths["static"], paths["template"]]
+        serve(paths["public"], args.host, args.port, rebuilder, watch_paths, args.interval)
+
+
 if __name__ == "__main__":
     main()
@@ -1,6 +1,21 @@
 import re
 
 
+class BlockType:
+    """
+    The types of markdown blocks.
+
+    The constants are the plain (interned) strings used throughout, so
+    BlockType.HEADING == "heading" and either can be used.
+    """
+    PARAGRAPH = "paragraph"
+    HEADING = "heading"
+    CODE = "code"
+    QUOTE = "quote"
+    UNORDERED_LIST = "unordered_list"
+    ORDERED_LIST = "ordered_list"
+
+
 def markdown_to_blocks(markdown):
     """
     Converts markdown content into a list of block strings.
@@ -52,26 +67,182 @@ def block_to_block_type(block):
     """
     # Check for heading
     if re.match(r'^#{1,6}\s', block):
-        return "heading"
+        return BlockType.HEADING
 
     # Check for code block
     if block.startswith('```') and block.endswith('```'):
-        return "code"
+        return BlockType.CODE
 
     # Check for quote
     if all(line.strip().startswith('>') for line in block.split('\n')):
-        return "quote"
+        return BlockType.QUOTE
 
     # Check for unordered list
     if all(line.strip().startswith(('* ', '- ')) for line in block.split('\n') if line.strip()):
-        return "unordered_list"
+        return BlockType.UNORDERED_LIST
 
     # Check for ordered list
     lines = [line.strip() for line in block.split('\n') if line.strip()]
     if all(re.match(r'^\d+\.\s', line) for line in lines):
         numbers = [int(line.split('.')[0]) for line in lines]
         if numbers == list(range(1, len(numbers) + 1)):
-            return "ordered_list"
+            return BlockType.ORDERED_LIST
 
     # If none of the above, it's a paragraph
-    return "paragraph"
+    return BlockType.PARAGRAPH
+
+
+HEADING_PATTERN = re.compile(r'#{1,6}(\s|$)')
+ORDERED_ITEM_PATTERN = re.compile(r'(\d+)\.\s')
+FENCE = "```"
+# Characters an open fence may hold before its empty lines end blocks after
+# all, so a stray ``` does not hold the rest of a huge document
+FENCE_LOOKAHEAD = 64 * 1024
+
+
+def iter_blocks(lines):
+    """
+    Splits markdown into blocks and classifies them, reading one line at a
+    time.
+
+    Blocks are separated by empty lines and trimmed like markdown_to_blocks
+    does, and classified like block_to_block_type does. Unlike
+    markdown_to_blocks, a fenced code block is not ended by the empty lines
+    it contains: once a block starts with ```, empty lines are part of it
+    until a line ending with ``` closes the fence, as block_to_block_type
+    requires of a code block. A fence that is never closed, or not within
+    FENCE_LOOKAHEAD characters, does not hold its empty lines: the lines
+    held so far are split like markdown_to_blocks splits them, so memory
+    stays bounded by that limit and the largest block.
+
+    Args:
+        lines (iterable): Lines of the markdown, with or without their
+            trailing newline, e.g. an open file or markdown.split("\\n").
+
+    Yields:
+        tuple: (block_type, lines) with the block's type, as returned by
+        block_to_block_type, and its list of lines.
+    """
+    yield from _split_blocks(lines, fences=True)
+
+
+def _split_blocks(lines, fences):
+    """
+    Splits lines into classified blocks, see iter_blocks.
+
+    Args:
+        lines (iterable): Lines of the markdown.
+        fences (bool): Whether fenced code blocks hold their empty lines.
+
+    Yields:
+        tuple: (block_type, lines).
+    """
+    block = []
+    fenced = in_fence = False
+    held = 0
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if not block:
+            if not line.strip():
+                # Blank lines before a block are trimmed with it
+                continue
+            line = line.lstrip()
+            fenced = line.startswith(FENCE)
+            in_fence = fences and fenced and not (len(line.rstrip()) > len(FENCE)
+                                                  and line.rstrip().endswith(FENCE))
+            held = len(line)
+            block.append(line)
+            continue
+        if line:
+            if in_fence and line.rstrip().endswith(FENCE):
+                in_fence = False
+        elif in_fence and held > FENCE_LOOKAHEAD:
+            # Give up on the fence at an empty line, as if it never closed
+            yield from _split_blocks(block, fences=False)
+            block = []
+            continue
+        elif not in_fence:
+            yield _finish_block(block, fenced)
+            block = []
+            continue
+        if in_fence:
+            held += len(line) + 1
+        block.append(line)
+    if block:
+        if in_fence:
+            # The fence was never closed: its empty lines separate blocks
+            # after all
+            yield from _split_blocks(block, fences=False)
+        else:
+            yield _finish_block(block, fenced)
+
+
+def _finish_block(block, fenced):
+    """
+    Trims the lines of a block and classifies it.
+
+    Args:
+        block (list): Lines of the block; the first one is left-stripped
+            and not blank. Modified in place.
+        fenced (bool): Whether the block starts with ```.
+
+    Returns:
+        tuple: (block_type, lines).
+    """
+    # Trailing blank lines are trimmed with the block, and the lines after
+    # the first lose their indentation unless they are code
+    while not block[-1].strip():
+        block.pop()
+    if fenced:
+        for index in range(1, len(block)):
+            block[index] = block[index].rstrip()
+    else:
+        for index in range(1, len(block)):
+            block[index] = block[index].strip()
+    block[-1] = block[-1].rstrip()
+    return _block_type(block), block
+
+
+def _block_type(lines):
+    """
+    Classifies the trimmed lines of a block in a single pass, see
+    block_to_block_type.
+
+    Args:
+        lines (list): Lines of the block.
+
+    Returns:
+        str: The type of the block.
+    """
+    first = lines[0]
+    heading = HEADING_PATTERN.match(first)
+    # A lone "#" line only counts as a heading when a line break follows it
+    if heading and (heading.group(1) or len(lines) > 1):
+        return BlockType.HEADING
+    if first.startswith(FENCE) and lines[-1].endswith(FENCE):
+        return BlockType.CODE
+    quote = unordered = ordered = True
+    number = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            quote = False
+            continue
+        if quote and not line.startswith('>'):
+            quote = False
+        if unordered and not line.startswith(('* ', '- ')):
+            unordered = False
+        if ordered:
+            item = ORDERED_ITEM_PATTERN.match(line)
+            number += 1
+            ordered = item is not None and int(item.group(1)) == number
+        if not (quote or unordered or ordered):
+            return BlockType.PARAGRAPH
+    if quote:
+        return BlockType.QUOTE
+    if unordered:
+        return BlockType.UNORDERED_LIST
+    if ordered:
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
@@ -1,8 +1,31 @@
-from src.htmlnode import HTMLNode, ParentNode, LeafNode
+from src.htmlnode import HTMLNode, ParentNode, LeafNode, Tag
 from src.textnode import TextNode
-from src.markdown_blocks import markdown_to_blocks, block_to_block_type
-from src.text_to_node import text_to_textnodes, text_node_to_leaf_node
+from src.markdown_blocks import BlockType, iter_blocks
+from src.text_to_node import text_to_textnodes, text_node_to_html, text_node_to_leaf_node
+from src.inline_cache import get_inline_cache
+from src.profiler import accumulate, span
+import html
 import re
+import time
+
+HEADING_BLOCK_PATTERN = re.compile(r'^(#+)\s*(.+)$')
+UNORDERED_ITEM_PATTERN = re.compile(r"^\s*[-*]\s*(.+)$")
+ORDERED_ITEM_PATTERN = re.compile(r"^\s*\d+\.\s*(.+)$")
+
+
+class ParseBudgetExceeded(Exception):
+    """
+    Raised when parsing a document runs past its deadline.
+
+    Attributes:
+        lines (list): Lines of the block that was about to be parsed when
+            the deadline passed, or None if unknown.
+    """
+
+    def __init__(self, lines=None):
+        self.lines = lines
+        super().__init__("Parsing took longer than its time budget")
+
 
 def block_to_html_node(block_type, block):
     """
@@ -20,54 +43,108 @@ def block_to_html_node(block_type, block):
     """
     if not block.strip():
         return None
-    if block_type == "paragraph":
-        return paragraph_to_html_node(block)
-    elif block_type == "heading":
-        return heading_to_html_node(block)
-    elif block_type == "code":
-        return code_to_html_node(block)
-    elif block_type == "quote":
-        return quote_to_html_node(block)
-    elif block_type == "unordered_list":
-        return unordered_list_to_html_node(block)
-    elif block_type == "ordered_list":
-        return ordered_list_to_html_node(block)
-    else:
+    to_html_node = BLOCK_BUILDERS.get(block_type)
+    if to_html_node is None:
         raise ValueError(f"Invalid block type: {block_type}")
+    return to_html_node(block)
 
-def markdown_to_html_node(markdown):
+def markdown_to_html_node(markdown, deadline=None):
     """
     Converts a Markdown document to an HTML node.
 
     Args:
         markdown (str): The Markdown content to be converted.
+        deadline (float, optional): time.monotonic() value after which
+            parsing is abandoned; checked before each block.
 
     Returns:
         ParentNode: A ParentNode instance representing the HTML structure of the Markdown document.
+
+    Raises:
+        ParseBudgetExceeded: If the deadline passed.
     """
-    blocks = markdown_to_blocks(markdown)
+    with span("block splitting"):
+        blocks = list(iter_blocks(markdown.split("\n")))
     children = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        child = block_to_html_node(block_type, block)
+    for block_type, lines in blocks:
+        if deadline is not None and time.monotonic() > deadline:
+            raise ParseBudgetExceeded(lines)
+        child = block_to_html_node(block_type, "\n".join(lines))
         if child is not None:
             children.append(child)
-    return ParentNode("div", children, None)
+    return ParentNode(Tag.DIV, children, None)
+
+def iter_html_nodes(lines, deadline=None):
+    """
+    Converts a Markdown document to the HTML nodes of its blocks, one block
+    at a time.
+
+    Args:
+        lines (iterable): Lines of the Markdown content, e.g. an open file.
+        deadline (float, optional): time.monotonic() value after which
+            parsing is abandoned; checked before each block.
+
+    Yields:
+        HTMLNode: The node of each non-empty block, in document order; the
+        children of the node built by markdown_to_html_node.
+
+    Raises:
+        ParseBudgetExceeded: If the deadline passed. Its lines are those of
+            the first block left unparsed; apart from the empty line ending
+            that block, the lines after it have not been read yet.
+    """
+    for block_type, block_lines in iter_blocks(lines):
+        if deadline is not None and time.monotonic() > deadline:
+            raise ParseBudgetExceeded(block_lines)
+        child = block_to_html_node(block_type, "\n".join(block_lines))
+        if child is not None:
+            yield child
+
+def preformatted_html_node(markdown):
+    """
+    Renders a Markdown document as its escaped source text, e.g. for pages
+    that could not be parsed in time.
+
+    Args:
+        markdown (str): The Markdown content.
+
+    Returns:
+        ParentNode: A <div> holding the source in a <pre>.
+    """
+    return ParentNode(Tag.DIV, [ParentNode(Tag.PRE, [LeafNode(html.escape(markdown, quote=False))])])
 
 def text_to_children(text):
     """
     Converts a text string to a list of HTML nodes.
 
+    Tokenized texts are looked up in the active inline cache, if any (see
+    inline_cache.set_inline_cache).
+
     Args:
         text (str): The text to be converted.
 
     Returns:
         List[HTMLNode]: A list of HTMLNode instances representing the HTML structure of the text.
     """
-    text_nodes = text_to_textnodes(text)
-    html_nodes = [text_node_to_leaf_node(node) for node in text_nodes if node.text.strip()]
+    html_nodes = [text_node_to_leaf_node(node) for node in _text_nodes(text) if not node.is_blank()]
     return [node for node in html_nodes if node is not None]
 
+def _text_nodes(text):
+    """
+    Tokenizes a text, through the active inline cache if any.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list: List of TextNode objects.
+    """
+    with accumulate("inline parsing"):
+        inline_cache = get_inline_cache()
+        if inline_cache is not None:
+            return inline_cache.text_to_textnodes(text)
+        return text_to_textnodes(text)
+
 def paragraph_to_html_node(block):
     """
     Converts a Markdown paragraph block to an HTML node.
@@ -78,10 +155,11 @@ def paragraph_to_html_node(block):
     Returns:
         ParentNode: A ParentNode instance representing the HTML structure of the Markdown paragraph.
     """
-    lines = block.split("\n")
-    paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
-    return ParentNode("p", children)
+    children = text_to_children(_paragraph_text(block))
+    return ParentNode(Tag.PARAGRAPH, children)
+
+def _paragraph_text(block):
+    return " ".join(block.split("\n"))
 
 def heading_to_html_node(block):
     """
@@ -93,14 +171,28 @@ def heading_to_html_node(block):
     Returns:
         ParentNode: A ParentNode instance representing the HTML structure of the Markdown heading.
     """
-    match = re.match(r'^(#+)\s*(.+)$', block)
-    if match:
-        level = len(match.group(1))
-        content = match.group(2).strip()
+    heading = _heading(block)
+    if heading:
+        level, content = heading
         children = text_to_children(content)
         return ParentNode(f"h{level}", children)
     return None
 
+def _heading(block):
+    """
+    Parses a Markdown heading block.
+
+    Args:
+        block (str): The content of the Markdown heading block.
+
+    Returns:
+        tuple: (level, content), or None if the block is not a heading.
+    """
+    match = HEADING_BLOCK_PATTERN.match(block)
+    if match:
+        return len(match.group(1)), match.group(2).strip()
+    return None
+
 def code_to_html_node(block):
     """
     Converts a Markdown code block to an HTML node.
@@ -111,9 +203,11 @@ def code_to_html_node(block):
     Returns:
         ParentNode: A ParentNode instance representing the HTML structure of the Markdown code block.
     """
+    return ParentNode(Tag.PRE, [ParentNode(Tag.CODE, [LeafNode(value=_code_text(block))])])
+
+def _code_text(block):
     code_content = block.strip().split("\n")[1:-1]  # Remove ``` lines
-    code_text = "\n".join(code_content)
-    return ParentNode("pre", [ParentNode("code", [LeafNode(value=code_text)])])
+    return "\n".join(code_content)
 
 def quote_to_html_node(block):
     """
@@ -125,8 +219,11 @@ def quote_to_html_node(block):
     Returns:
         ParentNode: A ParentNode instance representing the HTML structure of the Markdown quote.
     """
+    return ParentNode(Tag.BLOCKQUOTE, [LeafNode(value=_quote_text(block))])
+
+def _quote_text(block):
     lines = [line.strip()[2:] for line in block.split("\n") if line.strip()]  # Remove "> " from each non-empty line
-    return ParentNode("blockquote", [LeafNode(value=" ".join(lines))])
+    return " ".join(lines)
 
 
 def unordered_list_to_html_node(block):
@@ -139,10 +236,9 @@ def unordered_list_to_html_node(block):
     Returns:
         ParentNode: A ParentNode instance representing the HTML structure of the Markdown unordered list.
     """
-    list_item_pattern = r"^\s*[-*]\s*(.+)$"
-    items = [match.group(1) for line in block.split("\n") if (match := re.match(list_item_pattern, line))]
-    li_nodes = [ParentNode("li", text_to_children(item)) for item in items]
-    return ParentNode("ul", li_nodes, None)
+    items = _list_items(block, UNORDERED_ITEM_PATTERN)
+    li_nodes = [ParentNode(Tag.LIST_ITEM, text_to_children(item)) for item in items]
+    return ParentNode(Tag.UNORDERED_LIST, li_nodes, None)
 
 def ordered_list_to_html_node(block):
     """
@@ -154,7 +250,150 @@ def ordered_list_to_html_node(block):
     Returns:
         ParentNode: A ParentNode instance representing the HTML structure of the Markdown ordered list.
     """
-    list_item_pattern = r"^\s*\d+\.\s*(.+)$"
-    items = [match.group(1) for line in block.split("\n") if (match := re.match(list_item_pattern, line))]
-    li_nodes = [ParentNode("li", text_to_children(item)) for item in items]
-    return ParentNode("ol", li_nodes, None)
+    items = _list_items(block, ORDERED_ITEM_PATTERN)
+    li_nodes = [ParentNode(Tag.LIST_ITEM, text_to_children(item)) for item in items]
+    return ParentNode(Tag.ORDERED_LIST, li_nodes, None)
+
+def _list_items(block, pattern):
+    return [match.group(1) for line in block.split("\n") if (match := pattern.match(line))]
+
+# Builds the HTML node of each block type, see block_to_html_node
+BLOCK_BUILDERS = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+    BlockType.UNORDERED_LIST: unordered_list_to_html_node,
+    BlockType.ORDERED_LIST: ordered_list_to_html_node,
+}
+
+
+def markdown_to_html_string(markdown, deadline=None):
+    """
+    Converts a Markdown document to HTML directly, without building node
+    trees.
+
+    This is the fast path for callers that only need the HTML; use
+    markdown_to_html_node for a tree to inspect or modify.
+
+    Args:
+        markdown (str): The Markdown content to be converted.
+        deadline (float, optional): time.monotonic() value after which
+            parsing is abandoned; checked before each block.
+
+    Returns:
+        str: The same HTML as markdown_to_html_node(markdown).to_html().
+
+    Raises:
+        ParseBudgetExceeded: If the deadline passed.
+        ValueError: If the document renders to nothing, as
+            markdown_to_html_node does.
+    """
+    with span("block splitting"):
+        blocks = list(iter_blocks(markdown.split("\n")))
+    children = []
+    for block_type, lines in blocks:
+        if deadline is not None and time.monotonic() > deadline:
+            raise ParseBudgetExceeded(lines)
+        child = block_to_html_string(block_type, "\n".join(lines))
+        if child is not None:
+            children.append(child)
+    return _element(Tag.DIV, children)
+
+def iter_html_strings(lines, deadline=None):
+    """
+    Converts a Markdown document to the HTML of its blocks, one block at a
+    time, without building node trees.
+
+    Args:
+        lines (iterable): Lines of the Markdown content, e.g. an open file.
+        deadline (float, optional): time.monotonic() value after which
+            parsing is abandoned; checked before each block.
+
+    Yields:
+        str: The HTML of each non-empty block, in document order; the same
+        as the nodes of iter_html_nodes serialize to.
+
+    Raises:
+        ParseBudgetExceeded: If the deadline passed, see iter_html_nodes.
+    """
+    for block_type, block_lines in iter_blocks(lines):
+        if deadline is not None and time.monotonic() > deadline:
+            raise ParseBudgetExceeded(block_lines)
+        child = block_to_html_string(block_type, "\n".join(block_lines))
+        if child is not None:
+            yield child
+
+def block_to_html_string(block_type, block):
+    """
+    Converts a Markdown block of a specific type to HTML, see
+    block_to_html_node.
+
+    Args:
+        block_type (str): The type of the Markdown block.
+        block (str): The content of the Markdown block.
+
+    Returns:
+        str: The HTML of the block, or None if the block is empty.
+
+    Raises:
+        ValueError: If the block_type is invalid.
+    """
+    if not block.strip():
+        return None
+    render = BLOCK_RENDERERS.get(block_type)
+    if render is None:
+        raise ValueError(f"Invalid block type: {block_type}")
+    return render(block)
+
+def text_to_html(text):
+    """
+    Converts a text string to the HTML of its inline nodes, see
+    text_to_children.
+
+    Args:
+        text (str): The text to be converted.
+
+    Returns:
+        list: The HTML of each node, in order.
+    """
+    return [text_node_to_html(node) for node in _text_nodes(text) if not node.is_blank()]
+
+def _element(tag, children):
+    """
+    Renders an element the way a ParentNode without props does.
+
+    Args:
+        tag (str): The HTML tag.
+        children (list): The HTML of the children.
+
+    Returns:
+        str: The HTML of the element.
+
+    Raises:
+        ValueError: If children is empty, like ParentNode.
+    """
+    if not children:
+        raise ValueError("Parent nodes must have children")
+    return f"<{tag}>{''.join(children)}</{tag}>"
+
+def _heading_html(block):
+    heading = _heading(block)
+    if heading:
+        level, content = heading
+        return _element(f"h{level}", text_to_html(content))
+    return None
+
+def _list_html(tag, block, pattern):
+    return _element(tag, [_element(Tag.LIST_ITEM, text_to_html(item)) for item in _list_items(block, pattern)])
+
+# Renders each block type, see block_to_html_string; every renderer
+# produces what the matching BLOCK_BUILDERS node serializes to
+BLOCK_RENDERERS = {
+    BlockType.PARAGRAPH: lambda block: _element(Tag.PARAGRAPH, text_to_html(_paragraph_text(block))),
+    BlockType.HEADING: _heading_html,
+    BlockType.CODE: lambda block: f"<pre><code>{_code_text(block)}</code></pre>",
+    BlockType.QUOTE: lambda block: f"<blockquote>{_quote_text(block)}</blockquote>",
+    BlockType.UNORDERED_LIST: lambda block: _list_html(Tag.UNORDERED_LIST, block, UNORDERED_ITEM_PATTERN),
+    BlockType.ORDERED_LIST: lambda block: _list_html(Tag.ORDERED_LIST, block, ORDERED_ITEM_PATTERN),
+}
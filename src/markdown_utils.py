@@ -53,7 +53,23 @@ def extract_title(markdown):
     Raises:
     ValueError: If no h1 header is found in the markdown.
     """
-    lines = markdown.split('\n')
+    return extract_title_from_lines(markdown.split('\n'))
+
+
+def extract_title_from_lines(lines):
+    """
+    Extracts the title (h1 header) from the lines of a markdown document,
+    reading no further than the title.
+
+    Args:
+    lines (iterable): The lines, e.g. an open markdown file.
+
+    Returns:
+    str: The extracted title.
+
+    Raises:
+    ValueError: If no h1 header is found in the markdown.
+    """
     for line in lines:
         if line.strip().startswith('# '):
             return line.strip()[2:].strip()
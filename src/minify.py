@@ -0,0 +1,282 @@
+import io
+import re
+
+# Elements whose contents are whitespace sensitive or not HTML, and are
+# passed through untouched
+RAW_TEXT_TAGS = frozenset({"pre", "textarea", "script", "style"})
+# Their end tags, found without lower casing the rest of the input
+RAW_TEXT_END_PATTERNS = {tag: re.compile("</" + tag, re.IGNORECASE) for tag in RAW_TEXT_TAGS}
+
+# Characters that end a tag, open a quoted attribute value (which may
+# contain "<" and ">") or, unquoted, show that a "<" did not open a tag
+TAG_DELIMITER_PATTERN = re.compile(r"""[<>"']""")
+# Longest tag; a "<" not closed within it is text, so the minifier never
+# holds back more than this waiting for a ">"
+MAX_TAG_LENGTH = 64 * 1024
+START_TAG_PATTERN = re.compile(r"<([A-Za-z][^\s/>]*)(.*?)(/?)>$", re.S)
+ATTRIBUTE_PATTERN = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>]+))?""")
+UNQUOTED_VALUE_PATTERN = re.compile(r"""^[^\s"'=<>`]+$""")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# CSS strings and comments, matched together so neither is mistaken for
+# the start of the other
+CSS_TOKEN_PATTERN = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|(/\*.*?\*/)""", re.S)
+CSS_STRING_PATTERN = re.compile(r"""("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')""")
+CSS_PUNCTUATION_PATTERN = re.compile(r"\s*([{};,>])\s*")
+CSS_DECLARATION_PATTERN = re.compile(r"(?<=[{;])([\w-]+):\s+")
+
+
+def scan_tag(html, position, end, quote=None):
+    """
+    Scans a tag for its closing ">", skipping quoted attribute values. A
+    "<" outside them means the tag was text after all.
+
+    Args:
+        html (str): The HTML.
+        position (int): Where to scan from, inside the tag.
+        end (int): Where to stop scanning.
+        quote (str, optional): The quote of the attribute value position
+            is in, when resuming an earlier scan.
+
+    Returns:
+        tuple: (tag_end, quote) where tag_end is the index after ">", None
+        when it is not a tag, or -1 when the tag does not end before end,
+        with the quote open there.
+    """
+    while True:
+        if quote is not None:
+            position = html.find(quote, position, end)
+            if position == -1:
+                return -1, quote
+            position += 1
+            quote = None
+        match = TAG_DELIMITER_PATTERN.search(html, position, end)
+        if match is None:
+            return -1, None
+        position = match.end()
+        if match.group() == ">":
+            return position, None
+        if match.group() == "<":
+            return None, None
+        quote = match.group()
+
+
+def minify_tag(tag):
+    """
+    Minifies a single tag: collapses whitespace and drops attribute quotes
+    that are not needed.
+
+    Args:
+        tag (str): A complete tag, e.g. '<a  href="/x" >'.
+
+    Returns:
+        str: The minified tag, e.g. '<a href=/x>'.
+    """
+    match = START_TAG_PATTERN.match(tag)
+    if match is None:
+        # End tags, the doctype and anything unusual
+        return WHITESPACE_PATTERN.sub(" ", tag).replace(" >", ">")
+    name, rest, slash = match.groups()
+    parts = ["<", name]
+    unquoted = False
+    for attribute in ATTRIBUTE_PATTERN.finditer(rest):
+        key, value = attribute.groups()
+        parts.append(" ")
+        parts.append(key)
+        unquoted = False
+        if value is None:
+            continue
+        inner = value[1:-1] if value[0] in "\"'" else value
+        if UNQUOTED_VALUE_PATTERN.match(inner) and not inner.endswith("/"):
+            parts.append("=" + inner)
+            unquoted = True
+        else:
+            parts.append("=" + value)
+    if slash:
+        # "<img src=a/>" would read as src="a/"
+        parts.append(" />" if unquoted else "/>")
+    else:
+        parts.append(">")
+    return "".join(parts)
+
+
+class HTMLMinifier:
+    """
+    A file-like writer that minifies the HTML written to it on the fly.
+
+    Whitespace runs are collapsed to a single space, comments are removed
+    and tags are minified with minify_tag. The contents of <pre>,
+    <textarea>, <script> and <style> are left as they are. Input may be
+    split into chunks anywhere, even inside a tag; text that could continue
+    in the next chunk is held back until it is complete. A "<" that is not
+    closed within MAX_TAG_LENGTH characters is text, so at most that much is
+    held back, and held back input is not scanned again.
+
+    Attributes:
+        fp: The underlying file-like object receiving the minified HTML.
+    """
+
+    def __init__(self, fp):
+        """
+        Initialize an HTMLMinifier.
+
+        Args:
+            fp: Any object with a write(str) method.
+        """
+        self.fp = fp
+        self._buffer = ""
+        self._raw_tag = None
+        self._comment = False
+        # How far the tag held back at the start of the buffer was scanned,
+        # and the quote open there
+        self._tag_scanned = 0
+        self._tag_quote = None
+        # Whether the output ends with a collapsed whitespace run, so the
+        # runs around a removed comment become a single space
+        self._space = False
+
+    def write(self, text):
+        """
+        Minify a chunk of HTML.
+
+        Args:
+            text (str): The chunk.
+        """
+        self._buffer += text
+        self._process(final=False)
+
+    def close(self):
+        """
+        Flush the held back input. The underlying file is not closed.
+        """
+        self._process(final=True)
+
+    def _process(self, final):
+        buffer = self._buffer
+        length = len(buffer)
+        position = 0
+        out = []
+        # Only valid for the tag held back at the start of the buffer
+        scanned, self._tag_scanned = self._tag_scanned, 0
+        while position < length:
+            if self._raw_tag is not None:
+                match = RAW_TEXT_END_PATTERNS[self._raw_tag].search(buffer, position)
+                if match is None:
+                    # Hold back what could be the start of the end tag
+                    safe = length if final else max(position, length - len(self._raw_tag) - 2)
+                    out.append(buffer[position:safe])
+                    position = safe
+                    break
+                out.append(buffer[position:match.start()])
+                position = match.start()
+                self._raw_tag = None
+                self._space = False
+
+            if self._comment:
+                end = buffer.find("-->", position)
+                if end == -1:
+                    # The comment is dropped, so only hold back what could
+                    # be the start of "-->"
+                    position = length if final else max(position, length - 2)
+                    break
+                position = end + 3
+                self._comment = False
+                continue
+
+            if buffer.startswith("<!--", position):
+                position += 4
+                self._comment = True
+                continue
+
+            if buffer[position] == "<" and position + 1 < length and (
+                    buffer[position + 1].isalpha() or buffer[position + 1] in "/!"):
+                limit = position + MAX_TAG_LENGTH
+                if position == 0 and scanned:
+                    end, quote = scan_tag(buffer, scanned, limit, self._tag_quote)
+                else:
+                    end, quote = scan_tag(buffer, position + 2, limit)
+                if end is not None and end != -1:
+                    tag = minify_tag(buffer[position:end])
+                    out.append(tag)
+                    position = end
+                    self._space = False
+                    name = START_TAG_PATTERN.match(tag)
+                    if name is not None and name.group(1).lower() in RAW_TEXT_TAGS:
+                        self._raw_tag = name.group(1).lower()
+                    continue
+                if end == -1 and not final and length < limit:
+                    # Resume the scan where it stopped once more input came
+                    self._tag_scanned = length - position
+                    self._tag_quote = quote
+                    break
+            elif buffer[position] == "<" and position + 1 == length and not final:
+                break
+
+            end = buffer.find("<", position + 1)
+            if end == -1:
+                if final:
+                    end = length
+                else:
+                    # Only the trailing whitespace run may continue in the
+                    # next chunk
+                    end = len(buffer.rstrip())
+                    if end <= position:
+                        break
+            text = WHITESPACE_PATTERN.sub(" ", buffer[position:end])
+            if self._space and text.startswith(" "):
+                text = text[1:]
+            if text:
+                out.append(text)
+                self._space = text.endswith(" ")
+            position = end
+
+        self._buffer = buffer[position:]
+        if out:
+            self.fp.write("".join(out))
+
+
+def minify_html(html):
+    """
+    Minifies an HTML document, see HTMLMinifier.
+
+    Args:
+        html (str): The document.
+
+    Returns:
+        str: The minified document.
+    """
+    out = io.StringIO()
+    minifier = HTMLMinifier(out)
+    minifier.write(html)
+    minifier.close()
+    return out.getvalue()
+
+
+def minify_css(css):
+    """
+    Minifies a stylesheet: removes comments and the whitespace around
+    punctuation, and collapses the rest. Strings are left untouched.
+
+    Args:
+        css (str): The stylesheet.
+
+    Returns:
+        str: The minified stylesheet.
+    """
+    # A comment separates tokens like whitespace does
+    css = CSS_TOKEN_PATTERN.sub(lambda match: match.group(1) or " ", css)
+    parts = []
+    position = 0
+    for match in CSS_STRING_PATTERN.finditer(css):
+        parts.append(_minify_css_code(css[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(_minify_css_code(css[position:]))
+    return "".join(parts).strip()
+
+
+def _minify_css_code(code):
+    code = WHITESPACE_PATTERN.sub(" ", code)
+    code = CSS_PUNCTUATION_PATTERN.sub(r"\1", code)
+    code = CSS_DECLARATION_PATTERN.sub(r"\1:", code)
+    return code.replace(";}", "}")
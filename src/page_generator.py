@@ -1,29 +1,166 @@
+import contextlib
+import html
 import os
-from src.markdown_to_html import markdown_to_html_node
-from src.markdown_utils import extract_title
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from src.markdown_to_html import (
+    ParseBudgetExceeded,
+    iter_html_strings,
+    markdown_to_html_node,
+    markdown_to_html_string,
+    preformatted_html_node,
+)
+from src.markdown_utils import extract_title, extract_title_from_lines
+from src.template import Template
+from src.shards import shard_of
+from src.parse_cache import parser_version
+from src.inline_cache import get_inline_cache, set_inline_cache
+from src import profiler
+from src.build_manifest import (
+    atomic_write,
+    cached_hash,
+    load_manifest,
+    remove_output,
+    save_manifest,
+)
 
-def generate_page(from_path, template_path, dest_path):
+# Sources and cached bodies of at least this many bytes are streamed
+# instead of being held in memory whole, see _stream_page
+STREAM_THRESHOLD = 16 * 1024 * 1024
+
+# Characters read at a time when streaming a cached body
+STREAM_CHUNK_SIZE = 1 << 20
+
+
+class PageGenerationError(Exception):
+    """
+    Raised after a build when one or more pages failed to generate.
+
+    Attributes:
+        failures (list): (source path, error message) pairs in build order.
     """
-    Generates an HTML page from a markdown file using a template.
+
+    def __init__(self, failures):
+        self.failures = failures
+        details = "\n".join(f"  {path}: {message}" for path, message in failures)
+        super().__init__(f"{len(failures)} page(s) failed to generate:\n{details}")
+
+
+class ParseBudget:
+    """
+    A limit on the time spent parsing a single page, so a page that parses
+    pathologically slowly cannot stall the build.
+
+    Attributes:
+        seconds (float): Time allowed for parsing one page.
+        degrade (bool): Render a page over its budget as its escaped
+            markdown in a <pre> instead of failing it.
+    """
+
+    def __init__(self, seconds, degrade=False):
+        """
+        Initialize a ParseBudget.
+
+        Args:
+            seconds (float): Time allowed for parsing one page.
+            degrade (bool, optional): Degrade pages over their budget
+                instead of failing them.
+        """
+        self.seconds = seconds
+        self.degrade = degrade
+
+    def deadline(self):
+        """
+        Returns the deadline of a page whose parsing starts now.
+
+        Returns:
+            float: A time.monotonic() value.
+        """
+        return time.monotonic() + self.seconds
+
+
+def _write_output(template, title, content, dest_path):
+    """
+    Wraps a page body in the template and writes it to its destination.
+
+    Args:
+        template (Template): The compiled page template.
+        title (str): The page title.
+        content (str or HTMLNode): The page body, streamed if it is a node.
+        dest_path (str): Path where the generated HTML file will be saved.
+    """
+    # Ensure the destination directory exists
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+
+    # Stream the page into a temporary file and move it into place, so a
+    # failure never leaves a half-written page behind
+    with profiler.span("write"):
+        with atomic_write(dest_path) as dest_file:
+            template.write(dest_file, Title=title, Content=content)
+
+
+def _write_page(from_path, template, dest_path, body_path=None, assets=None, parse_cache=None, budget=None):
+    """
+    Renders a markdown file with a compiled template and writes the result.
+
+    Sources of at least STREAM_THRESHOLD bytes are streamed, see
+    _stream_page. Unless the node tree is needed (to store it in the
+    parse cache, or to rewrite its references in place when the body is
+    not cached), the HTML is rendered without building it.
 
     Args:
         from_path (str): Path to the source markdown file.
-        template_path (str): Path to the HTML template file.
+        template (Template): The compiled page template.
         dest_path (str): Path where the generated HTML file will be saved.
+        body_path (str, optional): Where to cache the rendered page body so
+            the page can later be re-wrapped without parsing it again.
+        assets (AssetRewriter, optional): Rewrites the references of the
+            page to static files.
+        parse_cache (ParseCache, optional): Cache of node trees, consulted
+            before parsing the markdown.
+        budget (ParseBudget, optional): Limit on the time spent parsing
+            the page. Degraded pages are not stored in the parse cache.
+
+    Returns:
+        str: The page title.
+
+    Raises:
+        ParseBudgetExceeded: If parsing ran over budget and the budget
+            does not degrade pages.
     """
-    print(f"\nGenerating page from {from_path} to {dest_path} using {template_path} \n")
+    if os.path.getsize(from_path) >= STREAM_THRESHOLD:
+        return _stream_page(from_path, template, dest_path, body_path, assets, budget)
 
     # Read the markdown file
-    with open(from_path, 'r') as md_file:
-        markdown_content = md_file.read()
+    with profiler.span("read"):
+        with open(from_path, 'r') as md_file:
+            markdown_content = md_file.read()
 
-    # Read the template file
-    with open(template_path, 'r') as template_file:
-        template_content = template_file.read()
-
-    # Convert markdown to HTML
-    html_node = markdown_to_html_node(markdown_content)
-    html_content = html_node.to_html() if html_node else ""
+    # Convert markdown to HTML, or to an HTML node tree unless it is cached
+    direct = parse_cache is None and (assets is None or body_path is not None)
+    with profiler.span("rendering" if direct else "tree construction"):
+        hit = False
+        if parse_cache is not None:
+            source_hash = parse_cache.source_hash(markdown_content)
+            hit, content = parse_cache.get(source_hash)
+        if not hit:
+            render = markdown_to_html_string if direct else markdown_to_html_node
+            try:
+                content = render(markdown_content, budget.deadline() if budget else None)
+            except ParseBudgetExceeded:
+                if not budget.degrade:
+                    raise
+                print(f"\nParsing {from_path} took longer than {budget.seconds:g}s, "
+                      f"rendering it as preformatted text \n")
+                content = preformatted_html_node(markdown_content)
+                if direct:
+                    content = content.to_html()
+            else:
+                if parse_cache is not None:
+                    parse_cache.put(source_hash, content)
+    if content is None:
+        content = ""
 
     # Extract the title
     try:
@@ -31,39 +168,593 @@ def generate_page(from_path, template_path, dest_path):
     except ValueError:
         title = "Untitled"  # Fallback title if no h1 is found
 
-    # Replace placeholders in the template
-    full_html = template_content.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
+    if not isinstance(content, str) and (body_path or profiler.get_profiler() is not None):
+        # Serialize up front to cache the body (and, when profiling, so that
+        # serialization and disk writes are timed separately)
+        with profiler.span("serialization"):
+            content = content.to_html()
+    if body_path:
+        os.makedirs(os.path.dirname(body_path), exist_ok=True)
+        with atomic_write(body_path) as body_file:
+            body_file.write(content)
 
-    # Ensure the destination directory exists
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    # The cached body keeps the original references, so it stays valid when
+    # only the static files change
+    if assets is not None and content:
+        if isinstance(content, str):
+            content = assets.rewrite_html(content)
+        else:
+            assets.rewrite_tree(content)
+
+    _write_output(template, title, content, dest_path)
+    return title
+
+
+class _MarkdownStream:
+    """
+    A page body that is parsed and rendered block by block as the template
+    writes it, so only one block is in memory at a time.
+
+    Attributes:
+        md_file: The open markdown source.
+        body_file: The open body cache file, which receives the body before
+            its references are rewritten, or None.
+        assets (AssetRewriter or None): Rewrites references to static files.
+        budget (ParseBudget or None): Limit on the time spent parsing.
+    """
+
+    def __init__(self, md_file, body_file=None, assets=None, budget=None):
+        self.md_file = md_file
+        self.body_file = body_file
+        self.assets = assets
+        self.budget = budget
+
+    def write_html(self, fp):
+        """
+        Render the body into a file-like object.
+
+        Args:
+            fp: Any object with a write(str) method.
+        """
+        # The same markup as markdown_to_html_node's root <div>
+        self._write(fp, "<div>")
+        deadline = self.budget.deadline() if self.budget else None
+        try:
+            for block_html in iter_html_strings(self.md_file, deadline):
+                self._write(fp, block_html)
+        except ParseBudgetExceeded as e:
+            if not self.budget.degrade:
+                raise
+            print(f"\nParsing {self.md_file.name} took longer than {self.budget.seconds:g}s, "
+                  f"rendering the rest of it as preformatted text \n")
+            # What is already written stays; the rest of the source follows
+            # as text
+            self._write(fp, "<pre>" + html.escape("\n".join(e.lines) + "\n\n", quote=False))
+            for line in self.md_file:
+                self._write(fp, html.escape(line, quote=False))
+            self._write(fp, "</pre>")
+        self._write(fp, "</div>")
+
+    def _write(self, fp, html):
+        if self.body_file is not None:
+            self.body_file.write(html)
+        if self.assets is not None:
+            html = self.assets.rewrite_html(html)
+        fp.write(html)
+
+
+class _CachedBodyStream:
+    """
+    A cached page body that is copied in chunks as the template writes it.
+
+    Attributes:
+        body_file: The open body cache file.
+        assets (AssetRewriter or None): Rewrites references to static files.
+    """
+
+    def __init__(self, body_file, assets=None):
+        self.body_file = body_file
+        self.assets = assets
+
+    def write_html(self, fp):
+        """
+        Copy the body into a file-like object.
+
+        Args:
+            fp: Any object with a write(str) method.
+        """
+        pending = ""
+        for chunk in iter(lambda: self.body_file.read(STREAM_CHUNK_SIZE), ""):
+            chunk = pending + chunk
+            # Hold back a tag that may continue in the next chunk, so its
+            # references are rewritten whole
+            start = chunk.rfind("<")
+            cut = start if start > chunk.rfind(">") else len(chunk)
+            pending = chunk[cut:]
+            fp.write(self._rewrite(chunk[:cut]))
+        fp.write(self._rewrite(pending))
+
+    def _rewrite(self, html):
+        return self.assets.rewrite_html(html) if self.assets is not None else html
+
+
+def _stream_page(from_path, template, dest_path, body_path=None, assets=None, budget=None):
+    """
+    Renders a large markdown file with a compiled template, keeping memory
+    use proportional to its largest block rather than to the page.
+
+    The title is found by a first pass over the file; the blocks are then
+    parsed, rendered and written between the template's literals one at a
+    time. The output is the same as _write_page's, except that a page
+    running over its budget can only be degraded from the block where the
+    deadline passed. The parse cache is not used, since it would hold the
+    whole tree.
+
+    Args:
+        from_path (str): Path to the source markdown file.
+        template (Template): The compiled page template.
+        dest_path (str): Path where the generated HTML file will be saved.
+        body_path (str, optional): Where to cache the rendered page body.
+        assets (AssetRewriter, optional): Rewrites references to static files.
+        budget (ParseBudget, optional): Limit on the time spent parsing
+            the page.
+
+    Returns:
+        str: The page title.
+    """
+    with profiler.span("read"):
+        with open(from_path, 'r') as md_file:
+            try:
+                title = extract_title_from_lines(md_file)
+            except ValueError:
+                title = "Untitled"  # Fallback title if no h1 is found
+
+    with open(from_path, 'r') as md_file, contextlib.ExitStack() as stack:
+        body_file = None
+        if body_path:
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            body_file = stack.enter_context(atomic_write(body_path))
+        _write_output(template, title, _MarkdownStream(md_file, body_file, assets, budget), dest_path)
+    return title
+
+
+def _wrap_page(body_path, title, template, dest_path, assets=None):
+    """
+    Writes a page from its cached body, without touching the markdown.
+
+    Args:
+        body_path (str): Path to the cached page body.
+        title (str): The page title recorded with the body.
+        template (Template): The compiled page template.
+        dest_path (str): Path where the generated HTML file will be saved.
+        assets (AssetRewriter, optional): Rewrites references to static files.
+    """
+    if os.path.getsize(body_path) >= STREAM_THRESHOLD:
+        with open(body_path, 'r') as body_file:
+            _write_output(template, title, _CachedBodyStream(body_file, assets), dest_path)
+        return
+    with profiler.span("read"):
+        with open(body_path, 'r') as body_file:
+            content = body_file.read()
+    if assets is not None:
+        content = assets.rewrite_html(content)
+    _write_output(template, title, content, dest_path)
+
+
+def load_template(template_path, assets=None, minify=False):
+    """
+    Compiles the page template the way a build renders it.
+
+    Args:
+        template_path (str): Path to the HTML template file.
+        assets (AssetRewriter, optional): Rewrites the template's references
+            to static files.
+        minify (bool, optional): Minify the rendered pages.
+
+    Returns:
+        Template: The compiled template.
+    """
+    template = Template.from_file(template_path, minify)
+    if assets is not None:
+        template = Template(assets.rewrite_html(template.source), minify)
+    return template
 
-    # Write the full HTML to the destination file
-    with open(dest_path, 'w') as dest_file:
-        dest_file.write(full_html)
 
+def generate_page(from_path, template_path, dest_path, template=None, body_path=None, assets=None,
+                  parse_cache=None, budget=None):
+    """
+    Generates an HTML page from a markdown file using a template.
+
+    Args:
+        from_path (str): Path to the source markdown file.
+        template_path (str): Path to the HTML template file.
+        dest_path (str): Path where the generated HTML file will be saved.
+        template (Template, optional): Already compiled template; when
+            omitted the template is loaded from template_path.
+        body_path (str, optional): Where to cache the rendered page body.
+        assets (AssetRewriter, optional): Rewrites references to static files.
+        parse_cache (ParseCache, optional): Cache of node trees.
+        budget (ParseBudget, optional): Limit on the time spent parsing
+            the page.
+
+    Returns:
+        str: The page title.
+    """
+    print(f"\nGenerating page from {from_path} to {dest_path} using {template_path} \n")
+    if template is None:
+        template = Template.from_file(template_path)
+    with profiler.page(from_path):
+        title = _write_page(from_path, template, dest_path, body_path, assets, parse_cache, budget)
     print(f"\nPage generated successfully: {dest_path} \n")
+    return title
+
+
+def _run_job(job, template, assets=None, parse_cache=None, budget=None):
+    """
+    Runs one page job: renders the page, or re-wraps its cached body when the
+    job carries the title recorded with that body.
+
+    Args:
+        job (tuple): (from_path, dest_path, body_path, title).
+        template (Template): The compiled page template.
+        assets (AssetRewriter, optional): Rewrites references to static files.
+        parse_cache (ParseCache, optional): Cache of node trees.
+        budget (ParseBudget, optional): Limit on the time spent parsing
+            the page.
+
+    Returns:
+        str: The page title.
+    """
+    from_path, dest_path, body_path, title = job
+    with profiler.page(from_path):
+        if title is not None:
+            _wrap_page(body_path, title, template, dest_path, assets)
+            return title
+        return _write_page(from_path, template, dest_path, body_path, assets, parse_cache, budget)
+
+
+# Per-process state of pool workers, set once by _init_worker
+_worker_template = None
+_worker_assets = None
+_worker_parse_cache = None
+_worker_budget = None
+
+
+def _init_worker(template, profile, assets=None, parse_cache=None, inline_cache=None, budget=None):
+    """
+    Process pool initializer: stores the compiled template, the asset
+    rewriter and the parse cache so they are sent to each worker once
+    instead of with every job.
+
+    Args:
+        template (Template): The compiled page template.
+        profile (bool): Whether to record profiling spans in this worker.
+        assets (AssetRewriter, optional): Rewrites references to static files.
+        parse_cache (ParseCache, optional): Cache of node trees.
+        inline_cache (InlineCache, optional): Empty inline cache; each
+            worker fills its own copy across the pages it generates.
+        budget (ParseBudget, optional): Limit on the time spent parsing
+            each page.
+    """
+    global _worker_template, _worker_assets, _worker_parse_cache, _worker_budget
+    _worker_template = template
+    _worker_assets = assets
+    _worker_parse_cache = parse_cache
+    _worker_budget = budget
+    profiler.set_profiler(profiler.Profiler() if profile else None)
+    set_inline_cache(inline_cache)
+
+
+def _generate_page_job(job):
+    """
+    Process pool entry point: generates one page and reports the outcome
+    instead of raising, so one bad page cannot abort the other workers.
+
+    Args:
+        job (tuple): (from_path, dest_path, body_path, title).
+
+    Returns:
+        tuple: (title, error, profile, inline_stats) where title is None and
+        error holds the formatted exception if the page failed, profile
+        holds the spans recorded for the page (None when profiling is off)
+        and inline_stats the inline cache statistics counted for the page
+        (None without an inline cache).
+    """
+    title = error = None
+    try:
+        title = _run_job(job, _worker_template, _worker_assets, _worker_parse_cache, _worker_budget)
+    except Exception:
+        error = traceback.format_exc()
+    worker_profiler = profiler.get_profiler()
+    inline_cache = get_inline_cache()
+    return (title, error, worker_profiler.drain() if worker_profiler else None,
+            inline_cache.drain_stats() if inline_cache is not None else None)
+
+
+def _log_job(job, template_path):
+    """
+    Prints the line announcing a page job.
+
+    Args:
+        job (tuple): (from_path, dest_path, body_path, title).
+        template_path (str): Path to the HTML template file.
+    """
+    from_path, dest_path, body_path, title = job
+    if title is None:
+        print(f"\nGenerating page from {from_path} to {dest_path} using {template_path} \n")
+    else:
+        print(f"\nWrapping cached body of {from_path} into {dest_path} using {template_path} \n")
+
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path):
+def _run_jobs(jobs, template_path, template, workers, assets=None, parse_cache=None, inline_cache=None,
+              budget=None):
+    """
+    Generates pages serially or over a process pool.
+
+    Results are consumed in submission order, so log output is identical
+    whatever the number of workers and whichever worker finishes first.
+
+    Args:
+        jobs (list): (from_path, dest_path, body_path, title) tuples.
+        template_path (str): Path to the HTML template file, used for logging.
+        template (Template): The compiled page template.
+        workers (int): Number of worker processes; 1 generates in-process.
+        assets (AssetRewriter, optional): Rewrites references to static files.
+        parse_cache (ParseCache, optional): Cache of node trees.
+        inline_cache (InlineCache, optional): Inline parsing cache, used
+            in this process or copied into each worker. Its statistics
+            cover all of them afterwards.
+        budget (ParseBudget, optional): Limit on the time spent parsing
+            each page.
+
+    Returns:
+        tuple: (titles, failures) where titles lists each job's page title
+        (None for failed pages) and failures lists (from_path, error
+        message) pairs.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        previous_cache = get_inline_cache()
+        set_inline_cache(inline_cache)
+        try:
+            return _run_jobs_serially(jobs, template_path, template, assets, parse_cache, budget)
+        finally:
+            set_inline_cache(previous_cache)
+
+    titles = []
+    failures = []
+
+    # A few chunks per worker amortizes IPC while keeping the load balanced
+    chunksize = max(1, len(jobs) // (workers * 4))
+    build_profiler = profiler.get_profiler()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template, build_profiler is not None, assets, parse_cache,
+                                       inline_cache, budget)) as executor:
+        results = executor.map(_generate_page_job, jobs, chunksize=chunksize)
+        for job, (title, error, profile, inline_stats) in zip(jobs, results):
+            if profile is not None:
+                build_profiler.merge(*profile)
+            if inline_stats is not None:
+                inline_cache.merge_stats(inline_stats)
+            _log_job(job, template_path)
+            if error is None:
+                print(f"\nPage generated successfully: {job[1]} \n")
+            else:
+                print(f"\nFailed to generate page {job[0]}:\n{error}")
+                failures.append((job[0], error.strip().splitlines()[-1]))
+            titles.append(title)
+    return titles, failures
+
+
+def _run_jobs_serially(jobs, template_path, template, assets=None, parse_cache=None, budget=None):
+    """
+    Generates pages one after the other in this process, see _run_jobs.
+
+    Args:
+        jobs (list): (from_path, dest_path, body_path, title) tuples.
+        template_path (str): Path to the HTML template file, used for logging.
+        template (Template): The compiled page template.
+        assets (AssetRewriter, optional): Rewrites references to static files.
+        parse_cache (ParseCache, optional): Cache of node trees.
+        budget (ParseBudget, optional): Limit on the time spent parsing
+            each page.
+
+    Returns:
+        tuple: (titles, failures), see _run_jobs.
+    """
+    titles = []
+    failures = []
+    for job in jobs:
+        from_path, dest_path, body_path, title = job
+        try:
+            if title is None:
+                title = generate_page(from_path, template_path, dest_path, template, body_path, assets,
+                                      parse_cache, budget)
+            else:
+                _log_job(job, template_path)
+                _run_job(job, template, assets, parse_cache, budget)
+                print(f"\nPage generated successfully: {dest_path} \n")
+        except Exception as e:
+            print(f"\nFailed to generate page {from_path}: {e} \n")
+            failures.append((from_path, f"{type(e).__name__}: {e}"))
+            title = None
+        titles.append(title)
+    return titles, failures
+
+
+def _prune_body_cache(body_cache_dir, pages):
+    """
+    Deletes cached page bodies that no manifest entry refers to anymore.
+
+    Args:
+        body_cache_dir (str): The body cache directory.
+        pages (dict): The manifest's page entries.
+    """
+    if not os.path.isdir(body_cache_dir):
+        return
+    live = {f"{entry['body']}.html" for entry in pages.values() if entry.get("body")}
+    with os.scandir(body_cache_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name not in live:
+                os.remove(entry.path)
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, manifest_path=None, jobs=1,
+                             body_cache_dir=None, assets=None, minify=False, parse_cache=None, shard=None,
+                             inline_cache=None, budget=None):
     """
     Recursively generates HTML pages from markdown files in a directory.
 
+    When a manifest path is given the build is incremental. The manifest
+    records the inputs each output depends on (its source, the template and
+    the parser version, see parse_cache.parser_version) and a page is only
+    rebuilt when one of them changed, its output path changed or its output
+    went missing. Outputs whose sources were deleted are pruned.
+
+    With a body cache directory, rendered page bodies are also cached (keyed
+    by source hash and parser version), so a page whose source is unchanged
+    is rebuilt by wrapping its cached body in the new template instead of
+    parsing the markdown again.
+
+    With assets, references to static files in the template and the pages
+    are rewritten (see assets.AssetRewriter), and pages are rebuilt
+    (re-wrapped, with a body cache) when the static files change.
+
+    Pages are generated in sorted order. With jobs > 1 they are fanned out
+    over a process pool; every page is attempted and failures are reported
+    together at the end.
+
     Args:
         dir_path_content (str): Path to the content directory.
         template_path (str): Path to the HTML template file.
         dest_dir_path (str): Path to the destination directory for generated HTML files.
+        manifest_path (str, optional): Path to the build manifest used for incremental builds.
+        jobs (int, optional): Number of worker processes to generate pages with.
+        body_cache_dir (str, optional): Directory caching rendered page
+            bodies; only used together with a manifest.
+        assets (AssetRewriter, optional): Rewrites references to static files.
+        minify (bool, optional): Minify the generated pages.
+        parse_cache (ParseCache, optional): Cache of node trees, so pages
+            that have to be rendered again skip parsing unchanged markdown.
+            Entries beyond its size limit are evicted after the build.
+        shard (tuple, optional): (index, count): only generate the pages
+            assigned to this zero-based shard by shards.shard_of. The
+            manifest then only covers these pages.
+        inline_cache (InlineCache, optional): Cache of inline parsing
+            results shared by the pages generated in each process. Its
+            hit and miss counts cover the whole build afterwards.
+        budget (ParseBudget, optional): Limit on the time spent parsing
+            each page; pages over it fail or are degraded.
+
+    Raises:
+        PageGenerationError: If any page failed to generate.
     """
+    # Compile the template once; every page (and worker) shares it
+    template = load_template(template_path, assets, minify)
+    assets_hash = assets.digest if assets is not None else None
+    manifest = load_manifest(manifest_path) if manifest_path else None
+    if manifest is None:
+        body_cache_dir = None
+    template_hash = template.hash
+    previous_pages = manifest["pages"] if manifest is not None else {}
+    parser = parser_version()
+    current_pages = {}
+    page_jobs = []
+    job_keys = []
+    skipped = wrapped = other_shards = 0
+
     for root, dirs, files in os.walk(dir_path_content):
-        for file in files:
-            if file.endswith('.md'):
-                # Construct paths
-                md_file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(md_file_path, dir_path_content)
-                html_file_path = os.path.join(dest_dir_path, os.path.splitext(relative_path)[0] + '.html')
-
-                # Ensure the destination directory exists
-                os.makedirs(os.path.dirname(html_file_path), exist_ok=True)
-
-                # Generate the HTML page
-                generate_page(md_file_path, template_path, html_file_path)
+        dirs.sort()
+        for file in sorted(files):
+            if not file.endswith('.md'):
+                continue
+            # Construct paths
+            md_file_path = os.path.join(root, file)
+            relative_path = os.path.relpath(md_file_path, dir_path_content)
+            html_relative_path = os.path.splitext(relative_path)[0] + '.html'
+            html_file_path = os.path.join(dest_dir_path, html_relative_path)
+            key = relative_path.replace(os.sep, "/")
+
+            if shard is not None and shard_of(key, shard[1]) != shard[0]:
+                other_shards += 1
+                continue
+
+            if manifest is None:
+                page_jobs.append((md_file_path, html_file_path, None, None))
+                continue
+
+            entry = previous_pages.get(key) or {}
+            source_hash, source_stat = cached_hash(md_file_path, entry)
+            # Bodies rendered by another version of the parser are never
+            # re-wrapped
+            body_key = f"{source_hash}-{parser[:16]}" if body_cache_dir else None
+            body_path = os.path.join(body_cache_dir, f"{body_key}.html") if body_key else None
+            same_source = entry.get("source_hash") == source_hash
+            current = current_pages[key] = {
+                "source_hash": source_hash,
+                "source_stat": source_stat,
+                "template_hash": template_hash,
+                "assets_hash": assets_hash,
+                "parser": parser,
+                "output": html_relative_path.replace(os.sep, "/"),
+                "title": entry.get("title") if same_source else None,
+                "body": entry.get("body") if same_source else None,
+            }
+
+            if (same_source
+                    and entry.get("template_hash") == template_hash
+                    and entry.get("assets_hash") == assets_hash
+                    and entry.get("parser") == parser
+                    and entry.get("output") == current["output"]
+                    and os.path.exists(html_file_path)):
+                skipped += 1
+                continue
+
+            if (body_key and current["body"] == body_key and current["title"] is not None
+                    and os.path.exists(body_path)):
+                # Only the template, the assets or the output path changed:
+                # re-wrap the cached body
+                wrapped += 1
+                page_jobs.append((md_file_path, html_file_path, body_path, current["title"]))
+            else:
+                current["body"] = body_key
+                page_jobs.append((md_file_path, html_file_path, body_path, None))
+            job_keys.append(key)
+
+    titles, failures = _run_jobs(page_jobs, template_path, template, jobs, assets, parse_cache, inline_cache,
+                                 budget)
+    if parse_cache is not None:
+        parse_cache.evict()
+
+    if manifest is not None:
+        # Prune outputs whose sources no longer exist (or moved elsewhere)
+        current_outputs = {entry["output"] for entry in current_pages.values()}
+        for key, entry in previous_pages.items():
+            output = entry.get("output")
+            if key not in current_pages and output and output not in current_outputs:
+                print(f"\nRemoving stale page: {output} \n")
+                remove_output(os.path.join(dest_dir_path, output), dest_dir_path)
+
+        for key, title in zip(job_keys, titles):
+            if title is None:
+                # Forget failed pages so the next build retries them
+                del current_pages[key]
+            else:
+                current_pages[key]["title"] = title
+
+        manifest["pages"] = current_pages
+        if shard is not None:
+            manifest["shard"] = list(shard)
+        else:
+            manifest.pop("shard", None)
+        save_manifest(manifest, manifest_path)
+        if body_cache_dir:
+            _prune_body_cache(body_cache_dir, current_pages)
+        print(f"\nSkipped {skipped} unchanged pages, re-wrapped {wrapped} cached page bodies \n")
+
+    if shard is not None:
+        print(f"\nLeft {other_shards} pages to the other {shard[1] - 1} shards \n")
+
+    if failures:
+        raise PageGenerationError(failures)
 
     print(f"\nPages generated recursively from {dir_path_content} to {dest_dir_path} \n")
@@ -0,0 +1,208 @@
+import hashlib
+import importlib
+import logging
+import marshal
+import os
+from src.build_manifest import atomic_write
+from src.htmlnode import LeafNode, ParentNode
+
+# Modules whose code determines the tree built from a markdown source; the
+# cache is invalidated whenever one of them changes
+PARSER_MODULES = (
+    "src.htmlnode",
+    "src.inline_cache",
+    "src.inline_scanner",
+    "src.markdown_blocks",
+    "src.markdown_to_html",
+    "src.split_node",
+    "src.text_to_node",
+    "src.textnode",
+)
+
+# Bumped when the serialized form below changes
+FORMAT_VERSION = 1
+
+CACHE_SUFFIX = ".tree"
+
+_parser_version = None
+
+
+def parser_version():
+    """
+    Returns a digest of the parser's source code.
+
+    Returns:
+        str: Hex digest covering PARSER_MODULES and the cache format.
+    """
+    global _parser_version
+    if _parser_version is None:
+        digest = hashlib.sha256(f"format {FORMAT_VERSION}".encode("utf-8"))
+        for name in PARSER_MODULES:
+            with open(importlib.import_module(name).__file__, 'rb') as f:
+                digest.update(f.read())
+        _parser_version = digest.hexdigest()
+    return _parser_version
+
+
+def encode_tree(node):
+    """
+    Flattens a node tree into a list of (tag, value, props, child count)
+    records in post-order, which marshal can serialize without recursing.
+
+    Args:
+        node (HTMLNode or None): Root of the tree.
+
+    Returns:
+        list: The records; leaves have a child count of -1.
+    """
+    records = []
+    stack = [node] if node is not None else []
+    while stack:
+        current = stack.pop()
+        if isinstance(current, ParentNode):
+            records.append((current.tag, None, current.props, len(current.children)))
+            stack.extend(current.children)
+        else:
+            records.append((current.tag, current.value, current.props, -1))
+    # Children were pushed left to right, so the reversed pre-order visits
+    # every child before its parent, in document order
+    records.reverse()
+    return records
+
+
+def decode_tree(records):
+    """
+    Rebuilds a node tree from the records of encode_tree.
+
+    Args:
+        records (list): The records.
+
+    Returns:
+        HTMLNode or None: Root of the tree.
+    """
+    stack = []
+    for tag, value, props, count in records:
+        if count < 0:
+            stack.append(LeafNode(value, tag, props))
+        else:
+            children = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            stack.append(ParentNode(tag, children, props))
+    return stack[0] if stack else None
+
+
+class ParseCache:
+    """
+    An on-disk cache of the node trees built from markdown sources.
+
+    Trees are keyed by the hash of their source and the parser version, so
+    entries written by another version of the parser are never used (and
+    are evicted first). The cache is bounded in size; reading an entry
+    refreshes its modification time and the least recently used entries
+    are evicted first.
+
+    Attributes:
+        directory (str): Directory holding the cache entries.
+        max_bytes (int): Size above which entries are evicted.
+        version (str): The parser version entries are keyed by.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        """
+        Initialize a ParseCache.
+
+        Args:
+            directory (str): Directory holding the cache entries.
+            max_bytes (int, optional): Size above which entries are evicted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = parser_version()
+
+    def _path(self, source_hash):
+        return os.path.join(self.directory, f"{source_hash}-{self.version[:16]}{CACHE_SUFFIX}")
+
+    @staticmethod
+    def source_hash(markdown):
+        """
+        Returns the key of a markdown source.
+
+        Args:
+            markdown (str): The source text.
+
+        Returns:
+            str: Hex digest of the source.
+        """
+        return hashlib.sha256(markdown.encode("utf-8")).hexdigest()
+
+    def get(self, source_hash):
+        """
+        Looks up the tree built from a source.
+
+        Args:
+            source_hash (str): Hash of the source, see source_hash().
+
+        Returns:
+            tuple: (hit, tree) where hit tells whether the tree was cached.
+        """
+        path = self._path(source_hash)
+        try:
+            with open(path, 'rb') as f:
+                records = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return False, None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True, decode_tree(records)
+
+    def put(self, source_hash, node):
+        """
+        Stores the tree built from a source.
+
+        Args:
+            source_hash (str): Hash of the source, see source_hash().
+            node (HTMLNode or None): The tree.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with atomic_write(self._path(source_hash), 'wb') as f:
+            marshal.dump(encode_tree(node), f)
+
+    def evict(self):
+        """
+        Deletes entries of other parser versions, then the least recently
+        used entries until the cache fits in max_bytes.
+
+        Returns:
+            int: Number of deleted entries.
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        suffix = f"-{self.version[:16]}{CACHE_SUFFIX}"
+        entries = []
+        stale = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.is_file():
+                    continue
+                if entry.name.endswith(suffix):
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                else:
+                    stale.append(entry.path)
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            stale.append(path)
+            total -= size
+        for path in stale:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        if stale:
+            logging.getLogger(__name__).info(f"Evicted {len(stale)} parse cache entries")
+        return len(stale)
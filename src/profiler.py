@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Shared no-op context returned while profiling is disabled
+_NULL_SPAN = nullcontext()
+
+_active_profiler = None
+
+
+class Profiler:
+    """
+    Records timed build spans and exports them as Chrome trace events.
+
+    Spans are complete ("X") trace events. Phases that run many times per
+    page, such as inline parsing, are accumulated instead of recorded one by
+    one, and attached to the enclosing page span, which keeps traces of large
+    sites to a manageable size.
+
+    Attributes:
+        events (list): Recorded trace events, as dicts.
+        totals (dict): Maps accumulated phase names to [calls, total ns].
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty Profiler.
+        """
+        self.events = []
+        self.totals = {}
+        self._page_totals = None
+
+    @contextmanager
+    def span(self, name, category="build", **args):
+        """
+        Time a block of code as one trace event.
+
+        Args:
+            name (str): Name of the span, e.g. "read" or "serialization".
+            category (str, optional): Trace event category.
+            **args: Extra data stored with the event.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter_ns()
+            self.events.append({
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": start / 1000,
+                "dur": (end - start) / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    @contextmanager
+    def page(self, path):
+        """
+        Time the generation of one page.
+
+        Accumulated phases recorded while the page is generated are attached
+        to the page span as "<phase> ms" arguments.
+
+        Args:
+            path (str): The page's source path.
+        """
+        self._page_totals = {}
+        with self.span("page", category="page", path=path) as args:
+            try:
+                yield
+            finally:
+                for name, ns in self._page_totals.items():
+                    args[f"{name} ms"] = ns / 1e6
+                self._page_totals = None
+
+    @contextmanager
+    def accumulate(self, name):
+        """
+        Time a frequently repeated phase without recording a trace event.
+
+        Args:
+            name (str): Name of the phase.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            total = self.totals.setdefault(name, [0, 0])
+            total[0] += 1
+            total[1] += elapsed
+            if self._page_totals is not None:
+                self._page_totals[name] = self._page_totals.get(name, 0) + elapsed
+
+    def drain(self):
+        """
+        Remove and return everything recorded so far, e.g. to send it from a
+        worker process to the parent.
+
+        Returns:
+            tuple: (events, totals).
+        """
+        events, totals = self.events, self.totals
+        self.events, self.totals = [], {}
+        return events, totals
+
+    def merge(self, events, totals):
+        """
+        Add events and accumulated totals recorded by another profiler.
+
+        Args:
+            events (list): Trace events.
+            totals (dict): Accumulated phase totals.
+        """
+        self.events.extend(events)
+        for name, (calls, ns) in totals.items():
+            total = self.totals.setdefault(name, [0, 0])
+            total[0] += calls
+            total[1] += ns
+
+    def write_chrome_trace(self, path):
+        """
+        Write the recorded spans in Chrome trace-event JSON format, which can
+        be opened in chrome://tracing or https://ui.perfetto.dev.
+
+        Args:
+            path (str): Destination of the trace file.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def summary(self, top=10):
+        """
+        Build a text report of the slowest phases and pages.
+
+        Args:
+            top (int, optional): Number of slowest pages to list.
+
+        Returns:
+            str: The report.
+        """
+        phases = {}
+        for event in self.events:
+            if event["name"] == "page":
+                continue
+            calls, total = phases.get(event["name"], (0, 0.0))
+            phases[event["name"]] = (calls + 1, total + event["dur"] / 1000)
+        for name, (calls, ns) in self.totals.items():
+            phases[name] = (calls, ns / 1e6)
+
+        lines = [f"{'phase':<24}{'calls':>10}{'total ms':>14}{'mean ms':>12}"]
+        for name, (calls, total) in sorted(phases.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<24}{calls:>10}{total:>14.2f}{total / calls:>12.3f}")
+
+        pages = sorted((e for e in self.events if e["name"] == "page"), key=lambda e: -e["dur"])
+        if pages:
+            lines.append("")
+            lines.append(f"{'slowest pages':<60}{'ms':>14}")
+            for event in pages[:top]:
+                lines.append(f"{event['args'].get('path', '?'):<60}{event['dur'] / 1000:>14.2f}")
+        return "\n".join(lines)
+
+
+def get_profiler():
+    """
+    Returns the profiler recording this process's spans, if any.
+
+    Returns:
+        Profiler or None: The active profiler.
+    """
+    return _active_profiler
+
+
+def set_profiler(profiler):
+    """
+    Sets (or with None, clears) the profiler recording this process's spans.
+
+    Args:
+        profiler (Profiler or None): The profiler to activate.
+    """
+    global _active_profiler
+    _active_profiler = profiler
+
+
+def span(name, **args):
+    """
+    Time a block with the active profiler; does nothing when profiling is off.
+
+    Args:
+        name (str): Name of the span.
+        **args: Extra data stored with the event.
+
+    Returns:
+        A context manager.
+    """
+    if _active_profiler is None:
+        return _NULL_SPAN
+    return _active_profiler.span(name, **args)
+
+
+def page(path):
+    """
+    Time the generation of a page with the active profiler; does nothing
+    when profiling is off.
+
+    Args:
+        path (str): The page's source path.
+
+    Returns:
+        A context manager.
+    """
+    if _active_profiler is None:
+        return _NULL_SPAN
+    return _active_profiler.page(path)
+
+
+def accumulate(name):
+    """
+    Accumulate a repeated phase with the active profiler; does nothing when
+    profiling is off.
+
+    Args:
+        name (str): Name of the phase.
+
+    Returns:
+        A context manager.
+    """
+    if _active_profiler is None:
+        return _NULL_SPAN
+    return _active_profiler.accumulate(name)
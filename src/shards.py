@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import os
+import shutil
+from src.build_manifest import hash_file, load_manifest, save_manifest
+from src.copy_directory import scan_files
+from src.staging import StagedBuild
+
+# Layout of a shard directory, as written by a sharded build
+SHARD_PUBLIC = "public"
+SHARD_MANIFEST = "manifest.json"
+
+
+class ShardMergeError(Exception):
+    """
+    Raised when shard outputs cannot be merged.
+
+    Attributes:
+        problems (list): Descriptions of the problems found, in path order.
+    """
+
+    def __init__(self, problems):
+        self.problems = problems
+        details = "\n".join(f"  {problem}" for problem in problems)
+        super().__init__(f"Cannot merge shards, {len(problems)} problem(s) found:\n{details}")
+
+
+def parse_shard(text):
+    """
+    Parses a shard specification of the form "i/N", with 1 <= i <= N.
+
+    Args:
+        text (str): The specification, e.g. "2/4".
+
+    Returns:
+        tuple: (index, count) with a zero-based index.
+
+    Raises:
+        ValueError: If the specification is malformed or out of range.
+    """
+    index, separator, count = text.partition("/")
+    if not separator or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"Invalid shard {text!r}, expected i/N")
+    index, count = int(index), int(count)
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {text!r}, i must be between 1 and N")
+    return index - 1, count
+
+
+def shard_of(key, count):
+    """
+    Assigns a page to a shard.
+
+    The assignment only depends on the page's relative path, so it is the
+    same on every machine and in every build.
+
+    Args:
+        key (str): Relative path of the page source, using "/" separators.
+        count (int): Number of shards.
+
+    Returns:
+        int: The zero-based shard index.
+    """
+    return int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big") % count
+
+
+def shard_dir_name(shard):
+    """
+    Names the directory of a shard's outputs.
+
+    Args:
+        shard (tuple): (index, count) with a zero-based index.
+
+    Returns:
+        str: e.g. "2-of-4" for the second of four shards.
+    """
+    index, count = shard
+    return f"{index + 1}-of-{count}"
+
+
+def _merge_manifests(manifests):
+    """
+    Combines the manifests of all shards into the manifest of a full build.
+
+    Page entries and other dictionaries are united; lists (such as the
+    synced static files) are united and sorted; anything else is taken from
+    the first shard that has it.
+
+    Args:
+        manifests (list): Shard manifests ordered by shard index.
+
+    Returns:
+        dict: The merged manifest.
+    """
+    merged = {}
+    for manifest in manifests:
+        for key, value in manifest.items():
+            if key == "shard":
+                continue
+            if isinstance(value, dict):
+                merged.setdefault(key, {}).update(value)
+            elif isinstance(value, list):
+                merged[key] = sorted(set(merged.get(key, [])) | set(value))
+            else:
+                merged.setdefault(key, value)
+    return merged
+
+
+def merge_shards(shard_dirs, public_dir, manifest_path, keep_previous=False):
+    """
+    Merges the outputs of a sharded build into one site.
+
+    Verifies that the shards form one complete build (every shard of the
+    same partitioning is present exactly once and no page was built by two
+    shards) and that no output path collides, then hard links every file
+    into a staged generation and swaps it in with a merged manifest.
+    Files present in several shards (such as shared static assets) are
+    allowed if their contents are identical.
+
+    Args:
+        shard_dirs (list): Shard directories, each holding the public/ and
+            manifest.json of one shard.
+        public_dir (str): The live output directory.
+        manifest_path (str): The live build manifest.
+        keep_previous (bool, optional): Keep the replaced generation for
+            rollback.
+
+    Raises:
+        ShardMergeError: If the shards are incomplete or collide.
+    """
+    logger = logging.getLogger(__name__)
+    problems = []
+    manifests = {}
+    for shard_dir in sorted(shard_dirs):
+        manifest = load_manifest(os.path.join(shard_dir, SHARD_MANIFEST))
+        shard = tuple(manifest.get("shard") or ())
+        if len(shard) != 2:
+            problems.append(f"{shard_dir}: not the output of a sharded build")
+        elif shard in manifests:
+            problems.append(f"{shard_dir}: shard {shard_dir_name(shard)} given twice")
+        else:
+            manifests[shard] = (shard_dir, manifest)
+    counts = {count for _, count in manifests}
+    if len(counts) > 1:
+        problems.append(f"shards of different partitionings: {sorted(counts)}")
+    elif counts:
+        count = counts.pop()
+        missing = [shard_dir_name((index, count)) for index in range(count) if (index, count) not in manifests]
+        if missing:
+            problems.append(f"missing shards: {', '.join(missing)}")
+    if problems or not manifests:
+        raise ShardMergeError(problems or ["no shards given"])
+
+    ordered = [manifests[shard] for shard in sorted(manifests)]
+    owners = {}
+    for shard_dir, manifest in ordered:
+        for key in manifest["pages"]:
+            if key in owners:
+                problems.append(f"page {key} built by both {owners[key]} and {shard_dir}")
+            owners[key] = shard_dir
+
+    # Map every output path to the first shard file providing it
+    sources = {}
+    for shard_dir, _ in ordered:
+        root = os.path.join(shard_dir, SHARD_PUBLIC)
+        if not os.path.isdir(root):
+            problems.append(f"{shard_dir}: no {SHARD_PUBLIC}/ directory")
+            continue
+        for relative_path in scan_files(root):
+            path = os.path.join(root, relative_path)
+            other = sources.setdefault(relative_path, path)
+            if other != path and not _same_file(other, path):
+                problems.append(f"{relative_path} differs between {other} and {path}")
+    if problems:
+        raise ShardMergeError(sorted(problems))
+
+    staged = StagedBuild(public_dir, manifest_path)
+    staging_dir = staged.prepare(seed=False)
+    try:
+        for relative_path in sorted(sources):
+            target = os.path.join(staging_dir, relative_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.link(sources[relative_path], target)
+            except OSError:
+                shutil.copy2(sources[relative_path], target)
+        save_manifest(_merge_manifests([manifest for _, manifest in ordered]), staged.staging_manifest_path)
+    except BaseException:
+        staged.discard()
+        raise
+    staged.commit(keep_previous=keep_previous)
+    logger.info(f"Merged {len(ordered)} shards, {len(sources)} files into {public_dir}")
+
+
+def _same_file(a, b):
+    """
+    Tells whether two files have the same contents.
+
+    Args:
+        a (str): Path to a file.
+        b (str): Path to another file.
+
+    Returns:
+        bool: True if the contents are identical.
+    """
+    if os.path.samefile(a, b):
+        return True
+    return os.path.getsize(a) == os.path.getsize(b) and hash_file(a) == hash_file(b)
@@ -1,10 +1,14 @@
-from src.textnode import TextNode
+from src.textnode import TextNode, TextType
+from src.inline_scanner import iter_images, iter_links
 
 
 def split_nodes_delimiter(old_nodes, delimiter: str, text_type):
     """
     Splits TextNode objects based on a delimiter.
 
+    The new nodes are spans over the text of the split node (see
+    TextNode.from_span), so no text is copied.
+
     Args:
         old_nodes (list): List of TextNode objects.
         delimiter (str): The delimiter to split on.
@@ -14,25 +18,28 @@ def split_nodes_delimiter(old_nodes, delimiter: str, text_type):
         list: New list of TextNode objects after splitting.
     """
     new_nodes = []
-    delimiters_dict = {"**": "bold", "*": "italic", "`": "code"}
+    delimiters_dict = {"**": TextType.BOLD, "*": TextType.ITALIC, "`": TextType.CODE}
     if delimiter not in delimiters_dict:
         raise Exception("Invalid Markdown syntax utilized as delimiter.")
 
     for node in old_nodes:
-        if node.text_type != "text":
+        if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
 
-        parts = node.text.split(delimiter)
-
-        for i, text in enumerate(parts):
-            if text:
-                if text == "":
-                    continue
-                if i % 2 == 0:
-                    new_nodes.append(TextNode(text=text, text_type="text"))
-                else:
-                    new_nodes.append(TextNode(text=text, text_type=text_type))
+        # Same parts as node.text.split(delimiter), every other one inside
+        # the delimiters
+        source, position, stop = node.buffer()
+        inside = False
+        while True:
+            found = source.find(delimiter, position, stop)
+            part_end = stop if found == -1 else found
+            if part_end > position:
+                new_nodes.append(TextNode.from_span(source, position, part_end, text_type if inside else TextType.TEXT))
+            if found == -1:
+                break
+            position = found + len(delimiter)
+            inside = not inside
 
     return new_nodes
 
@@ -41,6 +48,10 @@ def split_nodes_image(old_nodes):
     """
     Splits TextNodes containing image markdown syntax.
 
+    Images are found by index scanning (see inline_scanner.iter_images), in
+    time linear in the length of the text. The new nodes are spans over the
+    text of the split node (see TextNode.from_span).
+
     Args:
         old_nodes (list): List of TextNode objects.
 
@@ -49,32 +60,22 @@ def split_nodes_image(old_nodes):
     """
     new_nodes = []
     for node in old_nodes:
-        if node.text_type != "text":
+        if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
 
-        parts = node.text.split("![")
-        if len(parts) == 1:
-            new_nodes.append(node)
-            continue
-
-        current_text = parts[0]
-        for part in parts[1:]:
-            if "](" not in part or ")" not in part.split("](")[1]:
-                current_text += "![" + part
-                continue
-
-            if current_text:
-                new_nodes.append(TextNode(current_text, "text"))
-                current_text = ""
-
-            image_text, remainder = part.split("](", 1)
-            image_url, rest = remainder.split(")", 1)
-            new_nodes.append(TextNode(image_text, "image", image_url))
-            current_text = rest
+        source, first, stop = node.buffer()
+        position = first
+        for start, middle, end in iter_images(source, first, stop):
+            if start > position:
+                new_nodes.append(TextNode.from_span(source, position, start, TextType.TEXT))
+            new_nodes.append(TextNode.from_span(source, start + 2, middle, TextType.IMAGE, source[middle + 2:end]))
+            position = end + 1
 
-        if current_text:
-            new_nodes.append(TextNode(current_text, "text"))
+        if position == first:
+            new_nodes.append(node)
+        elif position < stop:
+            new_nodes.append(TextNode.from_span(source, position, stop, TextType.TEXT))
 
     return new_nodes
 
@@ -83,6 +84,10 @@ def split_nodes_link(old_nodes):
     """
     Splits TextNodes containing link markdown syntax.
 
+    Links are found by index scanning (see inline_scanner.iter_links), in
+    time linear in the length of the text. The new nodes are spans over the
+    text of the split node (see TextNode.from_span).
+
     Args:
         old_nodes (list): List of TextNode objects.
 
@@ -91,49 +96,18 @@ def split_nodes_link(old_nodes):
     """
     new_nodes = []
     for node in old_nodes:
-        if node.text_type != "text":
+        if node.text_type != TextType.TEXT:
             new_nodes.append(node)
             continue
 
-        current_text = ""
-        remaining_text = node.text
-
-        while "[" in remaining_text:
-            parts = remaining_text.split("[", 1)
-            current_text += parts[0]
-            remaining_text = "[" + parts[1]
-
-            if remaining_text.startswith("[!"):  # This is an image, not a link
-                image_end = (
-                    remaining_text.find(")") + 1
-                    if ")" in remaining_text
-                    else len(remaining_text)
-                )
-                current_text += remaining_text[:image_end]
-                remaining_text = remaining_text[image_end:]
-                continue
-
-            if "](" not in remaining_text:
-                current_text += remaining_text
-                remaining_text = ""
-                break
-
-            link_text, remainder = remaining_text[1:].split("](", 1)
-            if ")" not in remainder:
-                current_text += remaining_text
-                remaining_text = ""
-                break
-
-            url, rest = remainder.split(")", 1)
-
-            if current_text:
-                new_nodes.append(TextNode(current_text, "text"))
-                current_text = ""
-
-            new_nodes.append(TextNode(link_text, "link", url))
-            remaining_text = rest
+        source, position, stop = node.buffer()
+        for start, middle, end in iter_links(source, position, stop):
+            if start > position:
+                new_nodes.append(TextNode.from_span(source, position, start, TextType.TEXT))
+            new_nodes.append(TextNode.from_span(source, start + 1, middle, TextType.LINK, source[middle + 2:end]))
+            position = end + 1
 
-        if current_text or remaining_text:
-            new_nodes.append(TextNode(current_text + remaining_text, "text"))
+        if position < stop:
+            new_nodes.append(TextNode.from_span(source, position, stop, TextType.TEXT))
 
     return new_nodes
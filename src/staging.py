@@ -0,0 +1,250 @@
+import ctypes
+import errno
+import os
+import shutil
+import logging
+import sys
+
+# renameat2() flag swapping two paths atomically (Linux 3.15+)
+RENAME_EXCHANGE = 2
+_AT_FDCWD = -100
+
+_renameat2 = None
+
+
+def _link_tree(src, dst):
+    """
+    Recreate a directory tree using hard links instead of copying file data.
+
+    Args:
+        src (str): Existing directory tree.
+        dst (str): Destination directory, created if missing.
+    """
+    for root, dirs, files in os.walk(src):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_root, exist_ok=True)
+        for file in files:
+            source = os.path.join(root, file)
+            target = os.path.join(target_root, file)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+
+
+def _replace_file(src, dst):
+    """
+    Move src over dst, or remove dst when src does not exist.
+
+    Args:
+        src (str): File to move.
+        dst (str): File to replace.
+    """
+    if os.path.exists(src):
+        os.replace(src, dst)
+    elif os.path.exists(dst):
+        os.remove(dst)
+
+
+def _exchange(a, b):
+    """
+    Atomically swap two existing paths with renameat2(RENAME_EXCHANGE).
+
+    Args:
+        a (str): A path.
+        b (str): Another path on the same filesystem.
+
+    Returns:
+        bool: True if the paths were swapped, False if the platform or
+        filesystem does not support atomic exchange.
+    """
+    global _renameat2
+    if _renameat2 is None:
+        _renameat2 = False
+        if sys.platform.startswith("linux"):
+            try:
+                _renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+            except (OSError, AttributeError):
+                pass
+    if not _renameat2:
+        return False
+    if _renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE) == 0:
+        return True
+    error = ctypes.get_errno()
+    if error in (errno.ENOSYS, errno.EINVAL):
+        return False
+    raise OSError(error, os.strerror(error), a, None, b)
+
+
+class StagedBuild:
+    """
+    Builds a new site generation next to the live output directory and swaps
+    it in when it is complete, so the web server never sees a missing or
+    half-written site.
+
+    The staging directory is seeded with hard links to the live generation,
+    which keeps incremental builds incremental without copying any data.
+    Everything that writes into the staging tree must therefore replace files
+    (write a new file and rename it over the old one) rather than rewrite
+    them in place.
+
+    The build manifest follows its generation: the build updates a staging
+    copy, which only replaces the real manifest when the generation is
+    swapped in, and which is kept alongside the previous generation so a
+    rollback restores a matching manifest.
+
+    Generations are swapped with an atomic exchange of directory entries
+    (renameat2 with RENAME_EXCHANGE), so public_dir exists at every
+    instant. Where that is unsupported, the live generation is moved aside
+    to swap_dir for the instant between two renames; if the process dies
+    there, the next StagedBuild operation moves it back.
+
+    Attributes:
+        public_dir (str): The live output directory.
+        staging_dir (str): Where the next generation is built.
+        previous_dir (str): Where the previous generation is kept for rollback.
+        swap_dir (str): Where the live generation waits during a
+            non-atomic swap.
+        manifest_path (str or None): The live build manifest.
+        staging_manifest_path (str or None): The manifest updated by the build.
+    """
+
+    def __init__(self, public_dir, manifest_path=None):
+        """
+        Initialize a StagedBuild.
+
+        Args:
+            public_dir (str): The live output directory.
+            manifest_path (str, optional): The build manifest of the live generation.
+        """
+        public_dir = os.path.normpath(public_dir)
+        self.public_dir = public_dir
+        self.staging_dir = f"{public_dir}.staging"
+        self.previous_dir = f"{public_dir}.previous"
+        self.swap_dir = f"{public_dir}.swap"
+        self.manifest_path = manifest_path
+        self.staging_manifest_path = f"{manifest_path}.staging" if manifest_path else None
+        self.previous_manifest_path = f"{manifest_path}.previous" if manifest_path else None
+
+    def prepare(self, seed=True):
+        """
+        Create a fresh staging directory.
+
+        Args:
+            seed (bool, optional): Start from the live generation (for
+                incremental builds) instead of an empty directory.
+
+        Returns:
+            str: The staging directory to build into.
+        """
+        logger = logging.getLogger(__name__)
+        self._recover()
+        if os.path.exists(self.staging_dir):
+            logger.info(f"Removing leftover staging directory: {self.staging_dir}")
+            shutil.rmtree(self.staging_dir)
+        if seed and os.path.isdir(self.public_dir):
+            _link_tree(self.public_dir, self.staging_dir)
+        else:
+            os.makedirs(self.staging_dir)
+
+        if self.manifest_path:
+            if seed and os.path.exists(self.manifest_path):
+                shutil.copyfile(self.manifest_path, self.staging_manifest_path)
+            elif os.path.exists(self.staging_manifest_path):
+                os.remove(self.staging_manifest_path)
+        return self.staging_dir
+
+    def commit(self, keep_previous=False):
+        """
+        Swap the staging directory in as the live output directory.
+
+        The swap only renames entries within the same parent directory, so
+        it is a metadata-only operation regardless of the size of the site.
+
+        Args:
+            keep_previous (bool, optional): Keep the replaced generation in
+                previous_dir so it can be restored with rollback().
+        """
+        self._recover()
+        if os.path.exists(self.previous_dir):
+            shutil.rmtree(self.previous_dir)
+        self._swap_in(self.staging_dir, self.previous_dir)
+
+        if self.manifest_path:
+            if keep_previous:
+                _replace_file(self.manifest_path, self.previous_manifest_path)
+            _replace_file(self.staging_manifest_path, self.manifest_path)
+
+        if not keep_previous:
+            if os.path.exists(self.previous_dir):
+                shutil.rmtree(self.previous_dir)
+            if self.previous_manifest_path and os.path.exists(self.previous_manifest_path):
+                os.remove(self.previous_manifest_path)
+
+    def discard(self):
+        """
+        Throw away the staging directory and its manifest.
+        """
+        if os.path.exists(self.staging_dir):
+            shutil.rmtree(self.staging_dir)
+        if self.staging_manifest_path and os.path.exists(self.staging_manifest_path):
+            os.remove(self.staging_manifest_path)
+
+    def rollback(self):
+        """
+        Swap the previous generation back in.
+
+        The generation being replaced becomes the new previous generation,
+        so a rollback can itself be undone by rolling back again.
+
+        Raises:
+            FileNotFoundError: If no previous generation was kept.
+        """
+        self._recover()
+        if not os.path.isdir(self.previous_dir):
+            raise FileNotFoundError(f"No previous generation to roll back to: {self.previous_dir}")
+        self._swap_in(self.previous_dir, self.previous_dir)
+
+        if self.manifest_path:
+            swap_manifest = f"{self.manifest_path}.rollback"
+            _replace_file(self.manifest_path, swap_manifest)
+            _replace_file(self.previous_manifest_path, self.manifest_path)
+            _replace_file(swap_manifest, self.previous_manifest_path)
+
+    def _swap_in(self, new_dir, old_dir):
+        """
+        Make new_dir the live generation and move the replaced one to
+        old_dir, which must not exist unless it is new_dir itself.
+
+        Args:
+            new_dir (str): The generation to swap in.
+            old_dir (str): Where the replaced generation goes.
+        """
+        if not os.path.exists(self.public_dir):
+            os.rename(new_dir, self.public_dir)
+            return
+        if _exchange(new_dir, self.public_dir):
+            # new_dir now holds the replaced generation
+            if new_dir != old_dir:
+                os.rename(new_dir, old_dir)
+            return
+        os.rename(self.public_dir, self.swap_dir)
+        os.rename(new_dir, self.public_dir)
+        os.rename(self.swap_dir, old_dir)
+
+    def _recover(self):
+        """
+        Finish a non-atomic swap that was interrupted: put the live
+        generation back if public_dir is missing, or else file the replaced
+        generation as the previous one.
+        """
+        if not os.path.isdir(self.swap_dir):
+            return
+        logger = logging.getLogger(__name__)
+        if not os.path.exists(self.public_dir):
+            logger.warning(f"Restoring {self.public_dir} from an interrupted swap")
+            os.rename(self.swap_dir, self.public_dir)
+        elif not os.path.exists(self.previous_dir):
+            os.rename(self.swap_dir, self.previous_dir)
+        else:
+            shutil.rmtree(self.swap_dir)
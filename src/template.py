@@ -0,0 +1,160 @@
+import hashlib
+import re
+from src.minify import HTMLMinifier, minify_html
+
+# A slot is an identifier wrapped in double braces, e.g. "{{ Title }}" or
+# "{{Content}}". Anything else, including lone braces, is literal text.
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+# Slots every page provides; any other slot without a value is left in the
+# output as it was written, as plain text replacement used to
+REQUIRED_SLOTS = ("Title", "Content")
+
+
+class Template:
+    """
+    An HTML template compiled into literal segments and named slots.
+
+    The template is split once when it is created; rendering only
+    concatenates the literal segments with the slot values, so values are
+    never re-scanned for placeholders (a page whose content contains the
+    text "{{ Content }}" is rendered verbatim).
+
+    Attributes:
+        source (str): The original template text.
+        literals (tuple): Literal text segments; there is always one more
+            literal than there are slots.
+        slots (tuple): Slot names in the order they appear.
+        placeholders (tuple): The source text of each slot, e.g.
+            "{{ Title }}", rendered as is when the slot has no value.
+        minify (bool): Whether rendered documents are minified.
+        hash (str): SHA-256 hex digest of the template source and options.
+    """
+
+    def __init__(self, source, minify=False):
+        """
+        Compile a template from its source text.
+
+        Args:
+            source (str): The template text.
+            minify (bool, optional): Minify rendered documents, including
+                the slot values (see minify.HTMLMinifier).
+        """
+        self.source = source
+        self.minify = minify
+        literals = []
+        slots = []
+        placeholders = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            literals.append(source[position:match.start()])
+            slots.append(match.group(1))
+            placeholders.append(match.group())
+            position = match.end()
+        literals.append(source[position:])
+        self.literals = tuple(literals)
+        self.slots = tuple(slots)
+        self.placeholders = tuple(placeholders)
+        digest = hashlib.sha256(source.encode("utf-8"))
+        if minify:
+            digest.update(b"\0minify")
+        self.hash = digest.hexdigest()
+
+    @classmethod
+    def from_file(cls, path, minify=False):
+        """
+        Load and compile a template file.
+
+        Args:
+            path (str): Path to the template file.
+            minify (bool, optional): Minify rendered documents.
+
+        Returns:
+            Template: The compiled template.
+        """
+        with open(path, 'r') as template_file:
+            return cls(template_file.read(), minify)
+
+    def render(self, **values):
+        """
+        Render the template with the given slot values.
+
+        Args:
+            **values (str): Slot values. Slots without a value are rendered
+                as their placeholder text; values for slots the template
+                does not use are ignored.
+
+        Returns:
+            str: The rendered document.
+
+        Raises:
+            ValueError: If a slot of REQUIRED_SLOTS used by the template has
+                no value.
+        """
+        self._check_required(values)
+        parts = [self.literals[0]]
+        for slot, placeholder, literal in zip(self.slots, self.placeholders, self.literals[1:]):
+            parts.append(values.get(slot, placeholder))
+            parts.append(literal)
+        document = "".join(parts)
+        return minify_html(document) if self.minify else document
+
+    def write(self, fp, **values):
+        """
+        Render the template straight into a file-like object.
+
+        Slot values may be strings or nodes providing write_html(fp), which
+        are serialized in place without building the document in memory.
+        When minifying, the output is minified as it is streamed.
+
+        Args:
+            fp: Any object with a write(str) method.
+            **values (str or HTMLNode): Slot values, see render().
+
+        Raises:
+            ValueError: If a slot of REQUIRED_SLOTS used by the template has
+                no value.
+        """
+        self._check_required(values)
+        minifier = None
+        if self.minify:
+            fp = minifier = HTMLMinifier(fp)
+        fp.write(self.literals[0])
+        for slot, placeholder, literal in zip(self.slots, self.placeholders, self.literals[1:]):
+            value = values.get(slot, placeholder)
+            if hasattr(value, "write_html"):
+                value.write_html(fp)
+            else:
+                fp.write(value)
+            fp.write(literal)
+        if minifier is not None:
+            minifier.close()
+
+    def _check_required(self, values):
+        for slot in self.slots:
+            if slot in REQUIRED_SLOTS and slot not in values:
+                raise ValueError(f"Missing value for template slot: {slot}")
+
+    def __eq__(self, other):
+        """
+        Check if this template was compiled from the same source and with the
+        same options as another.
+
+        Args:
+            other (Template): Another Template to compare with.
+
+        Returns:
+            bool: True if both templates are the same, False otherwise.
+        """
+        if not isinstance(other, Template):
+            return False
+        return self.source == other.source and self.minify == other.minify
+
+    def __repr__(self):
+        """
+        Return a string representation of the template.
+
+        Returns:
+            str: String representation listing the template's slots.
+        """
+        return f"Template(slots={self.slots!r})"
@@ -1,6 +1,7 @@
-from src.textnode import TextNode
+from src.textnode import TextNode, TextType
 from src.split_node import split_nodes_image, split_nodes_link, split_nodes_delimiter
-from src.htmlnode import LeafNode, HTMLNode,ParentNode
+from src.inline_scanner import scan_inline
+from src.htmlnode import LeafNode, HTMLNode,ParentNode, Tag
 
 
 def text_to_textnodes(text):
@@ -13,22 +14,51 @@ def text_to_textnodes(text):
     Returns:
         list: List of TextNode objects.
     """
-    nodes = [TextNode(text, "text")]
+    return scan_inline(text)
+
+
+def text_to_textnodes_multipass(text):
+    """
+    Converts raw text to a list of TextNode objects by splitting it in one
+    pass per kind of node.
+
+    This is the reference for scan_inline, which produces the same nodes
+    in a single pass.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        list: List of TextNode objects.
+    """
+    nodes = [TextNode(text, TextType.TEXT)]
 
     nodes = split_nodes_image(nodes)
 
     nodes = split_nodes_link(nodes)
 
-    nodes = split_nodes_delimiter(nodes, "**", "bold")
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
 
-    nodes = split_nodes_delimiter(nodes, "*", "italic")
+    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
 
-    nodes = split_nodes_delimiter(nodes, "`", "code")
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
 
-    nodes = [node for node in nodes if node.text.strip() != ""]
+    nodes = [node for node in nodes if not node.is_blank()]
 
     return nodes
 
+# Builds the LeafNode of each text type
+LEAF_BUILDERS = {
+    TextType.TEXT: lambda node: LeafNode(node.text),
+    TextType.BOLD: lambda node: LeafNode(node.text, Tag.BOLD),
+    TextType.ITALIC: lambda node: LeafNode(node.text, Tag.ITALIC),
+    TextType.CODE: lambda node: LeafNode(node.text, Tag.CODE),
+    TextType.LINK: lambda node: LeafNode(node.text, Tag.LINK, {"href": node.url}),
+    TextType.IMAGE: lambda node: LeafNode("", Tag.IMAGE, {"src": node.url, "alt": node.text}),
+    TextType.UNORDERED_LIST: lambda node: LeafNode(node.text, Tag.LIST_ITEM),
+    TextType.ORDERED_LIST: lambda node: LeafNode(node.text, Tag.LIST_ITEM),
+}
+
 def text_node_to_leaf_node(text_node):
     """
     Converts a TextNode object into an HTML LeafNode.
@@ -39,23 +69,40 @@ def text_node_to_leaf_node(text_node):
     Raises:
         Exception: If an unknown text type is encountered.
     """
-    if text_node.text_type == "text":
-        return LeafNode(value=text_node.text)
-    elif text_node.text_type == "bold":
-        return LeafNode(value=text_node.text, tag="b")
-    elif text_node.text_type == "italic":
-        return LeafNode(value=text_node.text, tag="i")
-    elif text_node.text_type == "code":
-        return LeafNode(value=text_node.text, tag="code")
-    elif text_node.text_type == "link":
-        return LeafNode(value=text_node.text, tag="a", props={"href": text_node.url})
-    elif text_node.text_type == "image":
-        return LeafNode(
-            value="", tag="img", props={"src": text_node.url, "alt": text_node.text}
-        )
-    elif text_node.text_type == "unordered_list":
-        return LeafNode(value=text_node.text, tag="li")
-    elif text_node.text_type == "ordered_list":
-        return LeafNode(value=text_node.text, tag="li")
-    else:
-        raise Exception(f"Unknown text type: {text_node.text_type}")
+    build = LEAF_BUILDERS.get(text_node.text_type)
+    if build is None:
+        raise _unknown_text_type(text_node)
+    return build(text_node)
+
+# Renders each text type as HTML, like the LeafNode of LEAF_BUILDERS
+HTML_RENDERERS = {
+    TextType.TEXT: lambda node: node.text,
+    TextType.BOLD: lambda node: f"<b>{node.text}</b>",
+    TextType.ITALIC: lambda node: f"<i>{node.text}</i>",
+    TextType.CODE: lambda node: f"<code>{node.text}</code>",
+    TextType.LINK: lambda node: f'<a href="{node.url}">{node.text}</a>',
+    TextType.IMAGE: lambda node: f'<img src="{node.url}" alt="{node.text}"></img>',
+    TextType.UNORDERED_LIST: lambda node: f"<li>{node.text}</li>",
+    TextType.ORDERED_LIST: lambda node: f"<li>{node.text}</li>",
+}
+
+def text_node_to_html(text_node):
+    """
+    Renders a TextNode object as HTML, without building its LeafNode.
+    Args:
+        text_node (TextNode): The TextNode to render.
+    Returns:
+        str: The same HTML as text_node_to_leaf_node(text_node).to_html().
+    Raises:
+        Exception: If an unknown text type is encountered.
+    """
+    render = HTML_RENDERERS.get(text_node.text_type)
+    if render is None:
+        raise _unknown_text_type(text_node)
+    return render(text_node)
+
+def _unknown_text_type(text_node):
+    if text_node.source is not None:
+        return Exception(f"Unknown text type: {text_node.text_type} "
+                         f"at characters {text_node.start}-{text_node.end} of the source text")
+    return Exception(f"Unknown text type: {text_node.text_type}")
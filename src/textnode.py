@@ -1,3 +1,26 @@
+import re
+
+# Finds a character that str.strip() would keep
+NON_BLANK = re.compile(r"\S")
+
+
+class TextType:
+    """
+    The text types of a TextNode.
+
+    The constants are the plain (interned) strings used throughout, so
+    TextType.BOLD == "bold" and either can be used.
+    """
+    TEXT = "text"
+    BOLD = "bold"
+    ITALIC = "italic"
+    CODE = "code"
+    LINK = "link"
+    IMAGE = "image"
+    UNORDERED_LIST = "unordered_list"
+    ORDERED_LIST = "ordered_list"
+
+
 class TextNode:
     """
     Represents a node of text with associated type and optional URL.
@@ -5,12 +28,22 @@ class TextNode:
     This class is used to store and manipulate text content, its type,
     and an optional URL for links or images.
 
+    A node can also be a span over a source text (see from_span): its text
+    is only sliced out of the source when first read, so splitting a text
+    into nodes does not copy it, and the node keeps its position in the
+    source for error messages.
+
     Attributes:
         text (str): The text content of the node.
         text_type (str): The type of text contained in the node (e.g., 'bold', 'italic', 'link').
         url (str, optional): The URL associated with the node, used for links or images.
+        source (str or None): The text a span node points into, None for other nodes.
+        start (int or None): Offset of the node's text in source.
+        end (int or None): Offset of the end of the node's text in source.
     """
 
+    __slots__ = ("_text", "text_type", "url", "source", "start", "end")
+
     def __init__(self, text, text_type, url=None):
         """
         Initialize a TextNode instance.
@@ -20,9 +53,68 @@ class TextNode:
             text_type (str): The type of text contained in the node.
             url (str, optional): The URL associated with the node. Defaults to None.
         """
-        self.text = text
+        self._text = text
         self.text_type = text_type
         self.url = url
+        self.source = self.start = self.end = None
+
+    @classmethod
+    def from_span(cls, source, start, end, text_type, url=None):
+        """
+        Create a TextNode whose text is source[start:end], without copying it.
+
+        Args:
+            source (str): The text the node points into.
+            start (int): Offset of the node's text in source.
+            end (int): Offset of the end of the node's text in source.
+            text_type (str): The type of text contained in the node.
+            url (str, optional): The URL associated with the node. Defaults to None.
+
+        Returns:
+            TextNode: The span node.
+        """
+        node = cls.__new__(cls)
+        node._text = None
+        node.text_type = text_type
+        node.url = url
+        node.source = source
+        node.start = start
+        node.end = end
+        return node
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.source[self.start:self.end]
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        self._text = text
+        self.source = self.start = self.end = None
+
+    def buffer(self):
+        """
+        Return the node's text as a range of a string, without copying it.
+
+        Returns:
+            tuple: (source, start, end) such that source[start:end] is the
+            text; for a node that is not a span, source is the text itself.
+        """
+        if self.source is None:
+            return self._text, 0, len(self._text)
+        return self.source, self.start, self.end
+
+    def is_blank(self):
+        """
+        Tell whether the node's text is empty or only whitespace, without
+        materializing it.
+
+        Returns:
+            bool: True if text.strip() is empty.
+        """
+        source, start, end = self.buffer()
+        return NON_BLANK.search(source, start, end) is None
 
     def __eq__(self, other):
         """
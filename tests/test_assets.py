@@ -0,0 +1,190 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import build_manifest, page_generator
+from src.assets import (
+    AssetRewriter,
+    fingerprint_assets,
+    fingerprint_path,
+    hash_assets,
+    rewrite_asset_urls,
+    rewrite_css_urls,
+    rewrite_html_urls,
+    rewrite_url,
+)
+from src.copy_directory import sync_directory
+from src.markdown_to_html import markdown_to_html_node
+from src.page_generator import generate_pages_recursive
+
+ASSETS = {"index.css": "index.0123abcd.css", "images/logo.png": "images/logo.4567cdef.png"}
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_fingerprint_path(self):
+        self.assertEqual(fingerprint_path("index.css", "0123abcd99"), "index.0123abcd.css")
+        self.assertEqual(fingerprint_path("images/a.min.js", "0123abcd99"), "images/a.min.0123abcd.js")
+        self.assertEqual(fingerprint_path("fonts/LICENSE", "0123abcd99"), "fonts/LICENSE.0123abcd")
+
+    def test_fingerprint_assets(self):
+        with tempfile.TemporaryDirectory() as static:
+            os.makedirs(os.path.join(static, "images"))
+            for name in ("index.css", "images/logo.png", "robots.txt"):
+                with open(os.path.join(static, name), 'w') as f:
+                    f.write(name)
+            hashes = hash_assets(static)
+            assets = fingerprint_assets(hashes)
+            self.assertEqual(sorted(assets), ["images/logo.png", "index.css"])
+            self.assertRegex(assets["index.css"], r"^index\.[0-9a-f]{8}\.css$")
+
+            # Unchanged files are not hashed again
+            with mock.patch.object(build_manifest, "hash_file") as hash_file:
+                self.assertEqual(fingerprint_assets(hash_assets(static, hashes)), assets)
+            hash_file.assert_not_called()
+
+            with open(os.path.join(static, "index.css"), 'w') as f:
+                f.write("body {}")
+            changed = fingerprint_assets(hash_assets(static, hashes))
+            self.assertNotEqual(changed["index.css"], assets["index.css"])
+            self.assertEqual(changed["images/logo.png"], assets["images/logo.png"])
+
+    def test_sync_with_fingerprinted_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            public = os.path.join(tmp, "public")
+            os.makedirs(static)
+            with open(os.path.join(static, "index.css"), 'w') as f:
+                f.write("body {}")
+            first = fingerprint_assets(hash_assets(static))
+            synced = sync_directory(static, public, rename=first)
+            self.assertEqual(synced, [first["index.css"]])
+
+            with open(os.path.join(static, "index.css"), 'w') as f:
+                f.write("body { margin: 0 }")
+            second = fingerprint_assets(hash_assets(static))
+            sync_directory(static, public, synced, rename=second)
+            self.assertEqual(os.listdir(public), [second["index.css"]])
+
+    def test_stylesheets_follow_their_references(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            static = os.path.join(tmp, "static")
+            public = os.path.join(tmp, "public")
+            os.makedirs(os.path.join(static, "css"))
+            os.makedirs(os.path.join(static, "fonts"))
+            files = {
+                "css/site.css": '@import "theme.css";\n@import url(theme.css);\nbody { background: url(/images/bg.png) }',
+                "css/theme.css": "@font-face { src: url('../fonts/a.woff2?v=1') }",
+                "fonts/a.woff2": "font",
+            }
+            for name, text in files.items():
+                with open(os.path.join(static, name), 'w') as f:
+                    f.write(text)
+            first = fingerprint_assets(hash_assets(static), static)
+            theme = first["css/theme.css"].rpartition("/")[2]
+            font = first["fonts/a.woff2"].rpartition("/")[2]
+
+            transforms = {path: lambda text, path=path: rewrite_css_urls(text, first, path)
+                          for path in first if path.endswith(".css")}
+            sync_directory(static, public, rename=first, transforms=transforms)
+            with open(os.path.join(public, first["css/theme.css"])) as f:
+                self.assertEqual(f.read(), f"@font-face {{ src: url('../fonts/{font}?v=1') }}")
+            with open(os.path.join(public, first["css/site.css"])) as f:
+                self.assertEqual(f.read(), f'@import "{theme}";\n@import url({theme});\n'
+                                           'body { background: url(/images/bg.png) }')
+
+            # A changed font renames the stylesheets referencing it, directly or not
+            with open(os.path.join(static, "fonts/a.woff2"), 'w') as f:
+                f.write("new font")
+            second = fingerprint_assets(hash_assets(static), static)
+            for path in files:
+                self.assertNotEqual(second[path], first[path], path)
+
+
+class TestRewrite(unittest.TestCase):
+
+    def test_rewrite_url(self):
+        self.assertEqual(rewrite_url("/index.css", ASSETS), "/index.0123abcd.css")
+        self.assertEqual(rewrite_url("/images/logo.png?v=2#top", ASSETS), "/images/logo.4567cdef.png?v=2#top")
+        self.assertEqual(rewrite_url("/majesty", ASSETS), "/majesty")
+        self.assertEqual(rewrite_url("//cdn.example.com/index.css", ASSETS), "//cdn.example.com/index.css")
+        self.assertEqual(rewrite_url("https://example.com/index.css", ASSETS), "https://example.com/index.css")
+
+    def test_rewrite_css_urls(self):
+        assets = dict(ASSETS, **{"css/theme.css": "css/theme.89abcdef.css"})
+        css = ('a { b: url(/images/logo.png) } c { d: url( "../images/logo.png#x" ) } '
+               "e { f: URL('theme.css?v=1') } g { h: url(data:image/png;base64,AA==) } "
+               "i { j: url(https://example.com/index.css) } k { l: url(../../index.css) }")
+        self.assertEqual(
+            rewrite_css_urls(css, assets, "css/site.css"),
+            'a { b: url(/images/logo.4567cdef.png) } c { d: url( "../images/logo.4567cdef.png#x" ) } '
+            "e { f: URL('theme.89abcdef.css?v=1') } g { h: url(data:image/png;base64,AA==) } "
+            "i { j: url(https://example.com/index.css) } k { l: url(../../index.css) }",
+        )
+
+    def test_rewrite_html_urls(self):
+        html = '<link rel="stylesheet" href="/index.css"><a href="/">home</a><img src="/images/logo.png" alt="">'
+        self.assertEqual(
+            rewrite_html_urls(html, ASSETS),
+            '<link rel="stylesheet" href="/index.0123abcd.css"><a href="/">home</a>'
+            '<img src="/images/logo.4567cdef.png" alt="">',
+        )
+
+    def test_rewrite_asset_urls(self):
+        node = markdown_to_html_node("![logo](/images/logo.png)\n\n* [style](/index.css) and [home](/)")
+        rewrite_asset_urls(node, ASSETS)
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><img src="/images/logo.4567cdef.png" alt="logo"></img></p>'
+            '<ul><li><a href="/index.0123abcd.css">style</a> and <a href="/">home</a></li></ul></div>',
+        )
+
+
+class TestFingerprintedBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, "manifest.json")
+        self.bodies = os.path.join(root, "bodies")
+        os.makedirs(self.content)
+        with open(self.template, 'w') as f:
+            f.write('<link href="/index.css">{{ Content }}')
+        with open(os.path.join(self.content, "index.md"), 'w') as f:
+            f.write("# Home\n\n![logo](/images/logo.png)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, assets):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, self.manifest,
+                                     body_cache_dir=self.bodies,
+                                     assets=AssetRewriter(assets) if assets is not None else None)
+        with open(os.path.join(self.public, "index.html")) as f:
+            return f.read()
+
+    def test_template_and_pages_are_rewritten(self):
+        self.assertEqual(
+            self.build(ASSETS),
+            '<link href="/index.0123abcd.css"><div><h1>Home</h1>'
+            '<p><img src="/images/logo.4567cdef.png" alt="logo"></img></p></div>',
+        )
+
+    def test_changed_fingerprints_rewrap_cached_bodies(self):
+        self.build(ASSETS)
+        changed = dict(ASSETS, **{"images/logo.png": "images/logo.89abcdef.png"})
+        with mock.patch.object(page_generator, "markdown_to_html_node") as parse:
+            self.assertIn('src="/images/logo.89abcdef.png"', self.build(changed))
+        parse.assert_not_called()
+        self.assertIn('src="/images/logo.png"', self.build(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
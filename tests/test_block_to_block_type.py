@@ -1,5 +1,5 @@
 import unittest
-from src.markdown_blocks import block_to_block_type
+from src.markdown_blocks import BlockType, block_to_block_type
 
 class TestBlockToBlockType(unittest.TestCase):
 
@@ -41,5 +41,9 @@ class TestBlockToBlockType(unittest.TestCase):
         block = "This is a paragraph with a # symbol."
         self.assertEqual(block_to_block_type(block), "paragraph")
 
+    def test_block_types_are_the_plain_strings(self):
+        self.assertEqual(block_to_block_type("- a\n- b"), BlockType.UNORDERED_LIST)
+        self.assertEqual(BlockType.UNORDERED_LIST, "unordered_list")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,79 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import compress
+from src.compress import compress_file, precompress_directory, remove_compressed
+
+
+class TestPrecompress(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "blog"))
+        self.write("index.html", "<p>home</p>" * 100)
+        self.write("blog/post.html", "<p>post</p>")
+        self.write("index.css", "body {}")
+        self.write("logo.png", "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, relative_path, text):
+        with open(os.path.join(self.root, relative_path), 'w') as f:
+            f.write(text)
+
+    def compress(self, hashes=None, workers=4):
+        with mock.patch.object(compress, "compress_file", wraps=compress.compress_file) as spy:
+            hashes = precompress_directory(self.root, hashes, workers=workers)
+        compressed = sorted(os.path.relpath(call.args[0], self.root) for call in spy.call_args_list)
+        return hashes, compressed
+
+    def test_compress_file_is_deterministic(self):
+        path = os.path.join(self.root, "index.html")
+        compress_file(path)
+        with open(path + ".gz", 'rb') as f:
+            first = f.read()
+        compress_file(path)
+        with open(path + ".gz", 'rb') as f:
+            self.assertEqual(f.read(), first)
+        self.assertEqual(gzip.decompress(first), b"<p>home</p>" * 100)
+
+    def test_text_files_are_compressed(self):
+        hashes, compressed = self.compress()
+        self.assertEqual(compressed, [os.path.join("blog", "post.html"), "index.css", "index.html"])
+        self.assertEqual(sorted(hashes), ["blog/post.html", "index.css", "index.html"])
+        self.assertFalse(os.path.exists(os.path.join(self.root, "logo.png.gz")))
+
+    def test_unchanged_files_are_skipped(self):
+        hashes, _ = self.compress()
+        self.write("index.css", "body { margin: 0 }")
+        hashes, compressed = self.compress(hashes)
+        self.assertEqual(compressed, ["index.css"])
+        with gzip.open(os.path.join(self.root, "index.css.gz"), 'rt') as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+        self.assertEqual(self.compress(hashes)[1], [])
+
+    def test_missing_sibling_is_rewritten(self):
+        hashes, _ = self.compress()
+        os.remove(os.path.join(self.root, "index.css.gz"))
+        self.assertEqual(self.compress(hashes, workers=1)[1], ["index.css"])
+
+    def test_stale_siblings_are_removed(self):
+        self.write("archive.tar.gz", "not ours")
+        hashes, _ = self.compress()
+        os.remove(os.path.join(self.root, "blog", "post.html"))
+        hashes, _ = self.compress(hashes)
+        self.assertFalse(os.path.exists(os.path.join(self.root, "blog", "post.html.gz")))
+        self.assertTrue(os.path.exists(os.path.join(self.root, "archive.tar.gz")))
+
+        remove_compressed(self.root, hashes)
+        self.assertEqual(sorted(os.listdir(self.root)), ["archive.tar.gz", "blog", "index.css", "index.html",
+                                                         "logo.png"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks.corpus import CorpusSpec, generate_markdown, generate_site
+from src.markdown_blocks import block_to_block_type, markdown_to_blocks
+from src.markdown_to_html import markdown_to_html_node
+
+
+class TestCorpus(unittest.TestCase):
+
+    def test_generation_is_deterministic(self):
+        spec = CorpusSpec(seed=7)
+        self.assertEqual(generate_markdown(spec, 3), generate_markdown(CorpusSpec(seed=7), 3))
+        self.assertNotEqual(generate_markdown(spec, 3), generate_markdown(spec, 4))
+        self.assertNotEqual(generate_markdown(spec, 3), generate_markdown(CorpusSpec(seed=8), 3))
+
+    def test_page_size(self):
+        markdown = generate_markdown(CorpusSpec(page_size=10000))
+        self.assertGreaterEqual(len(markdown), 10000)
+        self.assertLess(len(markdown), 12000)
+
+    def test_block_mix(self):
+        spec = CorpusSpec(page_size=50000, list_ratio=0.3, code_ratio=0.2, link_density=0.1,
+                          image_density=0.1, emphasis_density=0.2)
+        markdown = generate_markdown(spec)
+        types = {block_to_block_type(block) for block in markdown_to_blocks(markdown)}
+        self.assertEqual(
+            types,
+            {"heading", "paragraph", "code", "quote", "unordered_list", "ordered_list"},
+        )
+        html = markdown_to_html_node(markdown).to_html()
+        for tag in ("<a ", "<img ", "<b>", "<i>", "<code>"):
+            self.assertIn(tag, html)
+
+    def test_generate_site(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            total = generate_site(CorpusSpec(pages=6, sections=2, page_size=500), tmp)
+            files = [os.path.join(root, f) for root, _, names in os.walk(tmp) for f in names]
+            self.assertEqual(len(files), 6)
+            self.assertEqual(sorted(os.listdir(tmp)), ["section0", "section1"])
+            self.assertEqual(total, sum(os.path.getsize(f) for f in files))
+
+
+if __name__ == '__main__':
+    unittest.main()
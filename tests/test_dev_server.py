@@ -0,0 +1,180 @@
+import os
+import struct
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+from src.dev_server import (
+    RELOAD_SCRIPT,
+    DirectoryWatcher,
+    ReloadNotifier,
+    SiteRebuilder,
+    inject_reload_script,
+    watch,
+)
+from src.assets import AssetRewriter
+from src.page_generator import generate_pages_recursive
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height) + b"\x08\x06\x00\x00\x00"
+
+
+class TestDevServer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(self.content)
+        os.makedirs(self.static)
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def test_inject_reload_script(self):
+        html = inject_reload_script("<html><body><p>x</p></body></html>")
+        self.assertEqual(html, f"<html><body><p>x</p>{RELOAD_SCRIPT}</body></html>")
+        self.assertEqual(inject_reload_script("<p>x</p>"), f"<p>x</p>{RELOAD_SCRIPT}")
+
+    def test_watcher_detects_changes(self):
+        watcher = DirectoryWatcher([self.content, self.static, self.template])
+        self.assertEqual(watcher.poll(), ([], []))
+
+        page = os.path.join(self.content, "about.md")
+        self.write(page, "# About")
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        os.remove(os.path.join(self.static, "index.css"))
+        changed, removed = watcher.poll()
+        self.assertEqual(changed, sorted([page, self.template]))
+        self.assertEqual(removed, [os.path.join(self.static, "index.css")])
+        self.assertEqual(watcher.poll(), ([], []))
+
+    def test_rebuilder_touches_only_affected_outputs(self):
+        rebuilder = SiteRebuilder(self.content, self.static, self.template, self.public)
+        page = os.path.join(self.content, "index.md")
+        css = os.path.join(self.static, "index.css")
+        self.assertTrue(rebuilder.apply([page, css], []))
+        self.assertEqual(sorted(os.listdir(self.public)), ["index.css", "index.html"])
+
+        self.assertTrue(rebuilder.apply([], [css]))
+        self.assertEqual(os.listdir(self.public), ["index.html"])
+        self.assertFalse(rebuilder.apply([os.path.join(self.tmp.name, "README")], []))
+
+    def test_assets_are_replaced_not_overwritten(self):
+        rebuilder = SiteRebuilder(self.content, self.static, self.template, self.public)
+        css = os.path.join(self.static, "index.css")
+        rebuilder.apply([css], [])
+        # A previous generation sharing the output through a hard link
+        previous = os.path.join(self.tmp.name, "previous.css")
+        os.link(os.path.join(self.public, "index.css"), previous)
+        self.write(css, "body { color: red }")
+        rebuilder.apply([css], [])
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body { color: red }")
+        with open(previous) as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_template_change_rebuilds_pages(self):
+        rebuilder = SiteRebuilder(self.content, self.static, self.template, self.public)
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+        self.assertTrue(rebuilder.apply([self.template], []))
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertEqual(f.read(), "<h1>Home</h1>")
+
+    def test_rebuilder_renders_like_the_build(self):
+        manifest = os.path.join(self.tmp.name, "manifest.json")
+        page = os.path.join(self.content, "index.md")
+        logo = os.path.join(self.static, "logo.png")
+        css = os.path.join(self.static, "index.css")
+        self.write(page, "# Home\n\n![logo](/logo.png)")
+        self.write(css, "body {  margin: 0;  }")
+        with open(logo, 'wb') as f:
+            f.write(png(40, 30))
+        rebuilder = SiteRebuilder(self.content, self.static, self.template, self.public, manifest,
+                                  minify=True, image_sizes=True)
+        rebuilder.apply([page, css], [])
+        with open(os.path.join(self.public, "index.html")) as f:
+            rebuilt = f.read()
+        self.assertIn("width=40 height=30", rebuilt)
+        with open(os.path.join(self.public, "index.css")) as f:
+            self.assertEqual(f.read(), "body{margin:0}")
+
+        generate_pages_recursive(self.content, self.template, self.public, manifest,
+                                 assets=AssetRewriter(None, {"logo.png": [40, 30]}), minify=True)
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertEqual(f.read(), rebuilt)
+
+        # Pages follow the dimensions of a changed image
+        with open(logo, 'wb') as f:
+            f.write(png(80, 60))
+        self.assertTrue(rebuilder.apply([logo], []))
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("width=80 height=60", f.read())
+
+    def test_watcher_skips_files_removed_during_scan(self):
+        watcher = DirectoryWatcher([self.content])
+        page = os.path.join(self.content, "index.md")
+
+        class VanishedEntry:
+            path = page
+
+            def is_dir(self, follow_symlinks=True):
+                return False
+
+            def is_file(self):
+                return True
+
+            def stat(self):
+                raise FileNotFoundError(page)
+
+        scan = unittest.mock.MagicMock()
+        scan.__enter__.return_value = [VanishedEntry()]
+        with unittest.mock.patch("os.scandir", return_value=scan):
+            self.assertEqual(watcher.poll(), ([], [page]))
+
+    def test_watch_survives_poll_errors(self):
+        class FlakyWatcher:
+            polls = 0
+
+            def poll(self):
+                self.polls += 1
+                if self.polls == 1:
+                    raise FileNotFoundError("swapped during scan")
+                stop_event.set()
+                return [os.path.join(self.content, "index.md")], []
+
+        stop_event = threading.Event()
+        watcher = FlakyWatcher()
+        watcher.content = self.content
+        notifier = ReloadNotifier()
+        rebuilder = SiteRebuilder(self.content, self.static, self.template, self.public)
+        with self.assertLogs("src.dev_server", "ERROR"):
+            watch(watcher, rebuilder, notifier, interval=0, stop_event=stop_event)
+        self.assertEqual(watcher.polls, 2)
+        self.assertEqual(notifier.generation, 1)
+
+    def test_notifier_wakes_waiters(self):
+        notifier = ReloadNotifier()
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(notifier.wait(0, 5)))
+        waiter.start()
+        notifier.notify()
+        waiter.join()
+        self.assertEqual(results, [1])
+        self.assertEqual(notifier.wait(1, 0.01), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 
-from src.htmlnode import HTMLNode
+import pickle
+
+from src.htmlnode import HTMLNode, LeafNode, ParentNode, Tag
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -38,6 +40,20 @@ class TestHTMLNode(unittest.TestCase):
         self.assertIn("HTMLNode(", repr_string)  # Check for nested HTMLNode
         self.assertIn("props={'class': 'container'}", repr_string)
 
+    def test_nodes_are_slotted(self):
+        for node in (HTMLNode(), LeafNode("a"), ParentNode(Tag.PARAGRAPH, [LeafNode("a")])):
+            self.assertFalse(hasattr(node, "__dict__"))
+            with self.assertRaises(AttributeError):
+                node.extra = 1
+
+    def test_slotted_nodes_pickle(self):
+        node = ParentNode(Tag.LINK, [LeafNode("a", Tag.BOLD)], {"href": "/a"})
+        self.assertEqual(pickle.loads(pickle.dumps(node)).to_html(), '<a href="/a"><b>a</b></a>')
+
+    def test_tags_are_the_plain_strings(self):
+        self.assertEqual(Tag.PARAGRAPH, "p")
+        self.assertEqual(LeafNode("a", Tag.BOLD), LeafNode("a", "b"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,135 @@
+import contextlib
+import io
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from src import image_size
+from src.assets import AssetRewriter, add_html_image_attributes, hash_assets
+from src.image_size import image_sizes, read_image_size
+from src.markdown_to_html import markdown_to_html_node
+from src.page_generator import generate_pages_recursive
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height) + b"\x08\x06\x00\x00\x00"
+
+
+def gif(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00" * 20
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+
+def webp(chunk, payload):
+    body = chunk + struct.pack("<I", len(payload)) + payload
+    return b"RIFF" + struct.pack("<I", len(body) + 4) + b"WEBP" + body
+
+
+class TestReadImageSize(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, 'wb') as f:
+            f.write(data)
+        return read_image_size(path)
+
+    def test_png(self):
+        self.assertEqual(self.size(png(1344, 896)), (1344, 896))
+
+    def test_gif(self):
+        self.assertEqual(self.size(gif(320, 200)), (320, 200))
+
+    def test_jpeg(self):
+        self.assertEqual(self.size(jpeg(640, 480)), (640, 480))
+
+    def test_webp(self):
+        lossy = b"\x00\x00\x00" + b"\x9d\x01\x2a" + struct.pack("<HH", 300, 150)
+        self.assertEqual(self.size(webp(b"VP8 ", lossy)), (300, 150))
+        lossless = b"\x2f" + struct.pack("<I", (299 & 0x3FFF) | ((149 & 0x3FFF) << 14))
+        self.assertEqual(self.size(webp(b"VP8L", lossless)), (300, 150))
+        extended = b"\x00" * 4 + (299).to_bytes(3, "little") + (149).to_bytes(3, "little")
+        self.assertEqual(self.size(webp(b"VP8X", extended)), (300, 150))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(self.size(b"not an image"))
+        self.assertIsNone(self.size(jpeg(640, 480)[:25]))
+
+    def test_real_png(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(read_image_size(os.path.join(root, "static", "images", "rivendell.png")), (1344, 896))
+
+
+class TestImageSizes(unittest.TestCase):
+
+    def test_sizes_are_cached_by_hash(self):
+        with tempfile.TemporaryDirectory() as static:
+            os.makedirs(os.path.join(static, "images"))
+            with open(os.path.join(static, "images", "a.png"), 'wb') as f:
+                f.write(png(10, 20))
+            with open(os.path.join(static, "index.css"), 'w') as f:
+                f.write("body {}")
+            hashes = hash_assets(static)
+            sizes, cache = image_sizes(static, hashes)
+            self.assertEqual(sizes, {"images/a.png": [10, 20]})
+            with mock.patch.object(image_size, "read_image_size") as read:
+                self.assertEqual(image_sizes(static, hashes, cache)[0], sizes)
+            read.assert_not_called()
+
+
+class TestImageAttributes(unittest.TestCase):
+
+    images = {"images/a.png": [10, 20]}
+
+    def test_tree(self):
+        node = markdown_to_html_node("![a](/images/a.png) ![b](/images/b.png) ![c](https://example.com/a.png)")
+        AssetRewriter(images=self.images).rewrite_tree(node)
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><img src="/images/a.png" alt="a" width="10" height="20" loading="lazy" decoding="async"></img>'
+            '<img src="/images/b.png" alt="b"></img><img src="https://example.com/a.png" alt="c"></img></p></div>',
+        )
+
+    def test_html_matches_tree(self):
+        markdown = "![a](/images/a.png?v=1)\n\n* ![b](/images/b.png) and ![a](/images/a.png)"
+        node = markdown_to_html_node(markdown)
+        html = node.to_html()
+        rewriter = AssetRewriter({"images/a.png": "images/a.0123abcd.png"}, self.images)
+        self.assertEqual(rewriter.rewrite_html(html), rewriter.rewrite_tree(node).to_html())
+
+    def test_existing_width_is_kept(self):
+        html = '<img src="/images/a.png" width="5">'
+        self.assertEqual(add_html_image_attributes(html, self.images), html)
+
+    def test_build(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            template = os.path.join(tmp, "template.html")
+            with open(template, 'w') as f:
+                f.write("{{ Content }}")
+            with open(os.path.join(content, "index.md"), 'w') as f:
+                f.write("# Home\n\n![a](/images/a.png)")
+            public = os.path.join(tmp, "public")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(content, template, public, os.path.join(tmp, "manifest.json"),
+                                         body_cache_dir=os.path.join(tmp, "bodies"),
+                                         assets=AssetRewriter(images=self.images))
+            with open(os.path.join(public, "index.html")) as f:
+                self.assertIn('width="10" height="20" loading="lazy" decoding="async"', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
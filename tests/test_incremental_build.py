@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import page_generator
+from src.build_manifest import load_manifest
+from src.page_generator import PageGenerationError, generate_pages_recursive
+
+
+class TestIncrementalBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.template = os.path.join(root, "template.html")
+        self.manifest = os.path.join(root, ".build-cache", "manifest.json")
+        self.bodies = None
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post\n\nHello")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def build(self):
+        with mock.patch.object(page_generator, "generate_page",
+                               wraps=page_generator.generate_page) as spy:
+            generate_pages_recursive(self.content, self.template, self.public, self.manifest,
+                                     body_cache_dir=self.bodies)
+        return sorted(os.path.relpath(call.args[0], self.content) for call in spy.call_args_list)
+
+    def test_first_build_generates_everything(self):
+        self.assertEqual(self.build(), [os.path.join("blog", "post.md"), "index.md"])
+        pages = load_manifest(self.manifest)["pages"]
+        self.assertEqual(pages["blog/post.md"]["output"], "blog/post.html")
+
+    def test_unchanged_pages_are_skipped(self):
+        self.build()
+        self.assertEqual(self.build(), [])
+
+    def test_changed_source_is_regenerated(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome back")
+        self.assertEqual(self.build(), ["index.md"])
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("Welcome back", f.read())
+
+    def test_template_change_regenerates_all(self):
+        self.build()
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        self.assertEqual(len(self.build()), 2)
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+        self.assertEqual(self.build(), ["index.md"])
+
+    def test_deleted_source_is_pruned(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        self.build()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertNotIn("blog/post.md", load_manifest(self.manifest)["pages"])
+
+    def test_template_change_rewraps_cached_bodies(self):
+        self.bodies = os.path.join(self.tmp.name, ".build-cache", "bodies")
+        self.build()
+        self.assertEqual(len(os.listdir(self.bodies)), 2)
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+        with mock.patch.object(page_generator, "markdown_to_html_node") as parse, \
+                mock.patch.object(page_generator, "markdown_to_html_string") as render:
+            self.assertEqual(self.build(), [])
+        parse.assert_not_called()
+        render.assert_not_called()
+        with open(os.path.join(self.public, "blog", "post.html")) as f:
+            self.assertEqual(f.read(), "<h1>Post</h1><div><h1>Post</h1><p>Hello</p></div>")
+
+    def test_content_change_with_body_cache(self):
+        self.bodies = os.path.join(self.tmp.name, ".build-cache", "bodies")
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+        self.assertEqual(self.build(), ["index.md"])
+        # The body of the previous version is no longer referenced and is pruned
+        self.assertEqual(len(os.listdir(self.bodies)), 2)
+
+    def test_parser_change_rebuilds_pages(self):
+        self.bodies = os.path.join(self.tmp.name, ".build-cache", "bodies")
+        self.build()
+        with mock.patch.object(page_generator, "parser_version", return_value="f" * 64):
+            # Cached bodies of the old parser are not re-wrapped
+            self.assertEqual(self.build(), [os.path.join("blog", "post.md"), "index.md"])
+            self.assertEqual(self.build(), [])
+        self.assertEqual(len(os.listdir(self.bodies)), 2)
+
+    def test_failed_page_keeps_previous_output(self):
+        self.build()
+        self.write(os.path.join(self.content, "index.md"), "")
+        with self.assertRaises(PageGenerationError):
+            self.build()
+        with open(os.path.join(self.public, "index.html")) as f:
+            self.assertIn("Welcome", f.read())
+        self.assertNotIn("index.md", load_manifest(self.manifest)["pages"])
+
+
+if __name__ == '__main__':
+    unittest.main()
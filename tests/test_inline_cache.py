@@ -0,0 +1,97 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from src.inline_cache import InlineCache, get_inline_cache, set_inline_cache
+from src.markdown_to_html import markdown_to_html_node
+from src.page_generator import generate_pages_recursive
+from src.text_to_node import text_to_textnodes
+from src.textnode import TextNode
+
+
+class TestInlineCache(unittest.TestCase):
+
+    def test_hits_and_misses(self):
+        cache = InlineCache()
+        text = "A **b** [c](/d)"
+        self.assertEqual(cache.text_to_textnodes(text), text_to_textnodes(text))
+        self.assertEqual(cache.text_to_textnodes(text), text_to_textnodes(text))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_returned_lists_are_independent(self):
+        cache = InlineCache()
+        cache.text_to_textnodes("a *b*").append(TextNode("x", "text"))
+        self.assertEqual(cache.text_to_textnodes("a *b*"), [TextNode("a ", "text"), TextNode("b", "italic")])
+
+    def test_least_recently_used_is_evicted(self):
+        cache = InlineCache(max_entries=2)
+        cache.text_to_textnodes("a")
+        cache.text_to_textnodes("b")
+        cache.text_to_textnodes("a")
+        cache.text_to_textnodes("c")
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+        cache.text_to_textnodes("a")
+        cache.text_to_textnodes("b")
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_drain_and_merge_stats(self):
+        cache = InlineCache()
+        cache.text_to_textnodes("a")
+        cache.text_to_textnodes("a")
+        stats = cache.drain_stats()
+        self.assertEqual(stats, (1, 1, 0))
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 0, 1))
+        cache.merge_stats(stats)
+        cache.merge_stats(stats)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_active_cache_is_used_by_the_parser(self):
+        markdown = "* same item\n* same item\n\nsame item"
+        cache = InlineCache()
+        set_inline_cache(cache)
+        try:
+            cached = markdown_to_html_node(markdown)
+        finally:
+            set_inline_cache(None)
+        self.assertEqual(cached, markdown_to_html_node(markdown))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+
+class TestInlineCacheBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        with open(self.template, 'w') as f:
+            f.write("{{ Content }}")
+        for i in range(4):
+            with open(os.path.join(self.content, f"page-{i}.md"), 'w') as f:
+                f.write(f"# Page {i}\n\nShared [boilerplate](/about) line")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, jobs):
+        cache = InlineCache()
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, os.path.join(self.tmp.name, f"public-{jobs}"),
+                                     jobs=jobs, inline_cache=cache)
+        return cache
+
+    def test_serial_build_shares_the_cache_across_pages(self):
+        cache = self.build(jobs=1)
+        self.assertEqual((cache.hits, cache.misses), (3, 5))
+        self.assertIsNone(get_inline_cache())
+
+    def test_worker_stats_are_merged(self):
+        cache = self.build(jobs=2)
+        self.assertEqual(cache.hits + cache.misses, 8)
+        self.assertGreaterEqual(cache.misses, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import random
+import time
+import unittest
+
+from benchmarks.corpus import CorpusSpec, generate_markdown
+from src.inline_scanner import scan_inline
+from src.split_node import split_nodes_image, split_nodes_link
+from src.text_to_node import text_to_textnodes_multipass
+from src.textnode import TextNode
+
+
+class TestScanInline(unittest.TestCase):
+
+    def test_all_node_types(self):
+        text = "A **b** *c* `d` ![e](/e.png) [f](/f)"
+        self.assertEqual(scan_inline(text), [
+            TextNode("A ", "text"),
+            TextNode("b", "bold"),
+            TextNode("c", "italic"),
+            TextNode("d", "code"),
+            TextNode("e", "image", "/e.png"),
+            TextNode("f", "link", "/f"),
+        ])
+
+    def test_unclosed_delimiter_applies_to_the_rest(self):
+        self.assertEqual(scan_inline("a **b"), [TextNode("a ", "text"), TextNode("b", "bold")])
+
+    def test_delimiters_inside_bold_are_literal(self):
+        self.assertEqual(scan_inline("**a *b* `c`**"), [TextNode("a *b* `c`", "bold")])
+
+    def test_star_closes_code(self):
+        self.assertEqual(scan_inline("`a*b*c`"), [
+            TextNode("a", "code"),
+            TextNode("b", "italic"),
+            TextNode("c", "text"),
+        ])
+
+    def test_emphasis_does_not_cross_links(self):
+        self.assertEqual(scan_inline("*a [l](/u) b*"), [
+            TextNode("a ", "italic"),
+            TextNode("l", "link", "/u"),
+            TextNode(" b", "text"),
+        ])
+
+    def test_incomplete_image_and_link(self):
+        self.assertEqual(scan_inline("![a](b and [c"), [TextNode("![a](b and [c", "text")])
+
+    def test_whitespace_nodes_are_dropped(self):
+        self.assertEqual(scan_inline("**a** **b** [ ](/u)"), [TextNode("a", "bold"), TextNode("b", "bold")])
+
+    def test_nodes_are_spans_over_the_text(self):
+        text = "A **b** [c](/c)"
+        nodes = scan_inline(text)
+        self.assertTrue(all(node.source is text for node in nodes))
+        self.assertEqual([(node.start, node.end) for node in nodes], [(0, 2), (4, 5), (9, 10)])
+
+
+class TestMatchesMultipass(unittest.TestCase):
+
+    def assert_same(self, text):
+        scanned = scan_inline(text)
+        split = text_to_textnodes_multipass(text)
+        self.assertEqual(scanned, split, repr(text))
+        self.assertEqual([node.buffer() for node in scanned], [node.buffer() for node in split], repr(text))
+
+    def test_corpus(self):
+        spec = CorpusSpec(page_size=20000, link_density=0.1, image_density=0.1, emphasis_density=0.2)
+        for line in generate_markdown(spec).split("\n"):
+            self.assert_same(line)
+
+    def test_random_syntax(self):
+        rng = random.Random(0)
+        tokens = ["![", "[", "]", "(", ")", "](", "*", "**", "`", " ", "a", "!", "b c"]
+        for _ in range(20000):
+            self.assert_same("".join(rng.choice(tokens) for _ in range(rng.randint(0, 14))))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+
+class TestPathologicalInput(unittest.TestCase):
+
+    def assert_fast(self, fn, seconds=2.0):
+        start = time.perf_counter()
+        result = fn()
+        self.assertLess(time.perf_counter() - start, seconds)
+        return result
+
+    def test_many_links(self):
+        # Quadratic splitting took tens of seconds on this input
+        text = "[a](b)" * 200000
+        nodes = self.assert_fast(lambda: split_nodes_link([TextNode(text, "text")]))
+        self.assertEqual(len(nodes), 200000)
+        self.assertEqual(len(self.assert_fast(lambda: scan_inline(text))), 200000)
+
+    def test_many_images(self):
+        text = "![a](b) " * 100000
+        self.assertEqual(len(self.assert_fast(lambda: split_nodes_image([TextNode(text, "text")]))), 200000)
+
+    def test_stray_brackets(self):
+        for text in ("[!)" * 200000, "x [ ](" * 200000, "![a](b " * 200000, "[" * 500000):
+            self.assertEqual(self.assert_fast(lambda: scan_inline(text)), text_to_textnodes_multipass(text))
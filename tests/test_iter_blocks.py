@@ -0,0 +1,99 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.corpus import CorpusSpec, generate_markdown
+from src import markdown_blocks
+from src.markdown_blocks import block_to_block_type, iter_blocks, markdown_to_blocks
+
+
+class TestIterBlocks(unittest.TestCase):
+
+    def blocks(self, markdown):
+        return [(block_type, "\n".join(lines)) for block_type, lines in iter_blocks(markdown.split("\n"))]
+
+    def test_blocks_and_types(self):
+        markdown = """
+        # Heading
+
+        This is a paragraph
+        on two lines.
+
+        * List item 1
+        * List item 2
+
+        1. One
+        2. Two
+
+        > Quote
+        """
+        self.assertEqual(self.blocks(markdown), [
+            ("heading", "# Heading"),
+            ("paragraph", "This is a paragraph\non two lines."),
+            ("unordered_list", "* List item 1\n* List item 2"),
+            ("ordered_list", "1. One\n2. Two"),
+            ("quote", "> Quote"),
+        ])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        markdown = "```python\ndef f():\n\n    return 1\n```\n\nAfter"
+        self.assertEqual(self.blocks(markdown), [
+            ("code", "```python\ndef f():\n\n    return 1\n```"),
+            ("paragraph", "After"),
+        ])
+
+    def test_reads_from_a_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, 'w') as f:
+                f.write("# Title\n\n```\na\n\nb\n```\n")
+            with open(path) as f:
+                self.assertEqual([(block_type, lines) for block_type, lines in iter_blocks(f)], [
+                    ("heading", ["# Title"]),
+                    ("code", ["```", "a", "", "b", "```"]),
+                ])
+
+    def test_is_lazy(self):
+        def lines():
+            yield "First"
+            yield ""
+            raise AssertionError("read past the first block")
+        self.assertEqual(next(iter_blocks(lines())), ("paragraph", ["First"]))
+
+
+class TestMatchesMarkdownToBlocks(unittest.TestCase):
+
+    def assert_same(self, markdown):
+        expected = [(block_to_block_type(block), block) for block in markdown_to_blocks(markdown)]
+        actual = [(block_type, "\n".join(lines)) for block_type, lines in iter_blocks(markdown.split("\n"))]
+        self.assertEqual(actual, expected, repr(markdown))
+
+    def test_fence_closed_at_the_end_of_a_line(self):
+        self.assert_same("# Title\n\n```\nprint(1)```\n\n## Next section\n\n* item one\n* item two")
+
+    def test_unclosed_fence(self):
+        self.assert_same("# Title\n\n```python\nprint(1)\n\n## Next section\n\n* item one\n* item two\n\n  ```x")
+        self.assert_same("```\n\n\n   \n```python\n\n> quote")
+
+    def test_fence_longer_than_the_lookahead(self):
+        markdown = "```\n" + "\n\n".join(f"line {index}" for index in range(10)) + "\n```\n\nAfter"
+        with mock.patch.object(markdown_blocks, "FENCE_LOOKAHEAD", 30):
+            self.assert_same(markdown)
+        self.assertEqual(len(list(iter_blocks(markdown.split("\n")))), 2)
+
+    def test_corpus(self):
+        spec = CorpusSpec(page_size=50000, list_ratio=0.3, code_ratio=0.2)
+        self.assert_same(generate_markdown(spec))
+
+    def test_random_documents(self):
+        rng = random.Random(0)
+        tokens = ["\n", "\n", "\n\n", " ", "  ", "\t", "#", "# ", "## ", "> ", ">", "* ", "- ",
+                  "1. ", "2. ", "3.", "x", "y z", "`", "\r", "1", "."]
+        for _ in range(20000):
+            self.assert_same("".join(rng.choice(tokens) for _ in range(rng.randint(0, 16))))
+
+
+if __name__ == "__main__":
+    unittest.main()
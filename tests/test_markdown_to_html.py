@@ -1,6 +1,6 @@
 import unittest
 from src.htmlnode import HTMLNode, ParentNode, LeafNode
-from src.markdown_to_html import markdown_to_html_node
+from src.markdown_to_html import block_to_html_node, markdown_to_html_node
 
 class TestMarkdownToHTMLNode(unittest.TestCase):
 
@@ -68,6 +68,10 @@ class TestMarkdownToHTMLNode(unittest.TestCase):
         ])
         self.assertEqual(html_node, expected)
 
+    def test_invalid_block_type(self):
+        with self.assertRaises(ValueError):
+            block_to_html_node("table", "| a |")
+
     def test_multiple_blocks(self):
         markdown = """
                     # Heading
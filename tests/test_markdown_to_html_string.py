@@ -0,0 +1,81 @@
+import io
+import random
+import time
+import unittest
+
+from benchmarks.corpus import CorpusSpec, generate_markdown
+from src.inline_cache import InlineCache, set_inline_cache
+from src.markdown_to_html import (
+    ParseBudgetExceeded,
+    iter_html_nodes,
+    iter_html_strings,
+    markdown_to_html_node,
+    markdown_to_html_string,
+)
+
+# Pieces random documents are assembled from, chosen to hit the quirks of
+# the block and inline parsers
+FRAGMENTS = [
+    "word", "two words", "**", "*", "`", "[", "]", "(", ")", "![", "](", "/u.png", "#", "# ", "## ",
+    "####### ", "> ", "- ", "* ", "1. ", "2. ", "```", "\n", "\n\n", "\n\n\n", "  ", "\t", "<b>", "&",
+]
+
+
+class TestMatchesTreePath(unittest.TestCase):
+
+    def assert_same(self, markdown):
+        try:
+            expected = markdown_to_html_node(markdown).to_html()
+        except Exception as e:
+            with self.assertRaises(type(e), msg=repr(markdown)) as context:
+                markdown_to_html_string(markdown)
+            self.assertEqual(str(context.exception), str(e), repr(markdown))
+            return
+        self.assertEqual(markdown_to_html_string(markdown), expected, repr(markdown))
+
+    def test_paragraph(self):
+        self.assertEqual(markdown_to_html_string("Some **bold** and [a link](/a)"),
+                         '<div><p>Some <b>bold</b> and <a href="/a">a link</a></p></div>')
+
+    def test_corpus(self):
+        for seed in range(3):
+            spec = CorpusSpec(pages=20, link_density=0.1, image_density=0.05, emphasis_density=0.2, seed=seed)
+            for index in range(spec.pages):
+                self.assert_same(generate_markdown(spec, index))
+
+    def test_random_documents(self):
+        rng = random.Random(0)
+        for _ in range(3000):
+            self.assert_same("".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 30))))
+
+    def test_empty_documents_fail_the_same_way(self):
+        for markdown in ("", "\n\n", "**", "# **"):
+            self.assert_same(markdown)
+
+    def test_with_inline_cache(self):
+        spec = CorpusSpec(pages=5, emphasis_density=0.2)
+        set_inline_cache(InlineCache(64))
+        try:
+            for index in range(spec.pages):
+                self.assert_same(generate_markdown(spec, index))
+        finally:
+            set_inline_cache(None)
+
+
+class TestIterHtmlStrings(unittest.TestCase):
+
+    def test_matches_iter_html_nodes(self):
+        markdown = generate_markdown(CorpusSpec(code_ratio=0.2, list_ratio=0.3))
+        self.assertEqual(list(iter_html_strings(io.StringIO(markdown))),
+                         [node.to_html() for node in iter_html_nodes(io.StringIO(markdown))])
+
+    def test_deadline(self):
+        with self.assertRaises(ParseBudgetExceeded) as context:
+            list(iter_html_strings(["# Title", "", "text"], time.monotonic() - 1))
+        self.assertEqual(context.exception.lines, ["# Title"])
+        with self.assertRaises(ParseBudgetExceeded):
+            markdown_to_html_string("# Title", time.monotonic() - 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
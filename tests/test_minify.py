@@ -0,0 +1,179 @@
+import io
+import os
+import random
+import tempfile
+import time
+import unittest
+
+from src.copy_directory import sync_directory
+from src.minify import MAX_TAG_LENGTH, HTMLMinifier, minify_css, minify_html, minify_tag
+from src.template import Template
+
+DOCUMENT = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <!-- the title -->
+    <title>{{ Title }}</title>
+    <link rel="stylesheet" href="/index.css">
+</head>
+<body>
+    <p class='a b'  id="x">Some   text</p>
+    <pre><code>keep
+    this   as is</code></pre>
+    <img src="/a.png" alt="a > b" />
+</body>
+</html>
+"""
+
+MINIFIED = (
+    '<!DOCTYPE html> <html lang=en> <head> <title>{{ Title }}</title> '
+    '<link rel=stylesheet href=/index.css> </head> <body> <p class=\'a b\' id=x>Some text</p> '
+    '<pre><code>keep\n    this   as is</code></pre> <img src=/a.png alt="a > b"/> </body> </html> '
+)
+
+
+class TestMinifyHTML(unittest.TestCase):
+
+    def test_minify_tag(self):
+        self.assertEqual(minify_tag('<a  href="/x"\n title="two words" >'), '<a href=/x title="two words">')
+        self.assertEqual(minify_tag('<input disabled value="">'), '<input disabled value="">')
+        self.assertEqual(minify_tag('<img src="a" />'), '<img src=a />')
+        self.assertEqual(minify_tag('<a href="/">'), '<a href="/">')
+        self.assertEqual(minify_tag('</p >'), '</p>')
+
+    def test_document(self):
+        self.assertEqual(minify_html(DOCUMENT), MINIFIED)
+
+    def test_chunks_split_anywhere(self):
+        for size in (1, 2, 3, 7, 64):
+            out = io.StringIO()
+            minifier = HTMLMinifier(out)
+            for start in range(0, len(DOCUMENT), size):
+                minifier.write(DOCUMENT[start:start + size])
+            minifier.close()
+            self.assertEqual(out.getvalue(), MINIFIED, size)
+
+    def test_raw_text_end_tag_is_case_insensitive(self):
+        self.assertEqual(minify_html("<PRE> a  b </PRE>  <p> c </p>"), "<PRE> a  b </PRE> <p> c </p>")
+
+    def test_text_that_is_not_a_tag(self):
+        self.assertEqual(minify_html("<p>1 <  2</p>"), "<p>1 < 2</p>")
+
+    def test_long_tag_is_text(self):
+        html = '<a title="' + "x" * MAX_TAG_LENGTH + '">link</a>'
+        self.assertEqual(minify_html(html), html)
+        self.assertEqual(minify_html('<a title="x<y" >'), '<a title="x<y">')
+        self.assertEqual(minify_html("<a b<p >"), "<a b<p>")
+
+    def test_random_chunks_match_a_single_write(self):
+        rng = random.Random(0)
+        fragments = ["<p>", "</p>", "<pre>", "</pre>", "<!--", "-->", "<a", ">", "<", "'", '"', "=",
+                     " ", "  ", "\n", "x", "it's", "<b ", "</"]
+        for _ in range(2000):
+            html = "".join(rng.choice(fragments) for _ in range(rng.randint(0, 30)))
+            out = io.StringIO()
+            minifier = HTMLMinifier(out)
+            position = 0
+            while position < len(html):
+                size = rng.randint(1, 5)
+                minifier.write(html[position:position + size])
+                position += size
+            minifier.close()
+            self.assertEqual(out.getvalue(), minify_html(html), repr(html))
+
+    def test_template(self):
+        template = Template("<p>\n    {{ Content }}\n</p>", minify=True)
+        self.assertEqual(template.render(Content="a   b"), "<p> a b </p>")
+        out = io.StringIO()
+        template.write(out, Content="a   b")
+        self.assertEqual(out.getvalue(), "<p> a b </p>")
+        self.assertNotEqual(template.hash, Template(template.source).hash)
+        self.assertNotEqual(template, Template(template.source))
+
+
+class TestPathologicalInput(unittest.TestCase):
+
+    def assert_fast(self, fn, seconds=2.0):
+        start = time.perf_counter()
+        result = fn()
+        self.assertLess(time.perf_counter() - start, seconds)
+        return result
+
+    def test_many_raw_text_blocks(self):
+        # Lower casing the page for every <pre> took seconds on this input
+        html = "<p>x</p><pre>a  b</PRE>\n" * 20000
+        minified = self.assert_fast(lambda: minify_html(html))
+        self.assertEqual(minified, "<p>x</p><pre>a  b</PRE> " * 20000)
+
+    def test_stray_angle_brackets(self):
+        html = "if a<b then it's fine " * 50000
+        self.assertEqual(self.assert_fast(lambda: minify_html(html)), html)
+
+    def test_streaming_after_a_stray_angle_bracket(self):
+        # Every write rescanned the held back input from the "<" on
+        out = io.StringIO()
+        minifier = HTMLMinifier(out)
+        minifier.write("<p>if a<b then it's fine</p>")
+
+        def write_blocks():
+            for index in range(20000):
+                minifier.write(f"<p>block  {index}</p>\n")
+        self.assert_fast(write_blocks)
+        # Nothing is held back waiting for the "<" to close
+        self.assertTrue(out.getvalue().endswith("<p>block 19999</p>"))
+        minifier.close()
+        self.assertEqual(out.getvalue(), minify_html(
+            "<p>if a<b then it's fine</p>" + "".join(f"<p>block  {index}</p>\n" for index in range(20000))))
+
+    def test_streaming_an_unclosed_comment(self):
+        out = io.StringIO()
+        minifier = HTMLMinifier(out)
+        minifier.write("<p>a</p><!-- never closed")
+        self.assert_fast(lambda: [minifier.write("<p>hidden</p>\n" * 10) for _ in range(20000)])
+        minifier.close()
+        self.assertEqual(out.getvalue(), "<p>a</p>")
+
+
+class TestMinifyCSS(unittest.TestCase):
+
+    def test_minify_css(self):
+        css = """/* base */
+body {
+    font-family: "Segoe UI", Arial;
+    margin: 0/* no margin */auto;
+}
+
+h1,
+h2 > a:hover {
+    content: "a  {  b }";
+}
+"""
+        self.assertEqual(
+            minify_css(css),
+            'body{font-family:"Segoe UI",Arial;margin:0 auto}h1,h2>a:hover{content:"a  {  b }"}',
+        )
+
+    def test_sync_transform(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            src = os.path.join(tmp, "static")
+            dst = os.path.join(tmp, "public")
+            os.makedirs(src)
+            with open(os.path.join(src, "index.css"), 'w') as f:
+                f.write("a {\n    color: red;\n}\n")
+            transforms = {".css": minify_css}
+            sync_directory(src, dst, transforms=transforms)
+            with open(os.path.join(dst, "index.css")) as f:
+                self.assertEqual(f.read(), "a{color:red}")
+            # The minified copy is smaller, but up to date
+            self.assertEqual(os.stat(os.path.join(dst, "index.css")).st_mtime_ns,
+                             os.stat(os.path.join(src, "index.css")).st_mtime_ns)
+            os.remove(os.path.join(src, "index.css"))
+            with open(os.path.join(src, "index.css"), 'w') as f:
+                f.write("b { }")
+            sync_directory(src, dst, transforms=transforms)
+            with open(os.path.join(dst, "index.css")) as f:
+                self.assertEqual(f.read(), "b{}")
+
+
+if __name__ == '__main__':
+    unittest.main()
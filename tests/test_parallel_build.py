@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from src.page_generator import PageGenerationError, generate_pages_recursive
+
+
+class TestParallelBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        with open(self.template, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            page_dir = os.path.join(self.content, f"section{i % 3}")
+            os.makedirs(page_dir, exist_ok=True)
+            with open(os.path.join(page_dir, f"page{i}.md"), 'w') as f:
+                f.write(f"# Page {i}\n\nSome **bold** text on page {i}.")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read_tree(self, root):
+        tree = {}
+        for dirpath, _, files in os.walk(root):
+            for file in files:
+                path = os.path.join(dirpath, file)
+                with open(path) as f:
+                    tree[os.path.relpath(path, root)] = f.read()
+        return tree
+
+    def test_parallel_output_matches_serial(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        parallel = os.path.join(self.tmp.name, "parallel")
+        generate_pages_recursive(self.content, self.template, serial, jobs=1)
+        generate_pages_recursive(self.content, self.template, parallel, jobs=3)
+        self.assertEqual(len(self.read_tree(parallel)), 12)
+        self.assertEqual(self.read_tree(serial), self.read_tree(parallel))
+
+    def test_failures_are_aggregated(self):
+        for name in ("empty_a.md", "empty_b.md"):
+            open(os.path.join(self.content, name), 'w').close()
+        public = os.path.join(self.tmp.name, "public")
+        with self.assertRaises(PageGenerationError) as ctx:
+            generate_pages_recursive(self.content, self.template, public, jobs=3)
+        failed = [os.path.basename(path) for path, _ in ctx.exception.failures]
+        self.assertEqual(failed, ["empty_a.md", "empty_b.md"])
+        self.assertIn("ValueError", ctx.exception.failures[0][1])
+        # The healthy pages are still generated
+        self.assertEqual(len(self.read_tree(public)), 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,5 @@
+import io
+import sys
 import unittest
 from src.htmlnode import HTMLNode, ParentNode, LeafNode
 
@@ -77,6 +79,32 @@ class TestParentNode(unittest.TestCase):
         expected_repr = "ParentNode(tag='div', children=[LeafNode(value='Content', tag=None, props=None)], props={'class': 'container'})"
         self.assertEqual(repr(node), expected_repr)
 
+    def test_write_html_matches_to_html(self):
+        node = ParentNode(
+            "div",
+            [
+                LeafNode("Text"),
+                ParentNode("ul", [ParentNode("li", [LeafNode("Item", "b")])], {"class": "list"}),
+            ],
+        )
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), '<div>Text<ul class="list"><li><b>Item</b></li></ul></div>')
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_nested_child_with_no_tag(self):
+        node = ParentNode("div", [ParentNode(None, [LeafNode("Content")])])
+        with self.assertRaises(ValueError):
+            node.write_html(io.StringIO())
+
+    def test_nesting_beyond_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 2
+        node = LeafNode("deep")
+        for _ in range(depth):
+            node = ParentNode("div", [node])
+        html = node.to_html()
+        self.assertEqual(html, "<div>" * depth + "deep" + "</div>" * depth)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,70 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import page_generator
+from src.markdown_to_html import ParseBudgetExceeded, markdown_to_html_node
+from src.page_generator import PageGenerationError, ParseBudget, generate_pages_recursive
+
+SOURCE = "# Title\n\nSome <b>text</b>\n\n* item"
+
+
+class TestParseBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        with open(self.template, 'w') as f:
+            f.write("<title>{{ Title }}</title>{{ Content }}")
+        with open(os.path.join(self.content, "page.md"), 'w') as f:
+            f.write(SOURCE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, budget, jobs=1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, jobs=jobs, budget=budget)
+        with open(os.path.join(self.public, "page.html")) as f:
+            return f.read()
+
+    def test_deadline_is_checked_between_blocks(self):
+        with self.assertRaises(ParseBudgetExceeded) as error:
+            markdown_to_html_node(SOURCE, deadline=0)
+        self.assertEqual(error.exception.lines, ["# Title"])
+
+    def test_page_within_budget(self):
+        self.assertEqual(self.build(ParseBudget(60)), self.build(None))
+
+    def test_page_over_budget_fails(self):
+        with self.assertRaises(PageGenerationError) as error:
+            self.build(ParseBudget(-1))
+        self.assertIn("ParseBudgetExceeded", error.exception.failures[0][1])
+
+    def test_page_over_budget_is_degraded(self):
+        html = self.build(ParseBudget(-1, degrade=True))
+        self.assertEqual(html, "<title>Title</title><div><pre># Title\n\nSome &lt;b&gt;text&lt;/b&gt;\n\n* item"
+                               "</pre></div>")
+
+    def test_streamed_page_over_budget_is_degraded(self):
+        with mock.patch.object(page_generator, "STREAM_THRESHOLD", 0):
+            html = self.build(ParseBudget(-1, degrade=True))
+        self.assertEqual(html, "<title>Title</title><div><pre># Title\n\nSome &lt;b&gt;text&lt;/b&gt;\n\n* item"
+                               "</pre></div>")
+
+    def test_budget_reaches_workers(self):
+        with open(os.path.join(self.content, "other.md"), 'w') as f:
+            f.write("# Other")
+        with self.assertRaises(PageGenerationError) as error:
+            self.build(ParseBudget(-1), jobs=2)
+        self.assertEqual(len(error.exception.failures), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
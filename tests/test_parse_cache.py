@@ -0,0 +1,92 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.corpus import CorpusSpec, generate_markdown
+from src import page_generator
+from src.htmlnode import LeafNode, ParentNode
+from src.markdown_to_html import markdown_to_html_node
+from src.page_generator import generate_page
+from src.parse_cache import ParseCache, decode_tree, encode_tree
+
+
+class TestEncodeTree(unittest.TestCase):
+
+    def test_round_trip(self):
+        markdown = generate_markdown(CorpusSpec(page_size=5000, link_density=0.1, image_density=0.1))
+        tree = markdown_to_html_node(markdown)
+        self.assertEqual(decode_tree(encode_tree(tree)).to_html(), tree.to_html())
+
+    def test_deep_tree(self):
+        node = LeafNode("leaf", "b")
+        for _ in range(5000):
+            node = ParentNode("span", [node, LeafNode("x")], {"class": "c"})
+        self.assertEqual(decode_tree(encode_tree(node)).to_html(), node.to_html())
+
+    def test_empty(self):
+        self.assertIsNone(decode_tree(encode_tree(None)))
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "trees")
+        self.source = os.path.join(self.tmp.name, "page.md")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.source, 'w') as f:
+            f.write("# Title\n\nSome *text* and [a link](/x)")
+        with open(self.template, 'w') as f:
+            f.write("{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def generate(self, cache):
+        dest = os.path.join(self.tmp.name, "page.html")
+        with mock.patch.object(page_generator, "markdown_to_html_node",
+                               wraps=page_generator.markdown_to_html_node) as parse:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(self.source, self.template, dest, parse_cache=cache)
+        with open(dest) as f:
+            return parse.call_count, f.read()
+
+    def test_cached_tree_skips_parsing(self):
+        cache = ParseCache(self.directory)
+        calls, html = self.generate(cache)
+        self.assertEqual(calls, 1)
+        self.assertEqual(self.generate(cache), (0, html))
+
+    def test_parser_change_invalidates(self):
+        self.generate(ParseCache(self.directory))
+        cache = ParseCache(self.directory)
+        cache.version = "0" * 64
+        self.assertEqual(self.generate(cache)[0], 1)
+        cache.evict()
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParseCache(self.directory)
+        self.generate(cache)
+        for name in os.listdir(self.directory):
+            with open(os.path.join(self.directory, name), 'wb') as f:
+                f.write(b"garbage")
+        self.assertEqual(self.generate(cache)[0], 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ParseCache(self.directory)
+        for i in range(3):
+            cache.put(str(i), LeafNode("x" * 100, "p"))
+            os.utime(cache._path(str(i)), ns=(i, i))
+        self.assertTrue(cache.get("0")[0])  # refreshes entry 0
+        size = os.path.getsize(cache._path("0"))
+        cache.max_bytes = 2 * size
+        self.assertEqual(cache.evict(), 1)
+        self.assertEqual([cache.get(str(i))[0] for i in range(3)], [True, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src import profiler
+from src.page_generator import generate_pages_recursive
+from src.profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+
+    def tearDown(self):
+        profiler.set_profiler(None)
+
+    def test_span_records_trace_event(self):
+        p = Profiler()
+        with p.span("read", path="a.md"):
+            pass
+        event, = p.events
+        self.assertEqual(event["name"], "read")
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["args"], {"path": "a.md"})
+        self.assertGreaterEqual(event["dur"], 0)
+
+    def test_accumulated_phases_attach_to_page(self):
+        p = Profiler()
+        with p.page("a.md"):
+            for _ in range(3):
+                with p.accumulate("inline parsing"):
+                    pass
+        page, = p.events
+        self.assertIn("inline parsing ms", page["args"])
+        self.assertEqual(p.totals["inline parsing"][0], 3)
+
+    def test_drain_and_merge(self):
+        worker, parent = Profiler(), Profiler()
+        with worker.span("write"):
+            pass
+        with worker.accumulate("inline parsing"):
+            pass
+        parent.merge(*worker.drain())
+        self.assertEqual(worker.events, [])
+        self.assertEqual(len(parent.events), 1)
+        self.assertEqual(parent.totals["inline parsing"][0], 1)
+
+    def test_disabled_helpers_are_no_ops(self):
+        with profiler.span("read"), profiler.page("a.md"), profiler.accumulate("x"):
+            pass
+        self.assertIsNone(profiler.get_profiler())
+
+    def test_build_profile_and_trace(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            os.makedirs(content)
+            for name in ("a", "b"):
+                with open(os.path.join(content, f"{name}.md"), 'w') as f:
+                    f.write(f"# {name}\n\nSome *text*")
+            template = os.path.join(tmp, "template.html")
+            with open(template, 'w') as f:
+                f.write("{{ Title }}{{ Content }}")
+
+            for jobs in (1, 2):
+                p = Profiler()
+                profiler.set_profiler(p)
+                generate_pages_recursive(content, template, os.path.join(tmp, f"out{jobs}"), jobs=jobs)
+                profiler.set_profiler(None)
+                names = {event["name"] for event in p.events}
+                self.assertEqual(
+                    names,
+                    {"page", "read", "rendering", "block splitting", "write"},
+                )
+                self.assertIn("inline parsing", p.totals)
+                summary = p.summary()
+                self.assertIn("slowest pages", summary)
+                self.assertIn(os.path.join(content, "a.md"), summary)
+
+                trace = os.path.join(tmp, "trace.json")
+                p.write_chrome_trace(trace)
+                with open(trace) as f:
+                    self.assertEqual(len(json.load(f)["traceEvents"]), len(p.events))
+
+
+if __name__ == '__main__':
+    unittest.main()
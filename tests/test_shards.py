@@ -0,0 +1,151 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from src.build_manifest import load_manifest, save_manifest
+from src.page_generator import generate_pages_recursive
+from src.shards import ShardMergeError, merge_shards, parse_shard, shard_dir_name, shard_of
+
+
+class TestShardAssignment(unittest.TestCase):
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("1/1"), (0, 1))
+        self.assertEqual(parse_shard("3/4"), (2, 4))
+
+    def test_parse_shard_rejects_invalid(self):
+        for text in ("0/2", "3/2", "2", "a/b", "1/-2", ""):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_shard_dir_name(self):
+        self.assertEqual(shard_dir_name((1, 4)), "2-of-4")
+
+    def test_shard_of_is_stable_and_spreads_pages(self):
+        keys = [f"blog/post-{i}.md" for i in range(200)]
+        assigned = [shard_of(key, 4) for key in keys]
+        self.assertEqual(assigned, [shard_of(key, 4) for key in keys])
+        self.assertEqual(set(assigned), {0, 1, 2, 3})
+        self.assertTrue(all(shard_of(key, 1) == 0 for key in keys))
+
+
+class TestShardedBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.template = os.path.join(root, "template.html")
+        self.public = os.path.join(root, "public")
+        self.manifest = os.path.join(root, "manifest.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        for i in range(12):
+            self.write(os.path.join(self.content, "blog", f"post-{i}.md"), f"# Post {i}\n\nHello {i}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def build_shard(self, index, count):
+        shard_dir = os.path.join(self.tmp.name, "shards", shard_dir_name((index, count)))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, os.path.join(shard_dir, "public"),
+                                     os.path.join(shard_dir, "manifest.json"), shard=(index, count))
+        return shard_dir
+
+    def build_full(self, dest):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, dest, os.path.join(dest, "..", "full.json"))
+        return {path: self.read(os.path.join(dest, path)) for path in self.files(dest)}
+
+    def files(self, root):
+        found = []
+        for directory, _, names in os.walk(root):
+            found.extend(os.path.relpath(os.path.join(directory, name), root) for name in names)
+        return sorted(found)
+
+    def test_shards_partition_the_pages(self):
+        shard_dirs = [self.build_shard(index, 3) for index in range(3)]
+        keys = [key for shard_dir in shard_dirs
+                for key in load_manifest(os.path.join(shard_dir, "manifest.json"))["pages"]]
+        self.assertEqual(len(keys), 13)
+        self.assertEqual(len(set(keys)), 13)
+        self.assertEqual(load_manifest(os.path.join(shard_dirs[1], "manifest.json"))["shard"], [1, 3])
+
+    def test_merge_matches_a_full_build(self):
+        shard_dirs = [self.build_shard(index, 3) for index in range(3)]
+        merge_shards(shard_dirs, self.public, self.manifest)
+        expected = self.build_full(os.path.join(self.tmp.name, "full"))
+        self.assertEqual({path: self.read(os.path.join(self.public, path)) for path in self.files(self.public)},
+                         expected)
+        manifest = load_manifest(self.manifest)
+        self.assertNotIn("shard", manifest)
+        self.assertEqual(len(manifest["pages"]), 13)
+        # Outputs are hard linked rather than copied
+        merged = os.path.join(self.public, "index.html")
+        self.assertGreater(os.stat(merged).st_nlink, 1)
+
+    def test_identical_shared_files_are_merged(self):
+        shard_dirs = [self.build_shard(index, 2) for index in range(2)]
+        for shard_dir in shard_dirs:
+            self.write(os.path.join(shard_dir, "public", "style.css"), "body{}")
+        merge_shards(shard_dirs, self.public, self.manifest)
+        self.assertEqual(self.read(os.path.join(self.public, "style.css")), "body{}")
+
+    def test_missing_shard_is_rejected(self):
+        shard_dirs = [self.build_shard(index, 3) for index in (0, 2)]
+        with self.assertRaises(ShardMergeError) as error:
+            merge_shards(shard_dirs, self.public, self.manifest)
+        self.assertEqual(error.exception.problems, ["missing shards: 2-of-3"])
+        self.assertFalse(os.path.exists(self.public))
+
+    def test_mixed_partitionings_are_rejected(self):
+        shard_dirs = [self.build_shard(0, 2), self.build_shard(1, 3)]
+        with self.assertRaises(ShardMergeError):
+            merge_shards(shard_dirs, self.public, self.manifest)
+
+    def test_unsharded_output_is_rejected(self):
+        shard_dir = os.path.join(self.tmp.name, "plain")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, os.path.join(shard_dir, "public"),
+                                     os.path.join(shard_dir, "manifest.json"))
+        with self.assertRaises(ShardMergeError):
+            merge_shards([shard_dir], self.public, self.manifest)
+
+    def test_colliding_outputs_are_rejected(self):
+        shard_dirs = [self.build_shard(index, 2) for index in range(2)]
+        self.write(os.path.join(shard_dirs[0], "public", "style.css"), "a{}")
+        self.write(os.path.join(shard_dirs[1], "public", "style.css"), "b{}")
+        with self.assertRaises(ShardMergeError) as error:
+            merge_shards(shard_dirs, self.public, self.manifest)
+        self.assertIn("style.css differs", error.exception.problems[0])
+
+    def test_page_built_twice_is_rejected(self):
+        shard_dirs = [self.build_shard(index, 2) for index in range(2)]
+        # Rebuild the first shard as if it had been assigned every page
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, os.path.join(shard_dirs[0], "public"),
+                                     os.path.join(shard_dirs[0], "manifest.json"))
+        manifest_path = os.path.join(shard_dirs[0], "manifest.json")
+        manifest = load_manifest(manifest_path)
+        manifest["shard"] = [0, 2]
+        save_manifest(manifest, manifest_path)
+        with self.assertRaises(ShardMergeError) as error:
+            merge_shards(shard_dirs, self.public, self.manifest)
+        self.assertTrue(any("built by both" in problem for problem in error.exception.problems))
+
+
+if __name__ == "__main__":
+    unittest.main()
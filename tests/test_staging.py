@@ -0,0 +1,139 @@
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from src import staging
+from src.staging import StagedBuild
+
+
+class TestStagedBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, "manifest.json")
+        os.makedirs(os.path.join(self.public, "blog"))
+        self.write(os.path.join(self.public, "index.html"), "v1")
+        self.write(os.path.join(self.public, "blog", "post.html"), "post")
+        self.write(self.manifest, "manifest v1")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def publish_v2(self, keep_previous):
+        staged = StagedBuild(self.public, self.manifest)
+        staging = staged.prepare()
+        # Builds replace files, they never rewrite the shared hard links
+        os.remove(os.path.join(staging, "index.html"))
+        self.write(os.path.join(staging, "index.html"), "v2")
+        self.write(staged.staging_manifest_path, "manifest v2")
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v1")
+        staged.commit(keep_previous=keep_previous)
+        return staged
+
+    def test_prepare_seeds_from_live_generation(self):
+        staged = StagedBuild(self.public, self.manifest)
+        staging = staged.prepare()
+        post = os.path.join(staging, "blog", "post.html")
+        self.assertEqual(self.read(post), "post")
+        self.assertTrue(os.path.samefile(post, os.path.join(self.public, "blog", "post.html")))
+        self.assertEqual(self.read(staged.staging_manifest_path), "manifest v1")
+
+    def test_prepare_clean(self):
+        staged = StagedBuild(self.public, self.manifest)
+        staging = staged.prepare(seed=False)
+        self.assertEqual(os.listdir(staging), [])
+        self.assertFalse(os.path.exists(staged.staging_manifest_path))
+
+    def test_commit_swaps_generation(self):
+        staged = self.publish_v2(keep_previous=False)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v2")
+        self.assertEqual(self.read(os.path.join(self.public, "blog", "post.html")), "post")
+        self.assertEqual(self.read(self.manifest), "manifest v2")
+        self.assertFalse(os.path.exists(staged.staging_dir))
+        self.assertFalse(os.path.exists(staged.previous_dir))
+
+    def test_rollback(self):
+        staged = self.publish_v2(keep_previous=True)
+        staged.rollback()
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v1")
+        self.assertEqual(self.read(self.manifest), "manifest v1")
+        # Rolling back again restores the newer generation
+        staged.rollback()
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v2")
+        self.assertEqual(self.read(self.manifest), "manifest v2")
+
+    def test_rollback_without_previous(self):
+        staged = self.publish_v2(keep_previous=False)
+        with self.assertRaises(FileNotFoundError):
+            staged.rollback()
+
+    def stage_v2(self):
+        staged = StagedBuild(self.public, self.manifest)
+        staging_dir = staged.prepare()
+        os.remove(os.path.join(staging_dir, "index.html"))
+        self.write(os.path.join(staging_dir, "index.html"), "v2")
+        return staged
+
+    def test_public_survives_failure_after_exchange(self):
+        staged = self.stage_v2()
+        # The rename after the exchange fails: the new generation is live
+        with unittest.mock.patch("os.rename", side_effect=OSError("crash")):
+            with self.assertRaises(OSError):
+                staged.commit(keep_previous=True)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v2")
+
+    def test_rollback_is_a_single_exchange(self):
+        staged = self.publish_v2(keep_previous=True)
+        with unittest.mock.patch("os.rename", side_effect=OSError("crash")):
+            staged.rollback()
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v1")
+        self.assertEqual(self.read(os.path.join(staged.previous_dir, "index.html")), "v2")
+
+    def test_interrupted_fallback_swap_is_recovered(self):
+        staged = self.stage_v2()
+        real_rename = os.rename
+
+        def crash_after_first_rename(src, dst):
+            real_rename(src, dst)
+            if dst == staged.swap_dir:
+                raise OSError("crash")
+
+        with unittest.mock.patch.object(staging, "_exchange", return_value=False), \
+                unittest.mock.patch("os.rename", side_effect=crash_after_first_rename):
+            with self.assertRaises(OSError):
+                staged.commit()
+        self.assertFalse(os.path.exists(self.public))
+        StagedBuild(self.public, self.manifest).prepare()
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v1")
+
+    def test_fallback_swap(self):
+        staged = self.stage_v2()
+        with unittest.mock.patch.object(staging, "_exchange", return_value=False):
+            staged.commit(keep_previous=True)
+            self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v2")
+            staged.rollback()
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v1")
+        self.assertEqual(self.read(os.path.join(staged.previous_dir, "index.html")), "v2")
+        self.assertFalse(os.path.exists(staged.swap_dir))
+
+    def test_discard(self):
+        staged = StagedBuild(self.public, self.manifest)
+        staged.prepare()
+        staged.discard()
+        self.assertFalse(os.path.exists(staged.staging_dir))
+        self.assertFalse(os.path.exists(staged.staging_manifest_path))
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "v1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import contextlib
+import io
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+from benchmarks.corpus import CorpusSpec, generate_markdown
+from src import page_generator
+from src.assets import AssetRewriter
+from src.page_generator import generate_page
+from src.template import Template
+
+TEMPLATE = "<html><head><title>{{ Title }}</title><link href=\"/index.css\"></head><body>{{ Content }}</body></html>"
+
+
+class TestStreamedPages(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "page.md")
+        spec = CorpusSpec(page_size=20000, link_density=0.1, image_density=0.1, code_ratio=0.2)
+        self.write(self.source, generate_markdown(spec) + "\n\n```\nfenced\n\n```\n")
+        self.assets = AssetRewriter({"index.css": "index.1234abcd.css"}, {"images/a.png": [4, 2]})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def generate(self, name, threshold, template=None, assets=None, body=True):
+        dest = os.path.join(self.tmp.name, name, "page.html")
+        body_path = os.path.join(self.tmp.name, name, "body.html") if body else None
+        with mock.patch.object(page_generator, "STREAM_THRESHOLD", threshold):
+            with contextlib.redirect_stdout(io.StringIO()):
+                title = generate_page(self.source, None, dest, template or Template(TEMPLATE), body_path,
+                                      assets)
+        return title, self.read(dest), self.read(body_path) if body else None
+
+    def test_same_output_as_in_memory(self):
+        for template in (Template(TEMPLATE), Template(TEMPLATE, minify=True)):
+            for assets in (None, self.assets):
+                streamed = self.generate("streamed", 0, template, assets)
+                in_memory = self.generate("in-memory", 1 << 40, template, assets)
+                self.assertEqual(streamed, in_memory)
+
+    def test_untitled(self):
+        self.write(self.source, "Just a paragraph")
+        self.assertEqual(self.generate("streamed", 0, body=False)[:2],
+                         self.generate("in-memory", 1 << 40, body=False)[:2])
+
+    def test_wrap_streams_cached_body(self):
+        _, expected, _ = self.generate("in-memory", 1 << 40, assets=self.assets)
+        body_path = os.path.join(self.tmp.name, "in-memory", "body.html")
+        dest = os.path.join(self.tmp.name, "wrapped.html")
+        with mock.patch.object(page_generator, "STREAM_THRESHOLD", 0), \
+                mock.patch.object(page_generator, "STREAM_CHUNK_SIZE", 7):
+            page_generator._wrap_page(body_path, "Title", Template(TEMPLATE), dest, self.assets)
+        title = expected[expected.index("<title>") + 7:expected.index("</title>")]
+        self.assertEqual(self.read(dest), expected.replace(f"<title>{title}<", "<title>Title<"))
+
+    def generate_huge(self, start):
+        paragraph = "Some *text* with a [link](/x) and `code`.\n" * 10
+        self.write(self.source, start + "\n".join([paragraph] * 2000))
+        self.assertGreater(os.path.getsize(self.source), 800_000)
+        dest = os.path.join(self.tmp.name, "huge.html")
+        with mock.patch.object(page_generator, "STREAM_THRESHOLD", 0):
+            with contextlib.redirect_stdout(io.StringIO()):
+                tracemalloc.start()
+                try:
+                    generate_page(self.source, None, dest, Template(TEMPLATE))
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+        self.assertTrue(self.read(dest).endswith("</p></div></body></html>"))
+        return peak
+
+    def test_memory_is_bounded_by_the_largest_block(self):
+        self.assertLess(self.generate_huge("# Huge\n\n"), 200_000)
+
+    def test_memory_is_bounded_after_an_unclosed_fence(self):
+        # The fence held every following line until the end of the page
+        self.assertLess(self.generate_huge("# Huge\n\n```\n\n"), 400_000)
+
+
+if __name__ == "__main__":
+    unittest.main()
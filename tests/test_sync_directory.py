@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src import copy_directory
+from src.copy_directory import CopyError, scan_files, sync_directory
+
+
+class TestSyncDirectory(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.src, "images"))
+        self.write(os.path.join(self.src, "index.css"), "body {}")
+        self.write(os.path.join(self.src, "images", "logo.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+    def sync(self, previous=None, **kwargs):
+        with mock.patch.object(copy_directory, "_copy_file", wraps=copy_directory._copy_file) as spy:
+            synced = sync_directory(self.src, self.dst, previous, **kwargs)
+        copied = sorted(os.path.relpath(call.args[0], self.src) for call in spy.call_args_list)
+        return synced, copied
+
+    def test_scan_files(self):
+        self.assertEqual(sorted(scan_files(self.src)), ["images/logo.png", "index.css"])
+
+    def test_first_sync_copies_everything(self):
+        synced, copied = self.sync()
+        self.assertEqual(synced, ["images/logo.png", "index.css"])
+        self.assertEqual(copied, [os.path.join("images", "logo.png"), "index.css"])
+        self.assertEqual(self.read(os.path.join(self.dst, "index.css")), "body {}")
+
+    def test_unchanged_files_are_skipped(self):
+        synced, _ = self.sync()
+        self.assertEqual(self.sync(synced)[1], [])
+
+    def test_changed_file_is_copied(self):
+        synced, _ = self.sync()
+        self.write(os.path.join(self.src, "index.css"), "body { margin: 0 }")
+        self.assertEqual(self.sync(synced)[1], ["index.css"])
+        self.assertEqual(self.read(os.path.join(self.dst, "index.css")), "body { margin: 0 }")
+
+    def test_checksum_skips_touched_files(self):
+        synced, _ = self.sync()
+        os.utime(os.path.join(self.src, "index.css"), ns=(0, 0))
+        self.assertEqual(self.sync(synced, checksum=True)[1], [])
+        self.assertEqual(os.stat(os.path.join(self.dst, "index.css")).st_mtime_ns, 0)
+        self.assertEqual(self.sync(synced)[1], [])
+
+    def test_stale_files_are_removed(self):
+        synced, _ = self.sync()
+        self.write(os.path.join(self.dst, "index.html"), "<p>generated</p>")
+        os.remove(os.path.join(self.src, "images", "logo.png"))
+        synced, _ = self.sync(synced)
+        self.assertEqual(synced, ["index.css"])
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        # Files that did not come from the source directory are left alone
+        self.assertTrue(os.path.exists(os.path.join(self.dst, "index.html")))
+
+    def test_link(self):
+        _, copied = self.sync(link=True)
+        self.assertEqual(copied, [])
+        self.assertTrue(os.path.samefile(os.path.join(self.src, "index.css"),
+                                         os.path.join(self.dst, "index.css")))
+
+    def test_changed_file_does_not_modify_hard_links(self):
+        synced, _ = self.sync()
+        live = os.path.join(self.tmp.name, "live.css")
+        os.link(os.path.join(self.dst, "index.css"), live)
+        self.write(os.path.join(self.src, "index.css"), "changed")
+        self.sync(synced)
+        self.assertEqual(self.read(live), "body {}")
+
+    def test_workers(self):
+        for i in range(20):
+            self.write(os.path.join(self.src, "images", f"photo{i}.png"), str(i))
+        synced, copied = self.sync(workers=4)
+        self.assertEqual(len(synced), 22)
+        self.assertEqual(len(copied), 22)
+        self.assertEqual(self.read(os.path.join(self.dst, "images", "photo7.png")), "7")
+        self.assertEqual(self.sync(synced, workers=4)[1], [])
+
+    def test_failures_are_reported_together(self):
+        def fail_on_png(src, dst):
+            if src.endswith(".png"):
+                raise PermissionError("denied")
+            real_copy(src, dst)
+
+        self.write(os.path.join(self.src, "images", "icon.png"), "icon")
+        real_copy = copy_directory._copy_file
+        with mock.patch.object(copy_directory, "_copy_file", side_effect=fail_on_png):
+            with self.assertRaises(CopyError) as cm:
+                sync_directory(self.src, self.dst, workers=4)
+        self.assertEqual([os.path.basename(path) for path, _ in cm.exception.failures],
+                         ["icon.png", "logo.png"])
+        # The other files were still copied
+        self.assertEqual(self.read(os.path.join(self.dst, "index.css")), "body {}")
+
+    def test_missing_source(self):
+        self.assertEqual(sync_directory(os.path.join(self.tmp.name, "missing"), self.dst), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
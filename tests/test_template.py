@@ -0,0 +1,69 @@
+import io
+import unittest
+from src.htmlnode import LeafNode, ParentNode
+from src.template import Template
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_compile_segments(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(template.slots, ("Title", "Content"))
+        self.assertEqual(template.literals, ("<title>", "</title><body>", "</body>"))
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{Content}}")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>x</p>"),
+            "<title>Hi</title><p>x</p>",
+        )
+
+    def test_repeated_slot(self):
+        template = Template("{{ Title }} - {{ Title }}")
+        self.assertEqual(template.render(Title="A"), "A - A")
+
+    def test_values_are_not_rescanned(self):
+        template = Template("<h1>{{ Title }}</h1><div>{{ Content }}</div>")
+        html = template.render(Title="{{ Content }}", Content="Literal {{ Title }}")
+        self.assertEqual(html, "<h1>{{ Content }}</h1><div>Literal {{ Title }}</div>")
+
+    def test_non_placeholder_braces_are_literal(self):
+        template = Template("a { b } {{ not a slot! }} {{Content}}")
+        self.assertEqual(template.slots, ("Content",))
+        self.assertEqual(template.render(Content="c"), "a { b } {{ not a slot! }} c")
+
+    def test_missing_value(self):
+        template = Template("{{ Title }}")
+        with self.assertRaises(ValueError):
+            template.render(Content="x")
+
+    def test_unknown_slots_are_literal(self):
+        template = Template("<title>{{ Title }}</title>{{ Year }}{{Content}}{{ Author}}")
+        self.assertEqual(template.render(Title="Hi", Content="c"), "<title>Hi</title>{{ Year }}c{{ Author}}")
+        out = io.StringIO()
+        template.write(out, Title="Hi", Content="c", Year="2026")
+        self.assertEqual(out.getvalue(), "<title>Hi</title>2026c{{ Author}}")
+
+    def test_no_slots(self):
+        template = Template("static")
+        self.assertEqual(template.render(), "static")
+
+    def test_write_streams_nodes(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        out = io.StringIO()
+        template.write(out, Title="Hi", Content=ParentNode("p", [LeafNode("x")]))
+        self.assertEqual(out.getvalue(), "<title>Hi</title><p>x</p>")
+
+    def test_write_missing_value(self):
+        out = io.StringIO()
+        with self.assertRaises(ValueError):
+            Template("{{ Title }}").write(out)
+        self.assertEqual(out.getvalue(), "")
+
+    def test_hash_tracks_source(self):
+        self.assertEqual(Template("a").hash, Template("a").hash)
+        self.assertNotEqual(Template("a").hash, Template("b").hash)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 
-from src.textnode import TextNode
+import pickle
+
+from src.textnode import TextNode, TextType
 
 
 class TestTextMode(unittest.TestCase):
@@ -29,6 +31,50 @@ class TestTextMode(unittest.TestCase):
         node2 = TextNode("This is a text node", "bold")
         self.assertEqual(node, node2)
 
+    def test_text_types_are_the_plain_strings(self):
+        self.assertEqual(TextNode("a", TextType.BOLD), TextNode("a", "bold"))
+        self.assertIs(TextType.ITALIC, "italic")
+
+    def test_nodes_are_slotted(self):
+        node = TextNode.from_span("a **b**", 4, 5, TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(pickle.loads(pickle.dumps(node)), TextNode("b", TextType.BOLD))
+
+
+class TestSpanTextNode(unittest.TestCase):
+    def test_span_equals_text_node(self):
+        node = TextNode.from_span("see [the docs](/docs)", 5, 13, "link", "/docs")
+        self.assertEqual(node, TextNode("the docs", "link", "/docs"))
+        self.assertEqual(repr(node), "TextNode('the docs', 'link', '/docs')")
+
+    def test_text_is_materialized_on_first_read(self):
+        node = TextNode.from_span("a **bold** b", 4, 8, "bold")
+        self.assertIsNone(node._text)
+        self.assertEqual(node.text, "bold")
+        self.assertIs(node.text, node.text)
+
+    def test_whole_source_is_not_copied(self):
+        source = "x" * 100
+        self.assertIs(TextNode.from_span(source, 0, 100, "text").text, source)
+
+    def test_buffer(self):
+        source = "a **bold** b"
+        self.assertEqual(TextNode.from_span(source, 4, 8, "bold").buffer(), (source, 4, 8))
+        self.assertEqual(TextNode("bold", "bold").buffer(), ("bold", 0, 4))
+
+    def test_is_blank(self):
+        self.assertTrue(TextNode.from_span("a \t\n b", 1, 4, "text").is_blank())
+        self.assertTrue(TextNode.from_span("ab", 1, 1, "text").is_blank())
+        self.assertFalse(TextNode.from_span("a \u00a0b", 1, 4, "text").is_blank())
+        self.assertTrue(TextNode(" \u00a0", "text").is_blank())
+
+    def test_setting_text_drops_the_span(self):
+        node = TextNode.from_span("a **bold** b", 4, 8, "bold")
+        node.text = "other"
+        self.assertEqual(node.text, "other")
+        self.assertIsNone(node.source)
+        self.assertEqual(node.buffer(), ("other", 0, 5))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -60,6 +60,12 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
             text_node_to_leaf_node(text_node)
         self.assertTrue("Unknown text type" in str(context.exception))
 
+    def test_unknown_text_type_reports_the_span(self):
+        text_node = TextNode.from_span("see ??this??", 6, 10, "unknown")
+        with self.assertRaises(Exception) as context:
+            text_node_to_leaf_node(text_node)
+        self.assertIn("at characters 6-10", str(context.exception))
+
 
 if __name__ == "__main__":
     unittest.main()